@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Benchmark do Extrator de Conteúdo
+Compara, por página, o caminho anterior (cada estratégia faz o próprio parse
+do HTML) com a árvore lxml compartilhada do RobustContentExtractor: tempo de
+CPU, pico de memória Python (tracemalloc) e pico de RSS em processo novo.
+O tracemalloc não vê as árvores do lxml (memória nativa); o RSS vê.
+
+Uso: python benchmark_content_extractor.py [pagina.html ...]
+Sem argumentos, usa uma página grande gerada (artigo com navegação e scripts).
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import multiprocessing
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+ITERATIONS = int(os.getenv('EXTRACTOR_BENCHMARK_ITERATIONS', 10))
+PAGE_URL = 'https://exemplo.com.br/noticias/mercado-2024'
+SEMANTIC_TAGS = ['article', 'main', 'section']
+NOISE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside', 'form']
+
+def build_large_page(paragraphs: int = 3000) -> str:
+    """Página de artigo grande com navegação, scripts e blocos repetidos"""
+    nav = ''.join(f'<li><a href="/secao/{i}">Seção {i}</a></li>' for i in range(200))
+    body = ''.join(
+        f'<div class="post-content"><h2>Tópico {i}</h2><p>O mercado brasileiro de '
+        f'e-commerce cresceu {i % 30}% no período, com destaque para o varejo '
+        f'digital e para pequenas empresas que adotaram marketplaces. '
+        f'<a href="/artigo/{i}">Leia mais</a></p></div>'
+        for i in range(paragraphs)
+    )
+    scripts = ''.join(f'<script>var bloco{i} = {{"id": {i}, "dados": "{"x" * 200}"}};</script>' for i in range(100))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Mercado 2024</title>'
+        f'<style>.post-content {{ margin: 0; }}</style>{scripts}</head><body>'
+        f'<header><nav><ul>{nav}</ul></nav></header>'
+        f'<main><article>{body}</article></main>'
+        '<aside>Relacionados</aside><footer>Rodapé</footer></body></html>'
+    )
+
+def old_parse(html: str):
+    """Parse por estratégia como no caminho anterior (BeautifulSoup, ou lxml sem ele)"""
+    try:
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+    except ImportError:
+        from lxml import html as lxml_html
+        return lxml_html.document_fromstring(html)
+
+def old_text(doc) -> str:
+    return doc.get_text() if hasattr(doc, 'get_text') else doc.text_content()
+
+def old_strip(doc, tags):
+    if hasattr(doc, 'decompose'):
+        for element in doc(tags):
+            element.decompose()
+    else:
+        from lxml import etree
+        etree.strip_elements(doc, *tags, with_tail=False)
+    return doc
+
+def run_multi_parse(html: str):
+    """Caminho anterior: cada estratégia recebe o HTML bruto e faz seu parse"""
+    from services.robust_content_extractor import HAS_TRAFILATURA, HAS_READABILITY
+
+    old_text(old_parse(html))  # verificação de página dinâmica
+    old_text(old_strip(old_parse(html), ['script', 'style', 'noscript', 'iframe']))  # extração dinâmica
+    if HAS_TRAFILATURA:
+        import trafilatura
+        trafilatura.extract(html, url=PAGE_URL)
+    if HAS_READABILITY:
+        from readability import Document
+        Document(html).summary()
+    doc = old_strip(old_parse(html), NOISE_TAGS)  # fallback DOM
+    if hasattr(doc, 'find_all'):
+        ' '.join(element.get_text() for element in doc.find_all(SEMANTIC_TAGS))
+    else:
+        ' '.join(element.text_content() for element in doc.iter(*SEMANTIC_TAGS))
+    old_text(old_strip(old_parse(html), ['script', 'style']))  # fallback agressivo
+
+def run_shared_tree(html: str):
+    """Caminho atual: um único parse lxml compartilhado por todas as estratégias"""
+    from services.robust_content_extractor import robust_content_extractor as extractor
+
+    tree = extractor._parse_html(html)
+    extractor._is_dynamic_page(html, tree)
+    extractor._extract_dynamic_content(html, PAGE_URL, tree)
+    extractor._extract_with_trafilatura(html, PAGE_URL, tree)
+    extractor._extract_with_readability(html, PAGE_URL, tree)
+    extractor._extract_with_dom(html, PAGE_URL, tree)
+    extractor._aggressive_fallback_extraction(html, PAGE_URL, tree)  # modifica a árvore: por último
+
+PATHS = {'multi_parse': run_multi_parse, 'shared_tree': run_shared_tree}
+
+def measure_time(function, html: str) -> float:
+    """Tempo médio de CPU por página em milissegundos"""
+    function(html)  # aquecimento
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        function(html)
+    return (time.process_time() - start) / ITERATIONS * 1000
+
+def measure_tracemalloc(function, html: str) -> float:
+    """Pico de memória alocada pelo Python durante uma página, em MB"""
+    tracemalloc.start()
+    try:
+        function(html)
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+def peak_rss_mb():
+    """
+    Pico de RSS do processo (VmHWM do Linux) em MB, ou None sem /proc.
+    ru_maxrss não serve: no Linux herda o pico do processo pai através do exec.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _rss_worker(path_name: str, html: str, queue):
+    """Processo novo: aumento do pico de RSS causado por uma página"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    import services.robust_content_extractor  # noqa: F401 (importa antes da linha de base)
+    baseline = peak_rss_mb()
+    PATHS[path_name](html)
+    queue.put(peak_rss_mb() - baseline)
+
+def measure_rss(path_name: str, html: str) -> float:
+    """Aumento do pico de RSS (inclui a memória nativa do lxml) em processo novo, em MB"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_rss_worker, args=(path_name, html, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    """Executa benchmark para as páginas informadas ou para a página gerada"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    from services.robust_content_extractor import HAS_LXML
+
+    if not HAS_LXML:
+        print("❌ lxml não instalado")
+        return False
+
+    has_rss = peak_rss_mb() is not None
+    pages = [(os.path.basename(path), open(path, encoding='utf-8', errors='replace').read()) for path in sys.argv[1:]]
+    if not pages:
+        pages = [('gerada', build_large_page())]
+
+    print("=" * 72)
+    print(f"⏱️ BENCHMARK DO EXTRATOR DE CONTEÚDO ({ITERATIONS} iterações por página)")
+    print("=" * 72)
+    print(f"{'página':<14}{'KB':>8}{'caminho':>14}{'CPU (ms)':>12}{'tracemalloc':>13}{'RSS (MB)':>11}")
+
+    for name, html in pages:
+        results = {}
+        for path_name, function in PATHS.items():
+            cpu_ms = measure_time(function, html)
+            peak_mb = measure_tracemalloc(function, html)
+            rss_mb = measure_rss(path_name, html) if has_rss else None
+            results[path_name] = cpu_ms
+            print(
+                f"{name:<14}{len(html.encode('utf-8')) / 1024:>8.0f}{path_name:>14}{cpu_ms:>12.1f}"
+                f"{peak_mb:>11.1f}MB{rss_mb if rss_mb is not None else float('nan'):>11.1f}"
+            )
+        print(f"{'':<22}ganho de CPU: {results['multi_parse'] / results['shared_tree']:.1f}x")
+
+    print("=" * 72)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Benchmark do Parser de SERP
+Compara o tempo de parse por página do parser lxml com a extração
+anterior via BeautifulSoup(html.parser), usando as páginas de fixtures/serp
+"""
+
+import os
+import sys
+import time
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'serp')
+ITERATIONS = int(os.getenv('SERP_BENCHMARK_ITERATIONS', 50))
+
+# Seletores da extração anterior (um por buscador)
+SOUP_SELECTORS = {
+    'bing': ('li.b_algo', 'h2 a', '.b_caption p'),
+    'duckduckgo': ('div.result', 'a.result__a', '.result__snippet'),
+    'yahoo': ('div.Sr', 'h3 a', 'span.fz-ms'),
+    'google_news': ('h3, h4', None, None)
+}
+
+def parse_with_soup(engine: str, content: bytes, max_results: int = 10):
+    """Extração equivalente à implementação anterior com BeautifulSoup"""
+    from bs4 import BeautifulSoup
+
+    item_selector, link_selector, snippet_selector = SOUP_SELECTORS[engine]
+    soup = BeautifulSoup(content, 'html.parser')
+    results = []
+    for item in soup.select(item_selector)[:max_results]:
+        link = item.select_one(link_selector) if link_selector else item
+        snippet = item.select_one(snippet_selector) if snippet_selector else None
+        if link is not None:
+            results.append({
+                'title': link.get_text(strip=True),
+                'url': link.get('href', ''),
+                'snippet': snippet.get_text(strip=True) if snippet else ''
+            })
+    return results
+
+def measure(function, *args) -> float:
+    """Tempo médio por chamada em milissegundos"""
+    function(*args)  # aquecimento
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        function(*args)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+def main():
+    """Executa benchmark para todas as páginas gravadas"""
+    from services.serp_parser import serp_parser, HAS_LXML
+
+    if not HAS_LXML:
+        print("❌ lxml não instalado")
+        return False
+
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+
+    print("=" * 60)
+    print(f"⏱️ BENCHMARK DO PARSER DE SERP ({ITERATIONS} iterações por página)")
+    print("=" * 60)
+    print(f"{'buscador':<14}{'KB':>8}{'lxml (ms)':>12}{'bs4 (ms)':>12}{'ganho':>8}")
+
+    for engine in SOUP_SELECTORS:
+        with open(os.path.join(FIXTURES_DIR, f"{engine}.html"), 'rb') as f:
+            content = f.read()
+
+        lxml_ms = measure(serp_parser.parse, engine, content, 10)
+        if has_bs4:
+            soup_ms = measure(parse_with_soup, engine, content, 10)
+            print(f"{engine:<14}{len(content) / 1024:>8.1f}{lxml_ms:>12.2f}{soup_ms:>12.2f}{soup_ms / lxml_ms:>7.1f}x")
+        else:
+            print(f"{engine:<14}{len(content) / 1024:>8.1f}{lxml_ms:>12.2f}{'-':>12}{'-':>8}")
+
+    print("=" * 60)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
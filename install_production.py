@@ -122,6 +122,10 @@ SUPABASE_URL=your-supabase-url
 SUPABASE_ANON_KEY=your-supabase-anon-key
 SUPABASE_SERVICE_ROLE_KEY=your-supabase-service-role-key
 DATABASE_URL=your-database-url
+# Repositório de análises: supabase (API REST) ou postgres (conexão direta via DATABASE_URL)
+DATABASE_BACKEND=supabase
+DATABASE_POOL_MIN=1
+DATABASE_POOL_MAX=10
 
 # AI APIs
 GEMINI_API_KEY=your-gemini-api-key
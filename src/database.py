@@ -9,8 +9,16 @@ import os
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from services.supabase_client import supabase_client
+from services.analysis_backend import analysis_backend, analysis_backend_name
 from services.local_file_manager import local_file_manager
+from services.analysis_sync_queue import analysis_sync_queue
+from services.analysis_sync_engine import analysis_sync_engine
+from services.stats_service import stats_service
+from services.analysis_cache import analysis_cache
+from services.analysis_record import (
+    SECTION_COLUMNS, BLOB_PESQUISA_WEB, build_analysis_row, split_blobs, assemble_analysis,
+    resolve_projection, project_analysis, encode_cursor, decode_cursor
+)
 import json
 
 logger = logging.getLogger(__name__)
@@ -20,19 +28,34 @@ class DatabaseManager:
     
     def __init__(self):
         """Inicializa gerenciador com Supabase e arquivos locais"""
-        self.supabase = supabase_client
+        # Backend remoto (Supabase REST ou PostgreSQL direto, via DATABASE_BACKEND);
+        # o nome do atributo é mantido por compatibilidade com as rotas
+        self.supabase = analysis_backend
+        self.backend_name = analysis_backend_name
         self.local_files = local_file_manager
+        self.sync_queue = analysis_sync_queue
+        self.sync_engine = analysis_sync_engine
+        self.stats_service = stats_service
+        self.analysis_cache = analysis_cache
         
-        logger.info("✅ Database Manager inicializado com Supabase + Local Files")
+        # Write-behind: a resposta sai após o commit local; o Supabase é
+        # atualizado em segundo plano pela fila de sincronização
+        self.write_behind = os.getenv('SUPABASE_WRITE_BEHIND', 'true').lower() == 'true'
+        
+        logger.info(f"✅ Database Manager inicializado com {self.backend_name} + Local Files")
     
     def test_connection(self) -> bool:
-        """Testa conexão com o banco"""
-        return self.supabase.test_connection()
+        """Testa conexão com o banco (resultado recente em cache)"""
+        return self.stats_service.is_connected()
     
     def create_analysis(self, analysis_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Cria nova análise no banco e salva localmente"""
+        """
+        Salva a análise localmente e agenda o envio ao Supabase.
+        O ID local é o mesmo usado no Supabase; o estado do envio fica em
+        get_sync_status.
+        """
         try:
-            # 1. Salva arquivos localmente primeiro
+            # 1. Salva arquivos localmente primeiro (commit durável)
             logger.info("💾 Salvando análise em arquivos locais...")
             local_result = self.local_files.save_analysis_locally(analysis_data)
             
@@ -40,85 +63,226 @@ class DatabaseManager:
                 logger.error(f"❌ Falha ao salvar localmente: {local_result.get('error')}")
                 return None
             
-            # 2. Adiciona caminho dos arquivos locais aos dados
-            analysis_data['local_files_path'] = local_result.get('base_directory')
-            analysis_data['local_files_info'] = local_result.get('files', [])
-            
-            # 3. Salva no Supabase
-            logger.info("☁️ Salvando análise no Supabase...")
-            supabase_result = self.supabase.create_analysis(analysis_data)
+            analysis_id = local_result['analysis_id']
             
-            if supabase_result:
-                # 4. Salva informações dos arquivos no Supabase
-                analysis_id = supabase_result['id']
-                
-                for file_info in local_result.get('files', []):
-                    self.supabase.save_analysis_file(analysis_id, {
-                        'file_type': file_info['type'],
-                        'file_name': file_info['name'],
-                        'file_path': file_info['path'],
-                        'file_size': file_info['size'],
-                        'content_preview': f"Arquivo {file_info['type']} da análise"
-                    })
-                
-                logger.info(f"✅ Análise criada: Supabase ID {analysis_id} + {len(local_result['files'])} arquivos locais")
-                
-                # Retorna dados combinados
+            if not self.supabase.is_connected():
                 return {
-                    **supabase_result,
-                    'local_files': local_result
-                }
-            else:
-                logger.warning("⚠️ Falha no Supabase, mas arquivos locais salvos com sucesso")
-                return {
-                    'id': local_result['analysis_id'],
+                    'id': analysis_id,
                     'local_only': True,
                     'local_files': local_result
                 }
+            
+            # 2. Registra na fila de sincronização (persistente); no modo
+            # síncrono o envio é feito aqui, sem acordar a thread da fila
+            self.sync_queue.enqueue(analysis_id, wake=self.write_behind)
+            
+            if not self.write_behind:
+                # Modo síncrono: envia agora, com a mesma idempotência da fila
+                logger.info("☁️ Salvando análise no Supabase...")
+                supabase_result = self.sync_queue.sync_now(analysis_id)
+                if supabase_result:
+                    logger.info(f"✅ Análise criada: Supabase ID {analysis_id} + {len(local_result['files'])} arquivos locais")
+                    return {
+                        **supabase_result,
+                        'local_files': local_result,
+                        'sync_status': 'synced'
+                    }
+                logger.warning("⚠️ Falha no Supabase, mas arquivos locais salvos com sucesso - envio segue na fila")
+            else:
+                logger.info(f"☁️ Análise {analysis_id} na fila de sincronização com Supabase")
+            
+            return {
+                'id': analysis_id,
+                'local_files': local_result,
+                'sync_status': self.get_sync_status(analysis_id)['status']
+            }
                 
         except Exception as e:
             logger.error(f"❌ Erro ao criar análise: {str(e)}")
             return None
     
+    def get_sync_status(self, analysis_id: str) -> Dict[str, Any]:
+        """Estado da sincronização local -> Supabase de uma análise"""
+        job = self.sync_queue.get_status(str(analysis_id))
+        if job:
+            return job
+        return {
+            'analysis_id': str(analysis_id),
+            'status': 'local_only' if not self.supabase.is_connected() else 'unknown'
+        }
+    
     def update_analysis(self, analysis_id: int, update_data: Dict[str, Any]) -> bool:
         """Atualiza análise existente"""
-        return self.supabase.update_analysis(str(analysis_id), update_data)
+        updated = self.supabase.update_analysis(str(analysis_id), update_data)
+        self.analysis_cache.invalidate(str(analysis_id))
+        return updated
+    
+    def get_analysis(
+        self,
+        analysis_id: int,
+        fields: Optional[List[str]] = None,
+        sections: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca análise por ID, com cache read-through. fields/sections limitam
+        as colunas e seções retornadas: a projeção vai para a consulta ou, se
+        a análise só existir localmente, para a leitura do container.
+        Nomes desconhecidos geram ValueError.
+        """
+        analysis_id = str(analysis_id)
+        projection = resolve_projection(fields or (), sections or ()) if fields or sections else None
+        
+        analysis = self.analysis_cache.get(analysis_id, projection)
+        if analysis is not None:
+            return analysis
+        
+        version = self.analysis_cache.version(analysis_id)
+        if projection is None:
+            analysis = self.supabase.get_analysis(analysis_id)
+        else:
+            analysis = self.supabase.get_analysis(analysis_id, columns=projection[0], blob_kinds=projection[1])
+        
+        if analysis is None:
+            analysis = self._get_local_analysis(analysis_id, projection)
+        
+        if analysis is not None:
+            self.analysis_cache.set(analysis_id, projection, analysis, version)
+        return analysis
     
-    def get_analysis(self, analysis_id: int) -> Optional[Dict[str, Any]]:
-        """Busca análise por ID"""
-        return self.supabase.get_analysis(str(analysis_id))
+    def _get_local_analysis(self, analysis_id: str, projection) -> Optional[Dict[str, Any]]:
+        """Análise local no mesmo formato do registro do banco"""
+        metadata = self.local_files.index.get_analysis(analysis_id)
+        if not metadata:
+            return None
+        
+        analysis_id = metadata['analysis_id']
+        local_columns = {
+            'created_at': metadata.get('created_at'),
+            'updated_at': metadata.get('created_at'),
+            'local_files_path': self.local_files.base_dir
+        }
+        
+        if projection is None:
+            analysis_data = self.local_files.load_analysis(analysis_id)
+            if analysis_data is None:
+                return None
+            record = {**build_analysis_row(analysis_data, analysis_id), **local_columns}
+            return assemble_analysis(record, split_blobs(analysis_data))
+        
+        columns, blob_kinds = projection
+        keys = [
+            SECTION_COLUMNS.get(column, column) for column in columns
+            if column != 'id' and column not in local_columns
+        ]
+        if BLOB_PESQUISA_WEB in blob_kinds:
+            keys.append('pesquisa_web_massiva')
+        
+        values = self.local_files.load_analysis_fields(analysis_id, keys)
+        if values is None:
+            return None
+        
+        record = {
+            column: local_columns[column] if column in local_columns else values.get(SECTION_COLUMNS.get(column, column))
+            for column in columns
+        }
+        record['id'] = analysis_id
+        return project_analysis(record, {BLOB_PESQUISA_WEB: values.get('pesquisa_web_massiva')}, blob_kinds)
     
     def list_analyses(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Lista análises com paginação"""
         return self.supabase.list_analyses(limit, offset)
     
+    def list_analyses_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Página de análises por keyset (created_at, id): o custo não cresce com
+        a profundidade. next_cursor é None na última página; cursor inválido
+        gera ValueError.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        analyses = self.supabase.list_analyses(limit, cursor=after, filters=filters)
+        
+        next_cursor = None
+        if len(analyses) == limit:
+            next_cursor = encode_cursor(analyses[-1]['created_at'], analyses[-1]['id'])
+        
+        return {'analyses': analyses, 'next_cursor': next_cursor}
+    
     def delete_analysis(self, analysis_id: int) -> bool:
         """Remove análise do banco"""
+        result = self.delete_analysis_sources(analysis_id)
+        return result['supabase'] or result['local']
+    
+    def delete_analysis_sources(self, analysis_id: int) -> Dict[str, bool]:
+        """Remove análise do banco e dos arquivos locais, informando cada origem"""
+        # Não envia ao Supabase uma análise que está sendo removida
+        self.sync_queue.cancel(str(analysis_id))
+        self.analysis_cache.invalidate(str(analysis_id))
+        
         # Remove do Supabase
         supabase_result = self.supabase.delete_analysis(str(analysis_id))
+        if supabase_result:
+            self.stats_service.invalidate('stats')
         
         # Remove arquivos locais
         local_result = self.local_files.delete_local_analysis(str(analysis_id))
         
-        return supabase_result or local_result
+        return {'supabase': bool(supabase_result), 'local': bool(local_result)}
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do banco"""
-        # Combina estatísticas do Supabase e arquivos locais
-        supabase_stats = self.supabase.get_stats()
-        local_analyses = self.local_files.list_local_analyses()
+        # Combina estatísticas do banco (agregadas e em cache) e do índice local
+        supabase_stats = self.stats_service.get_stats()
         
         return {
             **supabase_stats,
-            'local_analyses_count': len(local_analyses),
-            'local_analyses': local_analyses[:10],  # Últimas 10
-            'storage_type': 'hybrid_supabase_local'
+            'local_analyses_count': self.local_files.count_local_analyses(),
+            'local_analyses': self.local_files.list_local_analyses(limit=10),  # Últimas 10
+            'storage_type': f'hybrid_{self.backend_name}_local',
+            'sync_queue': self.sync_queue.get_stats(),
+            'sync_manifest': self.sync_engine.get_stats(),
+            'stats_cache': self.stats_service.get_cache_stats(),
+            'analysis_cache': self.analysis_cache.get_stats()
         }
     
     def get_analysis_files(self, analysis_id: str) -> List[Dict[str, Any]]:
         """Busca arquivos de uma análise"""
         return self.supabase.get_analysis_files(analysis_id)
     
+    def backfill_local_analyses(self, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Carga em lote das análises locais no banco remoto. Com o backend
+        PostgreSQL usa COPY (preservando created_at), grava os registros de
+        arquivos na mesma transação e registra as inseridas no manifesto de
+        sincronização; no Supabase, roda a sincronização incremental.
+        """
+        if hasattr(self.supabase, 'bulk_load_analyses'):
+            def local_analyses():
+                for analysis_id in self.local_files.iter_analysis_ids(batch_size=batch_size):
+                    prepared = self.sync_queue.prepare_upload(analysis_id)
+                    if prepared is not None:
+                        analysis_data, files, created_at = prepared
+                        yield analysis_id, analysis_data, created_at, files
+
+            def record_inserted(analysis_ids):
+                for analysis_id in analysis_ids:
+                    self.sync_engine.record_synced(analysis_id, {'id': analysis_id})
+
+            inserted = self.supabase.bulk_load_analyses(
+                local_analyses(), batch_size=batch_size, on_inserted=record_inserted
+            )
+            return {
+                'backend': self.backend_name,
+                'total_local': self.local_files.count_local_analyses(),
+                'inserted': inserted
+            }
+
+        return {'backend': self.backend_name, **self.sync_engine.sync()}
+    
     def list_local_analyses(self) -> List[Dict[str, Any]]:
         """Lista análises salvas localmente"""
         return self.local_files.list_local_analyses()
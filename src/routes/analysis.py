@@ -19,6 +19,7 @@ from services.safe_extract_content import safe_content_extractor
 from services.analysis_quality_controller import analysis_quality_controller
 from services.content_quality_validator import content_quality_validator
 from services.attachment_service import attachment_service
+from services.analysis_record import LIST_FILTERS
 from database import db_manager
 from routes.progress import get_progress_tracker, update_analysis_progress
 
@@ -169,7 +170,8 @@ def analyze_market():
                 else:
                     analysis_result['database_id'] = db_record['id']
                     analysis_result['local_files'] = db_record.get('local_files')
-                    logger.info(f"✅ Análise salva: Supabase ID {db_record['id']} + arquivos locais")
+                    analysis_result['sync_status'] = db_record.get('sync_status')
+                    logger.info(f"✅ Análise salva: ID {db_record['id']} + arquivos locais (Supabase: {db_record.get('sync_status')})")
             else:
                 logger.warning("⚠️ Falha ao salvar análise")
                 
@@ -596,8 +598,22 @@ def list_analyses():
     try:
         limit = min(int(request.args.get('limit', 20)), 100)
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
+        filters = {name: request.args[name] for name in LIST_FILTERS if request.args.get(name)}
         
-        analyses = db_manager.list_analyses(limit, offset)
+        if offset and not cursor and not filters:
+            # Paginação por offset mantida para clientes antigos
+            analyses = db_manager.list_analyses(limit, offset)
+            next_cursor = None
+        else:
+            try:
+                page = db_manager.list_analyses_page(limit, cursor, filters)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+            analyses, next_cursor = page['analyses'], page['next_cursor']
         
         return jsonify({
             'success': True,
@@ -605,6 +621,8 @@ def list_analyses():
             'count': len(analyses),
             'limit': limit,
             'offset': offset,
+            'next_cursor': next_cursor,
+            'filters': filters,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -615,12 +633,25 @@ def list_analyses():
             'message': str(e)
         }), 500
 
-@analysis_bp.route('/get_analysis/<int:analysis_id>', methods=['GET'])
+@analysis_bp.route('/get_analysis/<analysis_id>', methods=['GET'])
 def get_analysis(analysis_id):
-    """Obtém análise específica"""
+    """
+    Obtém análise específica.
+    ?fields=segmento,status&sections=avatar_ultra_detalhado,pesquisa_web
+    retorna só as colunas e seções pedidas.
+    """
     
     try:
-        analysis = db_manager.get_analysis(analysis_id)
+        fields = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()]
+        sections = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+        
+        try:
+            analysis = db_manager.get_analysis(analysis_id, fields=fields, sections=sections)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         if analysis:
             return jsonify({
@@ -641,6 +672,24 @@ def get_analysis(analysis_id):
             'message': str(e)
         }), 500
 
+@analysis_bp.route('/analyses/<analysis_id>/sync_status', methods=['GET'])
+def get_sync_status(analysis_id):
+    """Estado da sincronização da análise com o Supabase"""
+    
+    try:
+        return jsonify({
+            'success': True,
+            'sync': db_manager.get_sync_status(analysis_id),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter sincronização da análise {analysis_id}: {str(e)}")
+        return jsonify({
+            'error': 'Erro ao obter estado de sincronização',
+            'message': str(e)
+        }), 500
+
 @analysis_bp.route('/stats', methods=['GET'])
 def get_stats():
     """Obtém estatísticas do sistema"""
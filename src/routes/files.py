@@ -5,11 +5,16 @@ ARQV30 Enhanced v2.0 - Rotas de Arquivos
 Endpoints para gerenciamento de arquivos locais das análises
 """
 
+import io
 import os
+import json
 import logging
 from datetime import datetime
-from flask import Blueprint, request, jsonify, send_file
+from typing import Dict, Optional, Any
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
 from services.local_file_manager import local_file_manager
+from services.analysis_record import LIST_FILTERS
+from services.zip_stream import stream_zip
 from database import db_manager
 
 logger = logging.getLogger(__name__)
@@ -22,12 +27,36 @@ def list_local_analyses():
     """Lista análises salvas localmente"""
     
     try:
-        analyses = local_file_manager.list_local_analyses()
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        sort_by = request.args.get('sort_by', 'created_at')
+        descending = request.args.get('order', 'desc').lower() != 'asc'
+        cursor = request.args.get('cursor')
+        filters = {name: request.args[name] for name in LIST_FILTERS if request.args.get(name)}
+        
+        next_cursor = None
+        if limit and not offset and sort_by == 'created_at' and descending:
+            # Ordem padrão: paginação por keyset (cursor), custo constante por página
+            try:
+                page = local_file_manager.list_local_analyses_page(limit, cursor, filters)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+            analyses, next_cursor = page['analyses'], page['next_cursor']
+        else:
+            analyses = local_file_manager.list_local_analyses(limit, offset, sort_by, descending, filters)
         
         return jsonify({
             'success': True,
             'analyses': analyses,
             'count': len(analyses),
+            'total': local_file_manager.count_local_analyses(filters),
+            'limit': limit,
+            'offset': offset,
+            'next_cursor': next_cursor,
+            'filters': filters,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -46,21 +75,9 @@ def get_analysis_files(analysis_id):
         # Busca arquivos no Supabase
         supabase_files = db_manager.get_analysis_files(analysis_id)
         
-        # Busca diretório local
+        # Arquivos locais pelo índice
         local_directory = local_file_manager.get_analysis_directory(analysis_id)
-        
-        local_files = []
-        if local_directory:
-            for file in os.listdir(local_directory):
-                if analysis_id[:8] in file:
-                    file_path = os.path.join(local_directory, file)
-                    local_files.append({
-                        'name': file,
-                        'path': file_path,
-                        'size': os.path.getsize(file_path),
-                        'type': file.split('_')[-1].split('.')[0] if '_' in file else 'unknown',
-                        'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                    })
+        local_files = local_file_manager.get_analysis_files(analysis_id)
         
         return jsonify({
             'success': True,
@@ -78,11 +95,79 @@ def get_analysis_files(analysis_id):
             'message': str(e)
         }), 500
 
+def _not_modified(etag: str) -> Optional[Response]:
+    """Resposta 304 se o cliente já tem a versão atual (If-None-Match)"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def _json_page(data: Any, array_path: str, offset: int, limit: int) -> Dict[str, Any]:
+    """Página de um array dentro do JSON (caminho com pontos, ex.: pesquisa_web.extracted_content)"""
+    target = data
+    for part in array_path.split('.'):
+        if isinstance(target, dict) and part in target:
+            target = target[part]
+        elif isinstance(target, list) and part.isdigit() and int(part) < len(target):
+            target = target[int(part)]
+        else:
+            raise KeyError(array_path)
+    
+    if not isinstance(target, list):
+        raise ValueError(f"'{array_path}' não é uma lista")
+    
+    items = target[offset:offset + limit]
+    next_offset = offset + len(items)
+    return {
+        'array': array_path,
+        'items': items,
+        'total': len(target),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset if next_offset < len(target) else None
+    }
+
 @files_bp.route('/download_file', methods=['GET'])
 def download_file():
-    """Download de arquivo local"""
+    """
+    Download de arquivo local (path=) ou de uma seção de análise
+    (analysis_id= e section=). Suporta Range e ETag/If-None-Match; o arquivo
+    é enviado em fluxo.
+    """
     
     try:
+        analysis_id = request.args.get('analysis_id')
+        section = request.args.get('section')
+        
+        if analysis_id and section:
+            source = local_file_manager.section_source(analysis_id, section)
+            if not source:
+                return jsonify({
+                    'error': 'Seção não encontrada'
+                }), 404
+            
+            etag = local_file_manager.content_etag(source, section)
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+            
+            section_data = local_file_manager.load_analysis_section(analysis_id, section)
+            if section_data is None:
+                return jsonify({
+                    'error': 'Seção não encontrada'
+                }), 404
+            
+            return send_file(
+                io.BytesIO(json.dumps(section_data, ensure_ascii=False, indent=2).encode('utf-8')),
+                mimetype='application/json',
+                as_attachment=True,
+                download_name=f"{analysis_id[:8]}_{section}.json",
+                etag=etag,
+                last_modified=os.path.getmtime(source),
+                conditional=True
+            )
+        
         file_path = request.args.get('path')
         
         if not file_path:
@@ -90,22 +175,25 @@ def download_file():
                 'error': 'Caminho do arquivo não fornecido'
             }), 400
         
-        # Verifica se o arquivo existe e está no diretório permitido
+        # Verifica se o arquivo existe
         if not os.path.exists(file_path):
             return jsonify({
                 'error': 'Arquivo não encontrado'
             }), 404
         
-        # Verifica se está no diretório de análises
-        if not file_path.startswith(local_file_manager.base_dir):
+        # Verifica se está no diretório de análises (caminho real, sem "..")
+        real_path = local_file_manager.resolve_local_path(file_path)
+        if not real_path:
             return jsonify({
                 'error': 'Acesso negado ao arquivo'
             }), 403
         
         return send_file(
-            file_path,
+            real_path,
             as_attachment=True,
-            download_name=os.path.basename(file_path)
+            download_name=os.path.basename(real_path),
+            etag=local_file_manager.content_etag(real_path),
+            conditional=True
         )
         
     except Exception as e:
@@ -120,18 +208,16 @@ def delete_local_analysis(analysis_id):
     """Remove análise local por ID"""
     
     try:
-        # Remove do Supabase
-        supabase_result = db_manager.supabase.delete_analysis(analysis_id)
-        
-        # Remove arquivos locais
-        local_result = local_file_manager.delete_local_analysis(analysis_id)
+        # Remove do Supabase e dos arquivos locais, cancelando a sincronização
+        # pendente e invalidando os caches de todos os workers
+        result = db_manager.delete_analysis_sources(analysis_id)
         
-        if supabase_result or local_result:
+        if result['supabase'] or result['local']:
             return jsonify({
                 'success': True,
                 'message': 'Análise removida com sucesso',
-                'supabase_deleted': supabase_result,
-                'local_deleted': local_result
+                'supabase_deleted': result['supabase'],
+                'local_deleted': result['local']
             })
         else:
             return jsonify({
@@ -148,11 +234,68 @@ def delete_local_analysis(analysis_id):
 
 @files_bp.route('/get_file_content', methods=['GET'])
 def get_file_content():
-    """Obtém conteúdo de um arquivo local"""
+    """
+    Obtém conteúdo de um arquivo local (path=) ou seção (analysis_id= e section=).
+    Texto: até max_chars a partir de offset (bytes no arquivo, caracteres na
+    seção), sem ler o restante do arquivo. Com array= (ex.: extracted_content),
+    retorna uma página do array JSON (offset/limit em itens).
+    Respostas têm ETag; If-None-Match devolve 304 sem ler o arquivo.
+    """
     
     try:
         file_path = request.args.get('path')
         max_chars = int(request.args.get('max_chars', 5000))
+        offset = max(int(request.args.get('offset', 0)), 0)
+        array_path = request.args.get('array')
+        limit = min(max(int(request.args.get('limit', 50)), 1), 1000)
+        
+        # Seções em container são lidas por análise + seção
+        analysis_id = request.args.get('analysis_id')
+        section = request.args.get('section')
+        if analysis_id and section:
+            source = local_file_manager.section_source(analysis_id, section)
+            if not source:
+                return jsonify({
+                    'error': 'Seção não encontrada'
+                }), 404
+            
+            etag = local_file_manager.content_etag(source, section)
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+            
+            section_data = local_file_manager.load_analysis_section(analysis_id, section)
+            if section_data is None:
+                return jsonify({
+                    'error': 'Seção não encontrada'
+                }), 404
+            
+            result = {
+                'success': True,
+                'analysis_id': analysis_id,
+                'section': section
+            }
+            
+            if array_path:
+                result.update(_json_page(section_data, array_path, offset, limit))
+            else:
+                full_content = json.dumps(section_data, ensure_ascii=False, indent=2)
+                content = full_content[offset:offset + max_chars]
+                next_offset = offset + len(content)
+                truncated = next_offset < len(full_content)
+                if truncated:
+                    content += f"\n\n... [Arquivo truncado - {len(full_content)} caracteres totais]"
+                result.update({
+                    'content': content,
+                    'file_size': len(full_content.encode('utf-8')),
+                    'offset': offset,
+                    'next_offset': next_offset if truncated else None,
+                    'truncated': truncated
+                })
+            
+            response = jsonify(result)
+            response.set_etag(etag)
+            return response
         
         if not file_path:
             return jsonify({
@@ -165,28 +308,66 @@ def get_file_content():
                 'error': 'Arquivo não encontrado'
             }), 404
         
-        if not file_path.startswith(local_file_manager.base_dir):
+        real_path = local_file_manager.resolve_local_path(file_path)
+        if not real_path:
             return jsonify({
                 'error': 'Acesso negado ao arquivo'
             }), 403
         
-        # Lê conteúdo do arquivo
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Limita tamanho se necessário
-        if len(content) > max_chars:
-            content = content[:max_chars] + f"\n\n... [Arquivo truncado - {len(content)} caracteres totais]"
+        etag = local_file_manager.content_etag(real_path)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
         
-        return jsonify({
+        file_size = os.path.getsize(real_path)
+        result = {
             'success': True,
             'file_path': file_path,
-            'file_name': os.path.basename(file_path),
-            'content': content,
-            'file_size': os.path.getsize(file_path),
-            'truncated': len(content) > max_chars
-        })
+            'file_name': os.path.basename(real_path),
+            'file_size': file_size
+        }
+        
+        if array_path:
+            # Paginar um array exige interpretar o JSON inteiro
+            with open(real_path, 'r', encoding='utf-8') as f:
+                result.update(_json_page(json.load(f), array_path, offset, limit))
+        else:
+            # Lê só a janela pedida, recuando até o último caractere UTF-8 completo;
+            # o caractere cortado abre a próxima página
+            with open(real_path, 'rb') as f:
+                f.seek(offset)
+                raw = f.read(max_chars)
+                end = _utf8_boundary(raw)
+                if end == 0 and raw:
+                    # Janela menor que um caractere: completa o caractere
+                    raw += f.read(_utf8_length(raw[0]) - len(raw))
+                    end = len(raw)
+            content = raw[:end].decode('utf-8')
+            next_offset = offset + end
+            truncated = next_offset < file_size
+            if truncated:
+                content += f"\n\n... [Arquivo truncado - {file_size} bytes totais]"
+            result.update({
+                'content': content,
+                'offset': offset,
+                'next_offset': next_offset if truncated else None,
+                'truncated': truncated
+            })
+        
+        response = jsonify(result)
+        response.set_etag(etag)
+        return response
         
+    except KeyError as e:
+        return jsonify({
+            'error': 'Array não encontrado',
+            'message': str(e)
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'error': 'Parâmetros inválidos',
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Erro ao ler arquivo: {str(e)}")
         return jsonify({
@@ -194,41 +375,46 @@ def get_file_content():
             'message': str(e)
         }), 500
 
+def _utf8_length(lead: int) -> int:
+    """Tamanho da sequência UTF-8 iniciada pelo byte"""
+    if lead >= 0xF0:
+        return 4
+    if lead >= 0xE0:
+        return 3
+    if lead >= 0xC0:
+        return 2
+    return 1
+
+def _utf8_boundary(raw: bytes) -> int:
+    """Tamanho do maior prefixo de raw que termina em caractere UTF-8 completo"""
+    for start in range(len(raw) - 1, max(-1, len(raw) - 5), -1):
+        if raw[start] & 0xC0 != 0x80:  # primeiro byte de uma sequência
+            return len(raw) if start + _utf8_length(raw[start]) <= len(raw) else start
+    return len(raw)
+
+def _zip_response(entries, download_name: str) -> Response:
+    """Resposta com o ZIP gerado em fluxo a partir das entradas (nome, conteúdo)"""
+    return Response(
+        stream_with_context(stream_zip(entries)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
+
 @files_bp.route('/export_analysis/<analysis_id>', methods=['GET'])
 def export_analysis(analysis_id):
-    """Exporta análise completa como ZIP"""
+    """Exporta análise completa como ZIP (gerado em fluxo, sem arquivo temporário)"""
     
     try:
-        import zipfile
-        import tempfile
-        
-        # Busca diretório da análise
-        analysis_dir = local_file_manager.get_analysis_directory(analysis_id)
-        
-        if not analysis_dir:
+        resolved_id = local_file_manager.index.resolve_id(analysis_id)
+        if not resolved_id:
             return jsonify({
                 'error': 'Análise não encontrada'
             }), 404
         
-        # Cria arquivo ZIP temporário
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-            zip_path = tmp_file.name
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Adiciona todos os arquivos da análise
-            for root, dirs, files in os.walk(local_file_manager.base_dir):
-                for file in files:
-                    if analysis_id[:8] in file:
-                        file_path = os.path.join(root, file)
-                        # Nome no ZIP será relativo ao diretório base
-                        arcname = os.path.relpath(file_path, local_file_manager.base_dir)
-                        zipf.write(file_path, arcname)
-        
-        return send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=f"analise_{analysis_id[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-            mimetype='application/zip'
+        # Visão de exportação: um JSON por seção, como no layout antigo
+        return _zip_response(
+            local_file_manager.iter_export_files(resolved_id),
+            f"analise_{resolved_id[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
         )
         
     except Exception as e:
@@ -238,53 +424,67 @@ def export_analysis(analysis_id):
             'message': str(e)
         }), 500
 
+@files_bp.route('/export_analyses', methods=['GET', 'POST'])
+def export_analyses():
+    """
+    Exporta várias análises em um único ZIP gerado em fluxo.
+    IDs em analysis_ids (JSON) ou ?ids=a,b; sem IDs, exporta as análises que
+    atendem aos filtros da listagem (segmento, status, created_from, created_to).
+    """
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        analysis_ids = data.get('analysis_ids') or [
+            analysis_id.strip() for analysis_id in request.args.get('ids', '').split(',') if analysis_id.strip()
+        ]
+        
+        if analysis_ids:
+            resolved_ids = [local_file_manager.index.resolve_id(analysis_id) for analysis_id in analysis_ids]
+            missing = [analysis_id for analysis_id, resolved_id in zip(analysis_ids, resolved_ids) if not resolved_id]
+            if missing:
+                return jsonify({
+                    'error': 'Análises não encontradas',
+                    'missing': missing
+                }), 404
+        else:
+            filters = {name: request.args[name] for name in LIST_FILTERS if request.args.get(name)}
+            filters.update({name: data[name] for name in LIST_FILTERS if data.get(name)})
+            if not local_file_manager.count_local_analyses(filters):
+                return jsonify({
+                    'error': 'Nenhuma análise encontrada'
+                }), 404
+            resolved_ids = local_file_manager.iter_analysis_ids(filters)
+        
+        return _zip_response(
+            local_file_manager.iter_bulk_export_files(resolved_ids),
+            f"analises_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        )
+        
+    except Exception as e:
+        logger.error(f"Erro ao exportar análises: {str(e)}")
+        return jsonify({
+            'error': 'Erro ao exportar análises',
+            'message': str(e)
+        }), 500
+
 @files_bp.route('/storage_stats', methods=['GET'])
 def get_storage_stats():
-    """Obtém estatísticas de armazenamento"""
+    """Obtém estatísticas de armazenamento (contadores mantidos pelo índice)"""
     
     try:
-        # Estatísticas do diretório local
-        total_size = 0
-        total_files = 0
-        
-        for root, dirs, files in os.walk(local_file_manager.base_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    total_size += os.path.getsize(file_path)
-                    total_files += 1
-                except:
-                    continue
-        
-        # Estatísticas por tipo
-        type_stats = {}
-        for subdir in ['avatars', 'drivers_mentais', 'provas_visuais', 'anti_objecao', 
-                      'pre_pitch', 'predicoes_futuro', 'posicionamento', 'concorrencia',
-                      'palavras_chave', 'metricas', 'funil_vendas', 'plano_acao', 
-                      'insights', 'pesquisa_web', 'completas', 'metadata']:
-            
-            subdir_path = os.path.join(local_file_manager.base_dir, subdir)
-            if os.path.exists(subdir_path):
-                subdir_files = len([f for f in os.listdir(subdir_path) if os.path.isfile(os.path.join(subdir_path, f))])
-                subdir_size = sum(os.path.getsize(os.path.join(subdir_path, f)) 
-                                for f in os.listdir(subdir_path) 
-                                if os.path.isfile(os.path.join(subdir_path, f)))
-                
-                type_stats[subdir] = {
-                    'files': subdir_files,
-                    'size_bytes': subdir_size,
-                    'size_mb': round(subdir_size / (1024 * 1024), 2)
-                }
+        stats = local_file_manager.get_storage_stats()
+        total_size = stats.get('total_size_bytes', 0)
         
         return jsonify({
             'success': True,
             'storage_stats': {
                 'base_directory': local_file_manager.base_dir,
-                'total_files': total_files,
+                'total_files': stats.get('total_files', 0),
                 'total_size_bytes': total_size,
                 'total_size_mb': round(total_size / (1024 * 1024), 2),
                 'total_size_gb': round(total_size / (1024 * 1024 * 1024), 3),
-                'type_breakdown': type_stats
+                'type_breakdown': stats.get('sections', {}),
+                'last_reconciliation': stats.get('last_reconciliation')
             },
             'supabase_connected': db_manager.supabase.is_connected(),
             'timestamp': datetime.now().isoformat()
@@ -297,56 +497,48 @@ def get_storage_stats():
             'message': str(e)
         }), 500
 
+@files_bp.route('/storage_stats/reconcile', methods=['POST'])
+def reconcile_storage_stats():
+    """Recalcula os contadores de armazenamento conferindo o disco"""
+    
+    try:
+        result = local_file_manager.reconcile_storage()
+        return jsonify({
+            **result,
+            'timestamp': datetime.now().isoformat()
+        }), 200 if result.get('success') else 500
+        
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar armazenamento: {str(e)}")
+        return jsonify({
+            'error': 'Erro ao reconciliar armazenamento',
+            'message': str(e)
+        }), 500
+
 @files_bp.route('/cleanup_old_files', methods=['POST'])
 def cleanup_old_files():
-    """Remove arquivos antigos (mais de 30 dias)"""
+    """Remove análises antigas (mais de 30 dias) com seus arquivos"""
     
     try:
         data = request.get_json() or {}
         days_old = int(data.get('days_old', 30))
         dry_run = data.get('dry_run', True)  # Por padrão, apenas simula
         
-        from datetime import timedelta
-        cutoff_date = datetime.now() - timedelta(days=days_old)
-        
-        files_to_remove = []
-        total_size_to_remove = 0
-        
-        # Busca arquivos antigos
-        for root, dirs, files in os.walk(local_file_manager.base_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                    
-                    if file_mtime < cutoff_date:
-                        file_size = os.path.getsize(file_path)
-                        files_to_remove.append({
-                            'path': file_path,
-                            'name': file,
-                            'size': file_size,
-                            'modified': file_mtime.isoformat()
-                        })
-                        total_size_to_remove += file_size
-                        
-                        # Remove arquivo se não for dry run
-                        if not dry_run:
-                            os.remove(file_path)
-                            logger.info(f"🗑️ Arquivo removido: {file}")
-                            
-                except Exception as e:
-                    logger.error(f"Erro ao processar arquivo {file}: {str(e)}")
-                    continue
+        result = local_file_manager.cleanup_old_analyses(days_old, dry_run)
+        if not dry_run:
+            for analysis_id in result['analyses']:
+                db_manager.analysis_cache.invalidate(analysis_id)
         
         action = "Simulação de limpeza" if dry_run else "Limpeza executada"
         
         return jsonify({
             'success': True,
             'action': action,
-            'files_found': len(files_to_remove),
-            'total_size_mb': round(total_size_to_remove / (1024 * 1024), 2),
-            'cutoff_date': cutoff_date.isoformat(),
-            'files': files_to_remove if dry_run else [],
+            'analyses_found': len(result['analyses']),
+            'files_found': len(result['files']),
+            'total_size_mb': round(result['total_size_bytes'] / (1024 * 1024), 2),
+            'cutoff_date': result['cutoff_date'],
+            'files': result['files'] if dry_run else [],
             'dry_run': dry_run
         })
         
@@ -359,7 +551,10 @@ def cleanup_old_files():
 
 @files_bp.route('/backup_to_supabase', methods=['POST'])
 def backup_to_supabase():
-    """Faz backup de análises locais para Supabase"""
+    """
+    Faz backup incremental das análises locais para Supabase: só as
+    alteradas desde o último envio (segundo o manifesto) são enviadas
+    """
     
     try:
         if not db_manager.supabase.is_connected():
@@ -368,70 +563,72 @@ def backup_to_supabase():
                 'message': 'Configure as credenciais do Supabase'
             }), 400
         
-        # Lista análises locais
-        local_analyses = local_file_manager.list_local_analyses()
+        options = request.get_json(silent=True) or {}
+        
+        # Opcional: confere o Supabase antes, para reenviar análises removidas lá
+        reset = 0
+        if options.get('verify_remote'):
+            reset = db_manager.sync_engine.compare_remote(reset_missing=True)['reset_missing_remote']
+        
+        try:
+            report = db_manager.sync_engine.sync(
+                workers=options.get('workers'),
+                batch_size=options.get('batch_size'),
+                dry_run=bool(options.get('dry_run'))
+            )
+        except RuntimeError as e:
+            return jsonify({'error': 'Sincronização em andamento', 'message': str(e)}), 409
+        
+        message = (
+            f"Backup simulado: {report['changed']} análises a verificar" if options.get('dry_run')
+            else f"Backup concluído: {report.get('uploaded', 0)} análises"
+        )
+        return jsonify({
+            'success': True,
+            'message': message,
+            **report,
+            'backed_up': report.get('uploaded', 0),
+            'reset_missing_remote': reset,
+            'timestamp': datetime.now().isoformat()
+        })
         
-        backed_up = 0
-        errors = []
+    except Exception as e:
+        logger.error(f"Erro no backup para Supabase: {str(e)}")
+        return jsonify({
+            'error': 'Erro no backup para Supabase',
+            'message': str(e)
+        }), 500
+
+@files_bp.route('/backfill_remote', methods=['POST'])
+def backfill_remote():
+    """Carga inicial das análises locais no banco remoto (COPY no PostgreSQL)"""
+    
+    try:
+        if not db_manager.supabase.is_connected():
+            return jsonify({'error': 'Banco remoto não está conectado'}), 400
         
-        for analysis in local_analyses:
-            try:
-                analysis_id = analysis['analysis_id']
-                
-                # Verifica se já existe no Supabase
-                existing = db_manager.supabase.get_analysis(analysis_id)
-                if existing:
-                    logger.info(f"⚠️ Análise {analysis_id} já existe no Supabase")
-                    continue
-                
-                # Carrega análise completa do arquivo JSON
-                json_file = None
-                for root, dirs, files in os.walk(local_file_manager.base_dir):
-                    for file in files:
-                        if analysis_id[:8] in file and file.endswith('_completa.json'):
-                            json_file = os.path.join(root, file)
-                            break
-                    if json_file:
-                        break
-                
-                if json_file:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        analysis_data = json.load(f)
-                    
-                    # Salva no Supabase
-                    result = db_manager.supabase.create_analysis(analysis_data)
-                    if result:
-                        backed_up += 1
-                        logger.info(f"✅ Backup realizado: {analysis_id}")
-                    else:
-                        errors.append(f"Falha ao fazer backup de {analysis_id}")
-                else:
-                    errors.append(f"Arquivo JSON não encontrado para {analysis_id}")
-                    
-            except Exception as e:
-                error_msg = f"Erro no backup de {analysis.get('analysis_id', 'unknown')}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
+        options = request.get_json(silent=True) or {}
+        try:
+            result = db_manager.backfill_local_analyses(batch_size=int(options.get('batch_size', 500)))
+        except RuntimeError as e:
+            return jsonify({'error': 'Sincronização em andamento', 'message': str(e)}), 409
         
         return jsonify({
             'success': True,
-            'message': f'Backup concluído: {backed_up} análises',
-            'total_local': len(local_analyses),
-            'backed_up': backed_up,
-            'errors': errors,
+            **result,
             'timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
-        logger.error(f"Erro no backup para Supabase: {str(e)}")
+        logger.error(f"Erro na carga inicial: {str(e)}")
         return jsonify({
-            'error': 'Erro no backup para Supabase',
+            'error': 'Erro na carga inicial',
             'message': str(e)
         }), 500
 
 @files_bp.route('/sync_with_supabase', methods=['POST'])
 def sync_with_supabase():
-    """Sincroniza análises entre local e Supabase"""
+    """Compara todas as análises do Supabase (paginadas por keyset) com as locais"""
     
     try:
         if not db_manager.supabase.is_connected():
@@ -439,38 +636,34 @@ def sync_with_supabase():
                 'error': 'Supabase não está conectado'
             }), 400
         
-        # Lista análises do Supabase
-        supabase_analyses = db_manager.supabase.list_analyses(100)
-        
-        # Lista análises locais
-        local_analyses = local_file_manager.list_local_analyses()
-        
-        # Identifica diferenças
-        supabase_ids = set(a['id'] for a in supabase_analyses)
-        local_ids = set(a['analysis_id'] for a in local_analyses)
-        
-        only_supabase = supabase_ids - local_ids
-        only_local = local_ids - supabase_ids
-        both = supabase_ids & local_ids
+        comparison = db_manager.sync_engine.compare_remote()
+        plan = db_manager.sync_engine.sync(dry_run=True)
         
         return jsonify({
             'success': True,
             'sync_status': {
-                'total_supabase': len(supabase_analyses),
-                'total_local': len(local_analyses),
-                'only_in_supabase': len(only_supabase),
-                'only_in_local': len(only_local),
-                'in_both': len(both),
-                'sync_needed': len(only_supabase) + len(only_local) > 0
+                'total_supabase': len(comparison['remote_ids']),
+                'total_local': len(comparison['local_ids']),
+                'only_in_supabase': len(comparison['only_remote']),
+                'only_in_local': len(comparison['only_local']),
+                'in_both': len(comparison['in_both']),
+                'pending_upload': plan['changed'],
+                'missing_in_supabase': len(comparison['missing_remote']),
+                'sync_needed': len(comparison['only_remote']) + len(comparison['missing_remote']) + plan['changed'] > 0
             },
             'details': {
-                'only_supabase_ids': list(only_supabase),
-                'only_local_ids': list(only_local),
-                'synced_ids': list(both)
+                'only_supabase_ids': list(comparison['only_remote']),
+                'only_local_ids': list(comparison['only_local']),
+                'synced_ids': list(comparison['in_both']),
+                'pending_upload_ids': plan['changed_ids'],
+                'missing_in_supabase_ids': comparison['missing_remote']
             },
+            'manifest': db_manager.sync_engine.get_stats(),
             'timestamp': datetime.now().isoformat()
         })
         
+    except RuntimeError as e:
+        return jsonify({'error': 'Sincronização em andamento', 'message': str(e)}), 409
     except Exception as e:
         logger.error(f"Erro na sincronização: {str(e)}")
         return jsonify({
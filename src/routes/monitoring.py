@@ -6,7 +6,7 @@ ARQV30 Enhanced v2.0 - Monitoring Routes
 Endpoints para monitoramento do sistema de extração
 """
 from flask import Blueprint, jsonify, request
-from services.robust_content_extractor import robust_content_extractor
+from services.robust_content_extractor import robust_content_extractor, EXTRACTOR_STATS_ALIASES
 import logging
 
 logger = logging.getLogger(__name__)
@@ -92,7 +92,8 @@ def health_check():
         stats = robust_content_extractor.get_extractor_stats()
         global_stats = stats.get('global', {})
         available_extractors = sum(1 for name, data in stats.items() 
-                                 if name != 'global' and data.get('available', False))
+                                 if name != 'global' and name not in EXTRACTOR_STATS_ALIASES
+                                 and data.get('available', False))
         
         # Verifica status das APIs de IA
         from services.ai_manager import ai_manager
@@ -57,6 +57,9 @@ from routes.progress import progress_bp
 from routes.files import files_bp
 from services.production_search_manager import production_search_manager
 from services.production_content_extractor import production_content_extractor
+from services.pdf_extraction_service import pdf_extraction_service
+from services.url_resolver import url_resolver
+from services.negative_cache import negative_cache
 
 def create_app():
     """Cria e configura a aplicação Flask"""
@@ -192,6 +195,8 @@ def create_app():
         try:
             production_search_manager.clear_cache()
             production_content_extractor.clear_cache()
+            url_resolver.clear_cache()
+            negative_cache.clear()
 
             return jsonify({
                 'success': True,
@@ -276,6 +281,7 @@ def cleanup_on_exit():
     try:
         production_search_manager.cache.cleanup_expired()
         production_content_extractor.clear_cache()
+        pdf_extraction_service.shutdown()
     except Exception as e:
         logger.error(f"Erro na limpeza final: {e}")
 def main():
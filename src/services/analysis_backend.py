@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Backend
+Seleciona o backend do repositório de análises: API REST do Supabase
+(padrão) ou conexão direta ao PostgreSQL com pool
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKEND_SUPABASE = 'supabase'
+BACKEND_POSTGRES = 'postgres'
+
+def _select_backend():
+    """Backend configurado em DATABASE_BACKEND, com Supabase como alternativa"""
+    backend_name = os.getenv('DATABASE_BACKEND', BACKEND_SUPABASE).strip().lower()
+
+    if backend_name == BACKEND_POSTGRES:
+        from services.postgres_client import postgres_client
+        if postgres_client.is_connected():
+            logger.info("🐘 Repositório de análises usando PostgreSQL direto")
+            return BACKEND_POSTGRES, postgres_client
+        logger.warning("⚠️ PostgreSQL indisponível - usando Supabase")
+    elif backend_name != BACKEND_SUPABASE:
+        logger.warning(f"⚠️ DATABASE_BACKEND desconhecido '{backend_name}' - usando Supabase")
+
+    from services.supabase_client import supabase_client
+    return BACKEND_SUPABASE, supabase_client
+
+# Instância global
+analysis_backend_name, analysis_backend = _select_backend()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Cache
+Cache read-through em memória das leituras de análise, por ID e projeção,
+invalidado quando a análise é atualizada ou removida
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Hashable
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    """
+    LRU de leituras de análise. A chave é (ID, projeção); a projeção None é
+    a análise completa. invalidate(ID) descarta todas as projeções do ID.
+    Os valores são compartilhados entre leitores e não devem ser alterados.
+
+    Cada processo do gunicorn tem seu próprio LRU; a coerência entre eles vem
+    de uma tabela SQLite de versões por análise: invalidate() incrementa a
+    versão e cada leitura confere a versão da entrada antes de usá-la.
+    """
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "analysis_cache_versions.db")
+        self.max_entries = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 256))
+        self.max_bytes = int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        # Só protege contra alterações feitas fora da aplicação (ex.: painel do Supabase)
+        self.ttl = float(os.getenv('ANALYSIS_CACHE_TTL', 60))
+        self.entries = OrderedDict()  # (analysis_id, projeção) -> (valor, criado_em, versão, bytes)
+        self.keys_by_id = {}  # analysis_id -> chaves em cache
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'stale': 0, 'too_large': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa tabela SQLite de versões"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS versions (
+                        analysis_id TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar versões do cache de análises: {e}")
+
+    def version(self, analysis_id: str) -> int:
+        """
+        Versão atual da análise (0 se nunca invalidada). Leia antes de buscar a
+        análise e passe a set(), para que uma invalidação no meio não seja perdida.
+        """
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                row = conn.execute("SELECT version FROM versions WHERE analysis_id = ?", (analysis_id,)).fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao ler versão da análise {analysis_id}: {e}")
+            return -1  # força nova leitura
+
+    def get(self, analysis_id: str, projection: Hashable = None) -> Optional[Any]:
+        """Valor em cache ou None"""
+        key = (analysis_id, projection)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        expired = time.time() - entry[1] > self.ttl
+        stale = not expired and self.version(analysis_id) != entry[2]
+        with self.lock:
+            if expired or stale:
+                if self.entries.get(key) is entry:
+                    self._remove(key)
+                self.stats['misses'] += 1
+                if stale:
+                    self.stats['stale'] += 1
+                return None
+
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def set(self, analysis_id: str, projection: Hashable, value: Any, version: Optional[int] = None):
+        """Guarda leitura, descartando as menos usadas além dos limites de entradas e bytes"""
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        if size > self.max_bytes // 4:
+            self.stats['too_large'] += 1
+            return
+
+        if version is None:
+            version = self.version(analysis_id)
+        key = (analysis_id, projection)
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (value, time.time(), version, size)
+            self.total_bytes += size
+            self.keys_by_id.setdefault(analysis_id, set()).add(key)
+
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.stats['evictions'] += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[3]
+        keys = self.keys_by_id.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_id[key[0]]
+
+    def invalidate(self, analysis_id: str):
+        """Descarta as leituras em cache da análise neste e nos demais processos"""
+        with self.lock:
+            for key in list(self.keys_by_id.get(analysis_id, ())):
+                self._remove(key)
+            self.stats['invalidations'] += 1
+
+        try:
+            with sqlite3.connect(self.db_path, timeout=5) as conn:
+                conn.execute(
+                    "INSERT INTO versions (analysis_id, version, updated_at) VALUES (?, 1, ?) "
+                    "ON CONFLICT(analysis_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+                    (analysis_id, time.time())
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Erro ao invalidar análise {analysis_id} nos demais processos: {e}")
+
+    def clear(self):
+        """Limpa o cache"""
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_id.clear()
+            self.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache"""
+        return {
+            **self.stats,
+            'entries': len(self.entries),
+            'bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl
+        }
+
+# Instância global
+analysis_cache = AnalysisCache()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Container
+Arquivo único e comprimido por análise, com tabela de offsets para ler uma
+seção sem descomprimir as demais
+
+Formato:
+    MAGIC (5 bytes) | tamanho da tabela (4 bytes, big-endian) | tabela JSON | frames
+    tabela = {"codec": "zlib"|"zstd", "sections": {nome: [offset, tamanho, bytes_json]}}
+    Cada seção é um frame JSON comprimido de forma independente; offsets são
+    relativos ao fim da tabela.
+"""
+
+import os
+import json
+import zlib
+import struct
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'ARQV\x01'
+TABLE_LENGTH = struct.Struct('>I')
+CONTAINER_EXTENSION = '.arqv'
+
+class AnalysisContainerError(Exception):
+    """Container ausente, corrompido ou sem a seção pedida"""
+    pass
+
+class AnalysisContainer:
+    """Leitura e escrita de containers de análise"""
+
+    def __init__(self):
+        codec = os.getenv('ANALYSIS_CONTAINER_CODEC', 'zstd' if HAS_ZSTD else 'zlib').lower()
+        if codec == 'zstd' and not HAS_ZSTD:
+            logger.warning("⚠️ zstandard não instalado - containers usarão zlib")
+            codec = 'zlib'
+        self.codec = codec
+        self.level = int(os.getenv('ANALYSIS_CONTAINER_LEVEL', 3 if codec == 'zstd' else 6))
+
+    def encode(self, data: Any) -> Tuple[bytes, int]:
+        """Serializa e comprime uma seção; retorna (frame, bytes do JSON)"""
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if self.codec == 'zstd':
+            frame = zstandard.ZstdCompressor(level=self.level).compress(raw)
+        else:
+            frame = zlib.compress(raw, self.level)
+        return frame, len(raw)
+
+    def _decode(self, frame: bytes, codec: str) -> Any:
+        if codec == 'zstd':
+            if not HAS_ZSTD:
+                raise AnalysisContainerError("Container zstd requer o pacote zstandard")
+            raw = zstandard.ZstdDecompressor().decompress(frame)
+        else:
+            raw = zlib.decompress(frame)
+        return json.loads(raw.decode('utf-8'))
+
+    def write(self, path: str, frames: Dict[str, Tuple[bytes, int]]) -> Dict[str, Dict[str, int]]:
+        """
+        Grava o container de forma atômica a partir de frames já codificados
+        (nome -> (frame, bytes do JSON)). Retorna {nome: {offset, size, raw_size}}.
+        """
+        sections = {}
+        offset = 0
+        for name, (frame, raw_size) in frames.items():
+            sections[name] = [offset, len(frame), raw_size]
+            offset += len(frame)
+
+        table = json.dumps({'codec': self.codec, 'sections': sections}, separators=(',', ':')).encode('utf-8')
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(TABLE_LENGTH.pack(len(table)))
+            f.write(table)
+            for frame, _ in frames.values():
+                f.write(frame)
+        os.replace(tmp_path, path)
+
+        return {
+            name: {'offset': entry[0], 'size': entry[1], 'raw_size': entry[2]}
+            for name, entry in sections.items()
+        }
+
+    def _read_table(self, f) -> Tuple[Dict[str, Any], int]:
+        """Lê cabeçalho e tabela; retorna (tabela, posição de início dos frames)"""
+        if f.read(len(MAGIC)) != MAGIC:
+            raise AnalysisContainerError("Arquivo não é um container de análise")
+        (table_length,) = TABLE_LENGTH.unpack(f.read(TABLE_LENGTH.size))
+        table = json.loads(f.read(table_length).decode('utf-8'))
+        return table, len(MAGIC) + TABLE_LENGTH.size + table_length
+
+    def read_table(self, path: str) -> Dict[str, Any]:
+        """Tabela de seções do container"""
+        with open(path, 'rb') as f:
+            return self._read_table(f)[0]
+
+    def list_sections(self, path: str) -> List[str]:
+        """Nomes das seções na ordem em que foram gravadas"""
+        return list(self.read_table(path)['sections'])
+
+    def read_section(self, path: str, name: str) -> Any:
+        """Lê e descomprime apenas a seção pedida"""
+        with open(path, 'rb') as f:
+            table, data_start = self._read_table(f)
+            entry = table['sections'].get(name)
+            if entry is None:
+                raise AnalysisContainerError(f"Seção {name} não encontrada no container")
+            f.seek(data_start + entry[0])
+            return self._decode(f.read(entry[1]), table['codec'])
+
+    def read_sections(self, path: str, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Lê várias seções (todas, se names=None) com uma única abertura do arquivo"""
+        with open(path, 'rb') as f:
+            table, data_start = self._read_table(f)
+            sections = {}
+            for name, entry in table['sections'].items():
+                if names is not None and name not in names:
+                    continue
+                f.seek(data_start + entry[0])
+                sections[name] = self._decode(f.read(entry[1]), table['codec'])
+            return sections
+
+# Instância global
+analysis_container = AnalysisContainer()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Record
+Formato da análise no banco (linha enxuta + blobs comprimidos), compartilhado
+pelos backends Supabase e PostgreSQL
+"""
+
+import json
+import zlib
+import uuid
+import base64
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Any, Tuple
+
+# Coluna jsonb da tabela analyses -> chave da seção nos dados da análise
+SECTION_COLUMNS = {
+    'avatar_data': 'avatar_ultra_detalhado',
+    'positioning_data': 'escopo',
+    'competition_data': 'analise_concorrencia_detalhada',
+    'marketing_data': 'estrategia_palavras_chave',
+    'metrics_data': 'metricas_performance_detalhadas',
+    'funnel_data': 'funil_vendas_detalhado',
+    'action_plan_data': 'plano_acao_detalhado',
+    'insights_data': 'insights_exclusivos',
+    'drivers_mentais_data': 'drivers_mentais_customizados',
+    'provas_visuais_data': 'provas_visuais_instantaneas',
+    'anti_objecao_data': 'sistema_anti_objecao',
+    'pre_pitch_data': 'pre_pitch_invisivel',
+    'predicoes_futuro_data': 'predicoes_futuro_completas'
+}
+
+# Colunas da listagem (sem jsonb)
+LIST_COLUMNS = ('id', 'segmento', 'produto', 'status', 'created_at', 'updated_at', 'local_files_path')
+
+# Todas as colunas da linha enxuta, em ordem fixa
+ROW_COLUMNS = (
+    'id', 'segmento', 'produto', 'publico', 'preco', 'objetivo_receita', 'orcamento_marketing',
+    'prazo_lancamento', 'concorrentes', 'dados_adicionais', 'query', 'status',
+    *SECTION_COLUMNS.keys(), 'local_files_path', 'created_at', 'updated_at'
+)
+
+# Blobs grandes ficam comprimidos em analysis_blobs, fora da linha principal
+BLOB_PESQUISA_WEB = 'pesquisa_web'
+BLOB_BASE = 'dados_base'  # campos da análise que não têm coluna própria
+BLOB_ENCODING = 'zlib+base64'
+
+# Nomes aceitos para a seção de pesquisa web na projeção
+PESQUISA_WEB_SECTIONS = ('pesquisa_web', 'pesquisa_web_massiva', 'pesquisa_web_data')
+
+# Filtros aceitos nas listagens (created_from inclusivo, created_to exclusivo)
+LIST_FILTERS = ('segmento', 'status', 'created_from', 'created_to')
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if value else None
+
+def build_analysis_row(
+    analysis_data: Dict[str, Any],
+    analysis_id: Optional[str] = None,
+    created_at: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Linha da tabela analyses (sem pesquisa_web nem análise completa), sem
+    campos None. created_at vem dos metadados locais quando conhecido, para
+    que reenvios não alterem a data de criação remota.
+    """
+    now = datetime.now().isoformat()
+    row = {
+        'segmento': analysis_data.get('segmento', ''),
+        'produto': analysis_data.get('produto', ''),
+        'publico': analysis_data.get('publico', ''),
+        'preco': _number(analysis_data.get('preco')),
+        'objetivo_receita': _number(analysis_data.get('objetivo_receita')),
+        'orcamento_marketing': _number(analysis_data.get('orcamento_marketing')),
+        'prazo_lancamento': analysis_data.get('prazo_lancamento', ''),
+        'concorrentes': analysis_data.get('concorrentes', ''),
+        'dados_adicionais': analysis_data.get('dados_adicionais', ''),
+        'query': analysis_data.get('query', ''),
+        'status': analysis_data.get('status', 'completed'),
+        **{column: analysis_data.get(key) for column, key in SECTION_COLUMNS.items()},
+        'local_files_path': analysis_data.get('local_files_path'),
+        'created_at': created_at or now,
+        'updated_at': now
+    }
+    if analysis_id:
+        row['id'] = analysis_id
+    return {key: value for key, value in row.items() if value is not None}
+
+def split_blobs(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Blobs da análise: pesquisa web e campos sem coluna própria (seções não se repetem)"""
+    section_keys = set(SECTION_COLUMNS.values()) | {'pesquisa_web_massiva'}
+    return {
+        BLOB_PESQUISA_WEB: analysis_data.get('pesquisa_web_massiva'),
+        BLOB_BASE: {key: value for key, value in analysis_data.items() if key not in section_keys}
+    }
+
+def encode_blob(data: Any) -> Dict[str, Any]:
+    """JSON compacto comprimido (zlib) em base64"""
+    raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return {
+        'encoding': BLOB_ENCODING,
+        'data': base64.b64encode(zlib.compress(raw, 6)).decode('ascii'),
+        'raw_size': len(raw)
+    }
+
+def decode_blob(encoding: str, data: Any) -> Any:
+    """Decodifica blob (formato comprimido ou jsonb migrado das colunas antigas)"""
+    if encoding == BLOB_ENCODING:
+        return json.loads(zlib.decompress(base64.b64decode(data)).decode('utf-8'))
+    return json.loads(data) if isinstance(data, str) else data
+
+def assemble_analysis(record: Dict[str, Any], blobs: Dict[str, Any]) -> Dict[str, Any]:
+    """Preenche pesquisa_web_data e comprehensive_analysis do registro a partir dos blobs"""
+    if not blobs:
+        return record
+
+    pesquisa_web = blobs.get(BLOB_PESQUISA_WEB)
+    record['pesquisa_web_data'] = pesquisa_web
+    record['comprehensive_analysis'] = {
+        **blobs.get(BLOB_BASE, {}),
+        **{key: record[column] for column, key in SECTION_COLUMNS.items() if record.get(column) is not None},
+        **({'pesquisa_web_massiva': pesquisa_web} if pesquisa_web is not None else {})
+    }
+    return record
+
+def resolve_projection(fields: Iterable[str] = (), sections: Iterable[str] = ()) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Colunas e blobs necessários para a projeção pedida. Campos são colunas da
+    linha; seções aceitam a chave da análise (ex.: avatar_ultra_detalhado) ou
+    a coluna (avatar_data). Nomes desconhecidos geram ValueError.
+    """
+    section_keys = {key: column for column, key in SECTION_COLUMNS.items()}
+    columns = ['id']
+    blob_kinds = []
+
+    for field in fields:
+        if field not in ROW_COLUMNS:
+            raise ValueError(f"Campo desconhecido: {field}")
+        columns.append(field)
+
+    for section in sections:
+        if section in PESQUISA_WEB_SECTIONS:
+            blob_kinds.append(BLOB_PESQUISA_WEB)
+        elif section in SECTION_COLUMNS or section in section_keys:
+            columns.append(section_keys.get(section, section))
+        else:
+            raise ValueError(f"Seção desconhecida: {section}")
+
+    return tuple(dict.fromkeys(columns)), tuple(dict.fromkeys(blob_kinds))
+
+def project_analysis(record: Dict[str, Any], blobs: Dict[str, Any], blob_kinds: Iterable[str]) -> Dict[str, Any]:
+    """Acrescenta ao registro projetado os blobs pedidos"""
+    if BLOB_PESQUISA_WEB in blob_kinds:
+        record['pesquisa_web_data'] = blobs.get(BLOB_PESQUISA_WEB)
+    return record
+
+def file_row_id(analysis_id: str, file_type: str) -> str:
+    """ID determinístico do registro de arquivo (reenvio idempotente)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{analysis_id}/{file_type}"))
+
+def build_file_row(analysis_id: str, file_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha da tabela analysis_files"""
+    return {
+        'id': file_row_id(analysis_id, file_data.get('file_type')),
+        'analysis_id': analysis_id,
+        'file_type': file_data.get('file_type'),
+        'file_name': file_data.get('file_name'),
+        'file_path': file_data.get('file_path'),
+        'file_size': file_data.get('file_size', 0),
+        'content_preview': file_data.get('content_preview', ''),
+        'created_at': datetime.now().isoformat()
+    }
+
+def stats_from_rows(rows: Iterable[Tuple[Optional[str], int, int]]) -> Dict[str, Any]:
+    """Estatísticas a partir das linhas agregadas (status, total, recentes)"""
+    rows = list(rows)
+    return {
+        'total_analyses': sum(row[1] for row in rows),
+        'status_counts': {row[0] or 'unknown': row[1] for row in rows},
+        'recent_analyses': sum(row[2] for row in rows),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def encode_cursor(created_at: str, analysis_id: str) -> str:
+    """Cursor opaco da paginação por keyset a partir da última linha da página"""
+    raw = json.dumps([created_at, analysis_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(created_at, id) do cursor; ValueError se o cursor for inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, analysis_id = json.loads(raw.decode('utf-8'))
+        return str(created_at), str(analysis_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Sync Engine
+Sincronização incremental local -> Supabase baseada em um manifesto com a
+assinatura, o hash de conteúdo e a última versão enviada de cada análise
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+
+from services.analysis_backend import analysis_backend
+from services.local_file_manager import local_file_manager
+from services.analysis_sync_queue import analysis_sync_queue
+
+logger = logging.getLogger(__name__)
+
+# Estados de uma execução de sincronização
+RUN_RUNNING = 'running'
+RUN_DONE = 'completed'
+RUN_INTERRUPTED = 'interrupted'
+RUN_RESUMED = 'resumed'
+
+# Erros guardados por execução (o total de falhas é sempre contado)
+MAX_REPORTED_ERRORS = 50
+
+class AnalysisSyncEngine:
+    """
+    Motor de sincronização incremental.
+    A assinatura vem do índice local (uma consulta para todas as análises), então
+    uma sincronização sem mudanças não lê nenhum arquivo. Só quando a assinatura
+    muda o conteúdo é lido para calcular o hash; se o hash coincide com o último
+    enviado, nada é reenviado. Cada lote confirma o manifesto, que serve de
+    checkpoint: uma execução interrompida é retomada de onde parou.
+    """
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "analysis_sync_manifest.db")
+        self.supabase = analysis_backend
+        self.local_files = local_file_manager
+        self.sync_queue = analysis_sync_queue
+
+        self.workers = int(os.getenv('SUPABASE_SYNC_WORKERS', 4))
+        self.batch_size = int(os.getenv('SUPABASE_SYNC_MANIFEST_BATCH', 50))
+        self.remote_page_size = int(os.getenv('SUPABASE_SYNC_REMOTE_PAGE', 1000))
+
+        # Execução sem sinal de vida há mais tempo que isso é considerada interrompida
+        self.run_stale_after = float(os.getenv('SUPABASE_SYNC_RUN_STALE', 600))
+
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+
+        # Envios feitos pela fila write-behind também atualizam o manifesto
+        self.sync_queue.add_synced_callback(self.record_synced)
+
+    def _init_database(self):
+        """Inicializa tabelas SQLite do manifesto e das execuções"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS manifest (
+                        analysis_id TEXT PRIMARY KEY,
+                        signature TEXT,
+                        content_hash TEXT,
+                        synced_hash TEXT,
+                        synced_at REAL,
+                        remote_id TEXT,
+                        last_error TEXT,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sync_runs (
+                        run_id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        started_at REAL NOT NULL,
+                        finished_at REAL,
+                        total_local INTEGER NOT NULL DEFAULT 0,
+                        changed INTEGER NOT NULL DEFAULT 0,
+                        processed INTEGER NOT NULL DEFAULT 0,
+                        uploaded INTEGER NOT NULL DEFAULT 0,
+                        unchanged INTEGER NOT NULL DEFAULT 0,
+                        failed INTEGER NOT NULL DEFAULT 0,
+                        resumed_from TEXT,
+                        heartbeat_at REAL
+                    )
+                """)
+                # Manifestos antigos não têm heartbeat_at
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(sync_runs)")}
+                if 'heartbeat_at' not in columns:
+                    conn.execute("ALTER TABLE sync_runs ADD COLUMN heartbeat_at REAL")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar manifesto de sincronização: {e}")
+
+    def _start_run(self, started: float) -> Tuple[str, Optional[str]]:
+        """
+        Registra nova execução como 'running' se nenhuma outra estiver ativa.
+        A verificação e o registro ocorrem na mesma transação (BEGIN IMMEDIATE)
+        no banco do manifesto, então o bloqueio vale entre workers do gunicorn.
+        Execuções sem heartbeat recente (queda do processo) viram 'interrupted'
+        e a nova execução as retoma. Retorna (run_id, execução retomada).
+        """
+        run_id = str(uuid.uuid4())
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            recovered = conn.execute(
+                "UPDATE sync_runs SET status = ? WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+                (RUN_INTERRUPTED, RUN_RUNNING, started - self.run_stale_after)
+            ).rowcount
+            if recovered:
+                logger.info(f"🔄 {recovered} sincronizações incrementais interrompidas serão retomadas")
+
+            active = conn.execute("SELECT run_id FROM sync_runs WHERE status = ? LIMIT 1", (RUN_RUNNING,)).fetchone()
+            if active:
+                conn.execute("COMMIT")
+                raise RuntimeError(f"Já existe uma sincronização em andamento ({active[0]})")
+
+            row = conn.execute(
+                "SELECT run_id FROM sync_runs WHERE status = ? ORDER BY started_at DESC LIMIT 1", (RUN_INTERRUPTED,)
+            ).fetchone()
+            resumed_from = row[0] if row else None
+            conn.execute(
+                "INSERT INTO sync_runs (run_id, status, started_at, heartbeat_at, resumed_from) VALUES (?, ?, ?, ?, ?)",
+                (run_id, RUN_RUNNING, started, started, resumed_from)
+            )
+            if resumed_from:
+                conn.execute("UPDATE sync_runs SET status = ? WHERE run_id = ?", (RUN_RESUMED, resumed_from))
+            conn.execute("COMMIT")
+            return run_id, resumed_from
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _load_manifest(self) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """analysis_id -> (signature, content_hash, synced_hash)"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("SELECT analysis_id, signature, content_hash, synced_hash FROM manifest").fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def plan(self, prune: bool = False) -> Dict[str, Any]:
+        """
+        Compara o índice local com o manifesto. Retorna as análises que
+        precisam ser verificadas (assinatura nova ou versão ainda não enviada)
+        e as que não existem mais localmente; com prune, estas são removidas
+        do manifesto.
+        """
+        signatures = self.local_files.index.get_file_signatures()
+        manifest = self._load_manifest()
+        queued = self.sync_queue.get_active_ids()
+
+        changed = []
+        for analysis_id, signature in signatures.items():
+            if analysis_id in queued:
+                continue  # a fila write-behind já vai enviar esta versão
+            entry = manifest.get(analysis_id)
+            if entry is None or entry[0] != signature or entry[2] is None or entry[1] != entry[2]:
+                changed.append((analysis_id, signature))
+
+        removed = [analysis_id for analysis_id in manifest if analysis_id not in signatures]
+        if removed and prune:
+            with self.lock, sqlite3.connect(self.db_path) as conn:
+                conn.executemany("DELETE FROM manifest WHERE analysis_id = ?", [(i,) for i in removed])
+                conn.commit()
+
+        return {
+            'total_local': len(signatures),
+            'changed': changed,
+            'queued': len(queued),
+            'removed': len(removed),
+            'manifest': manifest
+        }
+
+    def _sync_one(self, analysis_id: str, signature: str, entry) -> Dict[str, Any]:
+        """Confere o hash de uma análise e a envia se o conteúdo mudou desde o último envio"""
+        result = {'analysis_id': analysis_id, 'signature': signature, 'status': 'failed'}
+        try:
+            if entry is not None and entry[0] == signature and entry[1]:
+                content_hash = entry[1]
+            else:
+                content_hash = self.local_files.content_hash(analysis_id)
+            result['content_hash'] = content_hash
+
+            if content_hash is None:
+                result['error'] = "Análise local não encontrada"
+                return result
+
+            if entry is not None and entry[2] == content_hash:
+                result['status'] = 'unchanged'
+                result['synced_hash'] = content_hash
+                return result
+
+            record = self.sync_queue.upload(analysis_id, validate_key=False)
+            if record is None:
+                result['error'] = "Análise local não encontrada"
+                return result
+
+            result.update(status='uploaded', synced_hash=content_hash, remote_id=record.get('id'))
+        except Exception as e:
+            result['error'] = str(e)
+        return result
+
+    def _save_batch(self, run_id: str, results: List[Dict[str, Any]], manifest: Dict[str, Any]):
+        """Confirma o resultado de um lote no manifesto e no checkpoint da execução"""
+        now = time.time()
+        rows = []
+        for result in results:
+            entry = manifest.get(result['analysis_id'])
+            previous_synced = entry[2] if entry else None
+            uploaded = result['status'] == 'uploaded'
+            rows.append((
+                result['analysis_id'], result['signature'], result.get('content_hash'),
+                result.get('synced_hash', previous_synced), now if uploaded else None,
+                result.get('remote_id'), result.get('error'), now
+            ))
+
+        counts = {status: sum(1 for r in results if r['status'] == status) for status in ('uploaded', 'unchanged', 'failed')}
+
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO manifest (analysis_id, signature, content_hash, synced_hash, synced_at, remote_id, "
+                "last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(analysis_id) DO UPDATE SET signature = excluded.signature, "
+                "content_hash = excluded.content_hash, synced_hash = excluded.synced_hash, "
+                "synced_at = COALESCE(excluded.synced_at, manifest.synced_at), "
+                "remote_id = COALESCE(excluded.remote_id, manifest.remote_id), "
+                "last_error = excluded.last_error, updated_at = excluded.updated_at",
+                rows
+            )
+            conn.execute(
+                "UPDATE sync_runs SET processed = processed + ?, uploaded = uploaded + ?, "
+                "unchanged = unchanged + ?, failed = failed + ?, heartbeat_at = ? WHERE run_id = ?",
+                (len(results), counts['uploaded'], counts['unchanged'], counts['failed'], now, run_id)
+            )
+            conn.commit()
+
+    def sync(
+        self,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Envia ao Supabase apenas as análises alteradas desde o último envio,
+        em lotes processados em paralelo. Com dry_run, só retorna o plano.
+        """
+        workers = max(1, workers or self.workers)
+        batch_size = max(1, batch_size or self.batch_size)
+
+        started = time.time()
+
+        if dry_run:
+            # Só leitura: não disputa o bloqueio nem altera o manifesto
+            plan = self.plan()
+            return {
+                'total_local': plan['total_local'],
+                'changed': len(plan['changed']),
+                'queued': plan['queued'],
+                'removed_from_manifest': plan['removed'],
+                'changed_ids': [analysis_id for analysis_id, _ in plan['changed']],
+                'duration': round(time.time() - started, 3)
+            }
+
+        run_id, resumed_from = self._start_run(started)
+        try:
+            plan = self.plan(prune=True)
+            changed = plan['changed']
+            report = {
+                'total_local': plan['total_local'],
+                'changed': len(changed),
+                'queued': plan['queued'],
+                'removed_from_manifest': plan['removed']
+            }
+
+            if changed and not self.supabase.test_connection():
+                raise ConnectionError("Supabase indisponível")
+
+            with self.lock, sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "UPDATE sync_runs SET total_local = ?, changed = ? WHERE run_id = ?",
+                    (plan['total_local'], len(changed), run_id)
+                )
+                conn.commit()
+
+            if resumed_from:
+                logger.info(f"🔄 Retomando sincronização {resumed_from}: {len(changed)} análises restantes")
+
+            errors = []
+            totals = {'uploaded': 0, 'unchanged': 0, 'failed': 0}
+            manifest = plan['manifest']
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for start in range(0, len(changed), batch_size):
+                    batch = changed[start:start + batch_size]
+                    results = list(executor.map(
+                        lambda item: self._sync_one(item[0], item[1], manifest.get(item[0])), batch
+                    ))
+                    self._save_batch(run_id, results, manifest)
+
+                    for result in results:
+                        totals[result['status']] += 1
+                        if result['status'] == 'failed' and len(errors) < MAX_REPORTED_ERRORS:
+                            errors.append(f"{result['analysis_id']}: {result.get('error')}")
+        except Exception:
+            self._finish_run(run_id, RUN_INTERRUPTED)
+            raise
+
+        self._finish_run(run_id, RUN_DONE)
+
+        report.update(totals)
+        report.update({
+            'run_id': run_id,
+            'resumed_from': resumed_from,
+            'errors': errors,
+            'duration': round(time.time() - started, 3)
+        })
+        logger.info(
+            f"☁️ Sincronização incremental: {len(changed)}/{plan['total_local']} alteradas, "
+            f"{totals['uploaded']} enviadas, {totals['failed']} falhas em {report['duration']}s"
+        )
+        return report
+
+    def _finish_run(self, run_id: str, status: str):
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE sync_runs SET status = ?, finished_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+            )
+            conn.commit()
+
+    def record_synced(self, analysis_id: str, record: Dict[str, Any]):
+        """Registra no manifesto um envio feito fora do motor (fila write-behind)"""
+        try:
+            signature = self.local_files.index.get_file_signatures(analysis_id).get(analysis_id)
+            content_hash = self.local_files.content_hash(analysis_id)
+            if signature is None or content_hash is None:
+                return
+
+            now = time.time()
+            with self.lock, sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO manifest (analysis_id, signature, content_hash, synced_hash, synced_at, "
+                    "remote_id, last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                    (analysis_id, signature, content_hash, content_hash, now, record.get('id'), now)
+                )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao registrar análise {analysis_id} no manifesto: {e}")
+
+    def iter_remote_ids(self):
+        """
+        IDs das análises no banco remoto: cursor no servidor com o backend
+        PostgreSQL, páginas por keyset no Supabase
+        """
+        if hasattr(self.supabase, 'iter_analyses'):
+            for row in self.supabase.iter_analyses(columns=('id',), batch_size=self.remote_page_size):
+                yield row['id']
+            return
+
+        cursor = None
+        while True:
+            page = self.supabase.list_analyses(self.remote_page_size, cursor=cursor)
+            for row in page:
+                yield row['id']
+            if len(page) < self.remote_page_size:
+                return
+            cursor = (page[-1]['created_at'], page[-1]['id'])
+
+    def compare_remote(self, reset_missing: bool = False) -> Dict[str, Any]:
+        """
+        Compara todas as análises do Supabase com as locais. Com reset_missing,
+        análises que o manifesto dá como enviadas mas não existem mais no
+        Supabase voltam a ficar pendentes para a próxima sincronização (no
+        pior caso, uma listagem incompleta só causa reenvios idempotentes).
+        """
+        if not self.supabase.test_connection():
+            raise ConnectionError("Supabase indisponível")
+
+        remote_ids = set(self.iter_remote_ids())
+        local_ids = set(self.local_files.index.get_file_signatures())
+        manifest = self._load_manifest()
+
+        missing_remote = [
+            analysis_id for analysis_id in local_ids - remote_ids
+            if manifest.get(analysis_id, (None, None, None))[2] is not None
+        ]
+        if missing_remote and not remote_ids:
+            # Listagem vazia com análises já enviadas: provável falha na consulta
+            logger.warning("⚠️ Supabase não listou nenhuma análise - manifesto mantido")
+            missing_remote = []
+        if missing_remote and reset_missing:
+            with self.lock, sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    "UPDATE manifest SET synced_hash = NULL, synced_at = NULL, updated_at = ? WHERE analysis_id = ?",
+                    [(time.time(), analysis_id) for analysis_id in missing_remote]
+                )
+                conn.commit()
+            logger.warning(f"⚠️ {len(missing_remote)} análises enviadas não estão mais no Supabase - serão reenviadas")
+
+        return {
+            'remote_ids': remote_ids,
+            'local_ids': local_ids,
+            'only_remote': remote_ids - local_ids,
+            'only_local': local_ids - remote_ids,
+            'in_both': remote_ids & local_ids,
+            'missing_remote': missing_remote,
+            'reset_missing_remote': len(missing_remote) if reset_missing else 0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do manifesto e da última execução"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            manifest = conn.execute(
+                "SELECT COUNT(*) AS tracked, "
+                "COALESCE(SUM(synced_hash IS NOT NULL AND synced_hash = content_hash), 0) AS synced, "
+                "COALESCE(SUM(last_error IS NOT NULL), 0) AS with_errors, MAX(synced_at) AS last_synced_at "
+                "FROM manifest"
+            ).fetchone()
+            last_run = conn.execute("SELECT * FROM sync_runs ORDER BY started_at DESC LIMIT 1").fetchone()
+            running = conn.execute("SELECT COUNT(*) FROM sync_runs WHERE status = ?", (RUN_RUNNING,)).fetchone()[0]
+        return {
+            'manifest': dict(manifest),
+            'last_run': dict(last_run) if last_run else None,
+            'running': running > 0
+        }
+
+# Instância global
+analysis_sync_engine = AnalysisSyncEngine()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Sync Queue
+Fila persistente (write-behind) que envia ao Supabase as análises já salvas
+localmente, em lotes, com novas tentativas e chave de idempotência
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Callable, Set, Tuple
+
+from services.analysis_backend import analysis_backend
+from services.local_file_manager import local_file_manager
+from services.analysis_cache import analysis_cache
+
+logger = logging.getLogger(__name__)
+
+# Estados de sincronização
+SYNC_PENDING = 'pending'
+SYNC_RUNNING = 'syncing'
+SYNC_DONE = 'synced'
+SYNC_FAILED = 'failed'
+
+class AnalysisSyncQueue:
+    """
+    Fila de sincronização local -> Supabase.
+    O payload não é duplicado: cada job guarda só o ID da análise, que é lida
+    do container local no envio. O mesmo ID é usado como chave primária no
+    Supabase, então reenviar um job é idempotente.
+    """
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "analysis_sync_queue.db")
+        self.supabase = analysis_backend
+        self.local_files = local_file_manager
+
+        self.interval = float(os.getenv('SUPABASE_SYNC_INTERVAL', 10))
+        self.batch_size = int(os.getenv('SUPABASE_SYNC_BATCH', 10))
+        self.max_attempts = int(os.getenv('SUPABASE_SYNC_MAX_ATTEMPTS', 8))
+        self.base_backoff = float(os.getenv('SUPABASE_SYNC_BACKOFF', 30))
+        self.max_backoff = float(os.getenv('SUPABASE_SYNC_MAX_BACKOFF', 3600))
+        # Job em envio sem atualização há mais tempo que isso é considerado abandonado
+        self.stale_after = float(os.getenv('SUPABASE_SYNC_STALE_AFTER', 600))
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.flusher_thread = None
+        self.synced_callbacks = []
+        self.stats = {'enqueued': 0, 'synced': 0, 'retries': 0, 'failed': 0, 'batches': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+        self._recover_interrupted()
+
+        if self.supabase.is_connected() and self._count(SYNC_PENDING):
+            self.start()
+
+    def _init_database(self):
+        """Inicializa tabela SQLite da fila"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sync_jobs (
+                        analysis_id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at REAL NOT NULL,
+                        last_error TEXT,
+                        remote_id TEXT,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_jobs_due ON sync_jobs(status, next_attempt_at)")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar fila de sincronização: {e}")
+
+    def _recover_interrupted(self):
+        """
+        Jobs interrompidos no meio do envio (queda do processo) voltam para a
+        fila. Só os parados há mais de stale_after: os demais podem estar em
+        envio por outro worker.
+        """
+        try:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                recovered = conn.execute(
+                    "UPDATE sync_jobs SET status = ? WHERE status = ? AND updated_at < ?",
+                    (SYNC_PENDING, SYNC_RUNNING, time.time() - self.stale_after)
+                ).rowcount
+                conn.commit()
+            if recovered:
+                logger.info(f"🔄 {recovered} sincronizações interrompidas voltaram para a fila")
+        except Exception as e:
+            logger.error(f"Erro ao recuperar fila de sincronização: {e}")
+
+    def _count(self, status: str) -> int:
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM sync_jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def _update(self, analysis_id: str, **fields):
+        """Atualiza campos de um job"""
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                f"UPDATE sync_jobs SET {assignments} WHERE analysis_id = ?",
+                (*fields.values(), analysis_id)
+            )
+            conn.commit()
+
+    def enqueue(self, analysis_id: str, wake: bool = True):
+        """
+        Registra análise local para envio; retorna após o commit da fila.
+        Com wake=False (envio síncrono logo em seguida) a thread de envio não
+        é acordada, para não disputar o mesmo job.
+        """
+        now = time.time()
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_jobs "
+                "(analysis_id, status, attempts, next_attempt_at, created_at, updated_at) VALUES (?, ?, 0, ?, ?, ?)",
+                (analysis_id, SYNC_PENDING, now, now, now)
+            )
+            conn.commit()
+            self.stats['enqueued'] += 1
+
+        self.start()
+        if wake:
+            self.wakeup.set()
+
+    def cancel(self, analysis_id: str) -> bool:
+        """Remove job da fila (análise apagada antes de sincronizar)"""
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            removed = conn.execute("DELETE FROM sync_jobs WHERE analysis_id = ?", (analysis_id,)).rowcount
+            conn.commit()
+        return removed > 0
+
+    def get_status(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de sincronização de uma análise"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM sync_jobs WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return dict(row) if row else None
+
+    def start(self):
+        """Inicia (uma vez) a thread de envio"""
+        if self.flusher_thread is not None or not self.supabase.is_connected():
+            return
+
+        with self.lock:
+            if self.flusher_thread is None:
+                self.flusher_thread = threading.Thread(target=self._flush_loop, name='supabase_sync', daemon=True)
+                self.flusher_thread.start()
+                logger.info("☁️ Sincronização com Supabase em segundo plano iniciada")
+
+    def stop(self):
+        """Interrompe a thread de envio"""
+        self.stop_event.set()
+        self.wakeup.set()
+
+    def _flush_loop(self):
+        """Envia lotes de jobs vencidos até a fila esvaziar; depois aguarda novos jobs"""
+        while not self.stop_event.is_set():
+            self._recover_interrupted()
+            try:
+                processed = self.flush()
+            except Exception as e:
+                logger.error(f"❌ Erro no envio ao Supabase: {str(e)}")
+                processed = 0
+
+            if processed < self.batch_size:
+                self.wakeup.wait(self.interval)
+                self.wakeup.clear()
+
+    def _claim(self, conn: sqlite3.Connection, analysis_id: str, now: float) -> bool:
+        """Marca o job como em envio se ainda estiver pendente (outro processo pode tê-lo pego)"""
+        return conn.execute(
+            "UPDATE sync_jobs SET status = ?, updated_at = ? WHERE analysis_id = ? AND status = ?",
+            (SYNC_RUNNING, now, analysis_id, SYNC_PENDING)
+        ).rowcount > 0
+
+    def _due_jobs(self) -> List[str]:
+        """
+        Reivindica os jobs prontos para envio, mais antigos primeiro. Seleção e
+        reivindicação ocorrem na mesma transação (BEGIN IMMEDIATE), então cada
+        job é enviado por um único worker do gunicorn.
+        """
+        now = time.time()
+        with self.lock:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    "SELECT analysis_id FROM sync_jobs WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY created_at LIMIT ?",
+                    (SYNC_PENDING, now, self.batch_size)
+                ).fetchall()
+                claimed = [row[0] for row in rows if self._claim(conn, row[0], now)]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        return claimed
+
+    def flush(self) -> int:
+        """Envia um lote de jobs vencidos. Retorna quantos foram processados"""
+        job_ids = self._due_jobs()
+        if not job_ids:
+            return 0
+
+        # Uma verificação de conexão por lote, em vez de uma por análise
+        if not self.supabase.test_connection():
+            for analysis_id in job_ids:
+                self._schedule_retry(analysis_id, "Supabase indisponível")
+            return len(job_ids)
+
+        self.stats['batches'] += 1
+        prepared = {}
+        for analysis_id in job_ids:
+            item = self.prepare_upload(analysis_id)
+            if item is None:
+                self._mark_missing(analysis_id)
+            else:
+                prepared[analysis_id] = item
+
+        # Linhas de analyses, blobs e arquivos do lote vão em um upsert cada
+        records = {}
+        if len(prepared) > 1:
+            try:
+                records = self.supabase.upsert_analyses([
+                    (analysis_id, analysis_data, created_at, files)
+                    for analysis_id, (analysis_data, files, created_at) in prepared.items()
+                ])
+            except Exception as e:
+                logger.warning(f"⚠️ Envio em lote falhou, enviando uma a uma: {str(e)}")
+
+        for analysis_id in prepared:
+            if analysis_id in records:
+                analysis_cache.invalidate(analysis_id)
+                self._mark_synced(analysis_id, records[analysis_id])
+            else:
+                self._sync_claimed(analysis_id, validate_key=False)
+
+        return len(job_ids)
+
+    def sync_now(self, analysis_id: str, validate_key: bool = True) -> Optional[Dict[str, Any]]:
+        """Envia uma análise imediatamente; retorna o registro do Supabase ou None"""
+        with self.lock, sqlite3.connect(self.db_path, timeout=30) as conn:
+            claimed = self._claim(conn, analysis_id, time.time())
+            conn.commit()
+
+        if not claimed:
+            logger.info(f"ℹ️ Análise {analysis_id} já está sendo enviada por outro processo")
+            return None
+
+        return self._sync_claimed(analysis_id, validate_key)
+
+    def _sync_claimed(self, analysis_id: str, validate_key: bool) -> Optional[Dict[str, Any]]:
+        """Envia um job já reivindicado e registra o resultado"""
+        try:
+            record = self.upload(analysis_id, validate_key=validate_key)
+            if record is None:
+                self._mark_missing(analysis_id)
+                return None
+
+            self._mark_synced(analysis_id, record)
+            return record
+
+        except Exception as e:
+            self._schedule_retry(analysis_id, str(e))
+            return None
+
+    def _mark_synced(self, analysis_id: str, record: Dict[str, Any]):
+        """Registra envio bem-sucedido e avisa os interessados"""
+        self._update(analysis_id, status=SYNC_DONE, remote_id=record.get('id'), last_error=None)
+        self.stats['synced'] += 1
+        for callback in self.synced_callbacks:
+            callback(analysis_id, record)
+
+    def _mark_missing(self, analysis_id: str):
+        """Job de análise que não existe mais localmente"""
+        self._update(analysis_id, status=SYNC_FAILED, last_error="Análise local não encontrada")
+        self.stats['failed'] += 1
+
+    def upload(self, analysis_id: str, validate_key: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Envia análise e lista de arquivos ao Supabase, sem tocar na fila.
+        Retorna o registro remoto, None se a análise local não existe, e
+        levanta exceção em falha de envio.
+        """
+        prepared = self.prepare_upload(analysis_id)
+        if prepared is None:
+            return None
+
+        analysis_data, files, created_at = prepared
+        record = self.supabase.create_analysis(
+            analysis_data, analysis_id=analysis_id, validate_key=validate_key, max_retries=1,
+            created_at=created_at
+        )
+        if not record:
+            raise RuntimeError("Supabase não retornou a análise")
+
+        self.supabase.save_analysis_files(analysis_id, files)
+
+        analysis_cache.invalidate(analysis_id)
+        logger.info(f"☁️ Análise {analysis_id} sincronizada com Supabase ({len(files)} arquivos)")
+        return record
+
+    def prepare_upload(self, analysis_id: str) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[str]]]:
+        """
+        Dados locais de uma análise como são enviados ao banco remoto:
+        (análise, registros de arquivos, created_at local) ou None se não existe.
+        """
+        analysis_data = self.local_files.load_analysis(analysis_id)
+        if analysis_data is None:
+            return None
+
+        local_files = self.local_files.get_analysis_files(analysis_id)
+        analysis_data['local_files_path'] = self.local_files.base_dir
+        analysis_data['local_files_info'] = local_files
+
+        files = [
+            {
+                'file_type': file_info['type'],
+                'file_name': file_info['name'],
+                'file_path': file_info['path'],
+                'file_size': file_info['size'],
+                'content_preview': f"Arquivo {file_info['type']} da análise"
+            }
+            for file_info in local_files
+        ]
+
+        # Data de criação local: reenvios não movem a análise na listagem remota
+        metadata = self.local_files.index.get_analysis(analysis_id) or {}
+        return analysis_data, files, metadata.get('created_at')
+
+    def add_synced_callback(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """Registra função chamada com (analysis_id, registro) a cada envio bem-sucedido da fila"""
+        self.synced_callbacks.append(callback)
+
+    def get_active_ids(self) -> Set[str]:
+        """IDs com envio pendente ou em andamento na fila"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT analysis_id FROM sync_jobs WHERE status IN (?, ?)", (SYNC_PENDING, SYNC_RUNNING)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def _schedule_retry(self, analysis_id: str, error: str):
+        """Agenda nova tentativa com backoff exponencial ou marca como falha definitiva"""
+        job = self.get_status(analysis_id)
+        if job is None:
+            return
+
+        attempts = job['attempts'] + 1
+        if attempts >= self.max_attempts:
+            self._update(analysis_id, status=SYNC_FAILED, attempts=attempts, last_error=error)
+            self.stats['failed'] += 1
+            logger.error(f"❌ Sincronização da análise {analysis_id} desistiu após {attempts} tentativas: {error}")
+            return
+
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+        self._update(
+            analysis_id, status=SYNC_PENDING, attempts=attempts,
+            next_attempt_at=time.time() + delay, last_error=error
+        )
+        self.stats['retries'] += 1
+        logger.warning(f"⚠️ Sincronização da análise {analysis_id} falhou ({error}) - nova tentativa em {delay:.0f}s")
+
+    def retry_failed(self) -> int:
+        """Recoloca na fila os jobs que esgotaram as tentativas"""
+        now = time.time()
+        with self.lock, sqlite3.connect(self.db_path) as conn:
+            count = conn.execute(
+                "UPDATE sync_jobs SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? WHERE status = ?",
+                (SYNC_PENDING, now, now, SYNC_FAILED)
+            ).rowcount
+            conn.commit()
+
+        if count:
+            self.start()
+            self.wakeup.set()
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas da fila"""
+        with sqlite3.connect(self.db_path) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM sync_jobs GROUP BY status").fetchall())
+        return {
+            **self.stats,
+            'queue': {status: counts.get(status, 0) for status in (SYNC_PENDING, SYNC_RUNNING, SYNC_DONE, SYNC_FAILED)},
+            'flusher_running': self.flusher_thread is not None and self.flusher_thread.is_alive()
+        }
+
+# Instância global
+analysis_sync_queue = AnalysisSyncQueue()
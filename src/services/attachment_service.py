@@ -11,12 +11,13 @@ import mimetypes
 import re
 from typing import Dict, List, Optional, Any, Tuple
 from werkzeug.datastructures import FileStorage
-import PyPDF2
 import pandas as pd
 from docx import Document
 import json
 from datetime import datetime
 
+from services.pdf_extraction_service import pdf_extraction_service
+
 logger = logging.getLogger(__name__)
 
 class AttachmentService:
@@ -173,17 +174,13 @@ class AttachmentService:
             return None
 
     def _extract_pdf_content(self, file_path: str) -> Optional[str]:
-        """Extrai texto de arquivo PDF"""
+        """Extrai texto de arquivo PDF (em memória, páginas em paralelo)"""
         try:
-            content = ""
             with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
+                pdf_bytes = file.read()
 
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    content += page.extract_text() + "\n"
-
-            return content.strip()
+            content = pdf_extraction_service.extract_text(pdf_bytes, engine='pypdf2')
+            return content.strip() if content else None
 
         except Exception as e:
             logger.error(f"Erro ao extrair PDF: {str(e)}")
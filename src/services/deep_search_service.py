@@ -2,20 +2,21 @@
 # -*- coding: utf-8 -*-
 """
 ARQV30 Enhanced v2.0 - Serviço de Busca Profunda REAL
-Pesquisa avançada REAL na internet - SEM SIMULAÇÃO OU CACHE
+Pesquisa avançada REAL na internet - SEM SIMULAÇÃO
 """
 
 import os
 import logging
 import time
-import requests
 from typing import Dict, List, Optional, Any
-from urllib.parse import quote_plus
-import json
 from datetime import datetime
 from bs4 import BeautifulSoup
 import re
 
+from services.host_scheduler import host_scheduler
+from services.negative_cache import negative_cache, REASON_HTTP_STATUS
+from services.search_providers import search_provider_registry
+
 logger = logging.getLogger(__name__)
 
 class DeepSearchService:
@@ -28,7 +29,6 @@ class DeepSearchService:
         self.google_cse_id = os.getenv('GOOGLE_CSE_ID')
         
         # URLs das APIs REAIS
-        self.google_search_url = "https://www.googleapis.com/customsearch/v1"
         self.jina_reader_url = "https://r.jina.ai/"
         
         # Headers REAIS para requisições
@@ -41,7 +41,7 @@ class DeepSearchService:
             'Connection': 'keep-alive'
         }
         
-        logger.info("🚀 DeepSearch Service REAL inicializado - SEM CACHE OU SIMULAÇÃO")
+        logger.info("🚀 DeepSearch Service REAL inicializado - buscas via registro de provedores")
     
     def perform_deep_search(
         self, 
@@ -63,19 +63,16 @@ class DeepSearchService:
                 logger.info("🌐 Executando Google Custom Search REAL...")
                 google_results = self._google_search_real(query, max_results // 2)
                 search_results.extend(google_results)
-                time.sleep(1)  # Rate limiting
             
             # 2. BUSCA REAL COM BING
             logger.info("🔍 Executando Bing Search REAL...")
             bing_results = self._bing_search_real(query, max_results // 3)
             search_results.extend(bing_results)
-            time.sleep(1)
             
             # 3. BUSCA REAL COM DUCKDUCKGO
             logger.info("🦆 Executando DuckDuckGo Search REAL...")
             ddg_results = self._duckduckgo_search_real(query, max_results // 3)
             search_results.extend(ddg_results)
-            time.sleep(1)
             
             # 4. EXTRAI CONTEÚDO REAL DAS PÁGINAS ENCONTRADAS
             content_results = []
@@ -92,7 +89,6 @@ class DeepSearchService:
                         'relevance_score': self._calculate_real_relevance(content, query, context_data),
                         'source_engine': result.get('source', 'unknown')
                     })
-                    time.sleep(0.5)  # Rate limiting
             
             # 5. PROCESSA COM ANÁLISE REAL
             processed_content = self._process_real_content(query, context_data, content_results)
@@ -109,137 +105,24 @@ class DeepSearchService:
     
     def _google_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando Google Custom Search API"""
-        
-        try:
-            enhanced_query = self._enhance_query_real(query)
-            
-            params = {
-                'key': self.google_search_key,
-                'cx': self.google_cse_id,
-                'q': enhanced_query,
-                'num': min(max_results, 10),
-                'lr': 'lang_pt',
-                'gl': 'br',
-                'safe': 'off',
-                'dateRestrict': 'm6',  # Últimos 6 meses
-                'sort': 'date'
-            }
-            
-            response = requests.get(
-                self.google_search_url, 
-                params=params, 
-                headers=self.headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = []
-                
-                for item in data.get('items', []):
-                    results.append({
-                        'title': item.get('title', ''),
-                        'url': item.get('link', ''),
-                        'snippet': item.get('snippet', ''),
-                        'source': 'google_real'
-                    })
-                
-                logger.info(f"✅ Google Search REAL: {len(results)} resultados")
-                return results
-            else:
-                logger.warning(f"⚠️ Google Search falhou: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"❌ Erro no Google Search REAL: {str(e)}")
-            return []
+        return self._registry_search('google', self._enhance_query_real(query), max_results, 'google_real')
     
     def _bing_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando Bing"""
-        
-        try:
-            search_url = f"https://www.bing.com/search?q={quote_plus(query)}&cc=br&setlang=pt-br&count={max_results}"
-            
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                
-                # Extrai resultados REAIS do Bing
-                result_items = soup.find_all('li', class_='b_algo')
-                
-                for item in result_items[:max_results]:
-                    title_elem = item.find('h2')
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        if link_elem:
-                            title = title_elem.get_text(strip=True)
-                            url = link_elem.get('href', '')
-                            
-                            snippet_elem = item.find('p')
-                            snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                            
-                            if url and title and url.startswith('http'):
-                                results.append({
-                                    'title': title,
-                                    'url': url,
-                                    'snippet': snippet,
-                                    'source': 'bing_real'
-                                })
-                
-                logger.info(f"✅ Bing Search REAL: {len(results)} resultados")
-                return results
-                
-        except Exception as e:
-            logger.error(f"❌ Erro no Bing Search REAL: {str(e)}")
-            return []
+        return self._registry_search('bing', query, max_results, 'bing_real')
     
     def _duckduckgo_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando DuckDuckGo"""
-        
-        try:
-            search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                
-                result_divs = soup.find_all('div', class_='result')
-                
-                for div in result_divs[:max_results]:
-                    title_elem = div.find('a', class_='result__a')
-                    snippet_elem = div.find('a', class_='result__snippet')
-                    
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        url = title_elem.get('href', '')
-                        snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                        
-                        if url and title and url.startswith('http'):
-                            results.append({
-                                'title': title,
-                                'url': url,
-                                'snippet': snippet,
-                                'source': 'duckduckgo_real'
-                            })
-                
-                logger.info(f"✅ DuckDuckGo Search REAL: {len(results)} resultados")
-                return results
-                
-        except Exception as e:
-            logger.error(f"❌ Erro no DuckDuckGo Search REAL: {str(e)}")
-            return []
+        return self._registry_search('duckduckgo', query, max_results, 'duckduckgo_real')
+    
+    def _registry_search(self, provider: str, query: str, max_results: int, source: str) -> List[Dict[str, Any]]:
+        """Busca pelo registro compartilhado (cache, quotas e pool de conexões)"""
+        results = [
+            {**item, 'source': source}
+            for item in search_provider_registry.search(provider, query, max_results)
+        ]
+        logger.info(f"✅ {provider} Search REAL: {len(results)} resultados")
+        return results
     
     def _extract_real_page_content(self, url: str) -> Optional[str]:
         """Extrai conteúdo REAL de uma página web"""
@@ -247,6 +130,10 @@ class DeepSearchService:
         if not url or not url.startswith("http"):
             return None
         
+        # Páginas conhecidamente ruins são puladas
+        if negative_cache.should_skip(url):
+            return None
+        
         try:
             # Tenta primeiro com Jina Reader se disponível
             if self.jina_api_key:
@@ -272,7 +159,7 @@ class DeepSearchService:
             
             jina_url = f"{self.jina_reader_url}{url}"
             
-            response = requests.get(
+            response = host_scheduler.get(
                 jina_url,
                 headers=headers,
                 timeout=30
@@ -298,7 +185,7 @@ class DeepSearchService:
         """Extração REAL direta usando requests + BeautifulSoup"""
         
         try:
-            response = requests.get(
+            response = host_scheduler.get(
                 url,
                 headers=self.headers,
                 timeout=20,
@@ -341,6 +228,7 @@ class DeepSearchService:
                 return text
             else:
                 logger.warning(f"⚠️ Falha ao acessar {url}: {response.status_code}")
+                negative_cache.record_failure(url, REASON_HTTP_STATUS, response.status_code)
                 return None
                 
         except Exception as e:
@@ -7,12 +7,16 @@ Serviço aprimorado de tendências com múltiplas fontes e fallbacks
 
 import os
 import logging
-import time
 import requests
-import random
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.host_scheduler import host_scheduler
+from services.serp_parser import serp_parser
+from services.trend_snapshot_store import trend_snapshot_store
 
 logger = logging.getLogger(__name__)
 
@@ -56,10 +60,142 @@ class EnhancedTrendsService:
             }
         }
         
+        # Snapshots por segmento: leitura instantânea, atualização em segundo plano
+        self.snapshot_store = trend_snapshot_store
+        self.background_refresh = os.getenv('TRENDS_BACKGROUND_REFRESH', 'true').lower() == 'true'
+        self.refresh_interval = float(os.getenv('TRENDS_REFRESH_INTERVAL', 1800))
+        self.popular_segments = int(os.getenv('TRENDS_POPULAR_SEGMENTS', 10))
+        self.refresh_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TRENDS_REFRESH_WORKERS', 2)),
+            thread_name_prefix='trends_refresh'
+        )
+        self.refreshing = set()  # segmentos com atualização assíncrona em andamento
+        self.segment_locks = {}
+        self.refresh_lock = threading.Lock()
+        self.refresh_stop = threading.Event()
+        self.refresher_thread = None
+        
         logger.info("Enhanced Trends Service inicializado com múltiplas fontes")
     
     def get_market_trends(self, segmento: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Obtém tendências de mercado com fallbacks robustos"""
+        """
+        Obtém tendências de mercado a partir do snapshot do segmento.
+        Snapshot fresco é devolvido direto; snapshot vencido (mas utilizável) é
+        devolvido e atualizado em segundo plano; sem snapshot, coleta ao vivo.
+        """
+        self._ensure_background_refresher()
+        
+        snapshot = self.snapshot_store.get(segmento)
+        if snapshot:
+            if snapshot['stale']:
+                self._refresh_async(segmento)
+            return self._from_snapshot(segmento, snapshot)
+        
+        # Um único pedido coleta o segmento; os concorrentes aguardam o snapshot
+        segment_lock = self._segment_lock(segmento)
+        if segment_lock.acquire(blocking=False):
+            # Ninguém coletando: vale a leitura acima
+            try:
+                return self.refresh_segment(segmento)
+            finally:
+                segment_lock.release()
+        
+        with segment_lock:
+            # Outro pedido coletou enquanto aguardávamos; o acesso já foi contado
+            snapshot = self.snapshot_store.get(segmento, count_access=False)
+            if snapshot and not snapshot['stale']:
+                return self._from_snapshot(segmento, snapshot)
+            return self.refresh_segment(segmento)
+    
+    def _from_snapshot(self, segmento: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Dados do snapshot com sua idade"""
+        age_minutes = snapshot['age'] / 60
+        logger.info(
+            f"📸 Tendências de {segmento} do snapshot ({age_minutes:.0f} min"
+            f"{', atualizando em segundo plano' if snapshot['stale'] else ''})"
+        )
+        return {
+            **snapshot['data'],
+            'snapshot_age_seconds': round(snapshot['age']),
+            'snapshot_stale': snapshot['stale']
+        }
+    
+    def _segment_lock(self, segmento: str) -> threading.Lock:
+        """Lock por segmento para não coletar o mesmo segmento em paralelo"""
+        segment_key = self.snapshot_store.segment_key(segmento)
+        with self.refresh_lock:
+            return self.segment_locks.setdefault(segment_key, threading.Lock())
+    
+    def refresh_segment(self, segmento: str) -> Dict[str, Any]:
+        """Coleta tendências ao vivo e grava o snapshot do segmento"""
+        trends_data = self._collect_market_trends(segmento)
+        
+        # Fallback não substitui snapshot real; a próxima leitura tenta de novo
+        if not trends_data.get('fallback_mode'):
+            self.snapshot_store.set(segmento, trends_data)
+        
+        return trends_data
+    
+    def _refresh_async(self, segmento: str):
+        """Agenda atualização do snapshot sem bloquear o pedido"""
+        segment_key = self.snapshot_store.segment_key(segmento)
+        with self.refresh_lock:
+            if segment_key in self.refreshing:
+                return
+            self.refreshing.add(segment_key)
+        
+        def refresh():
+            try:
+                with self._segment_lock(segmento):
+                    self.refresh_segment(segmento)
+            except Exception as e:
+                logger.error(f"❌ Erro ao atualizar tendências de {segmento}: {str(e)}")
+            finally:
+                with self.refresh_lock:
+                    self.refreshing.discard(segment_key)
+        
+        self.refresh_executor.submit(refresh)
+    
+    def _ensure_background_refresher(self):
+        """Inicia (uma vez) a thread que mantém os segmentos populares aquecidos"""
+        if not self.background_refresh or self.refresher_thread is not None:
+            return
+        
+        with self.refresh_lock:
+            if self.refresher_thread is None:
+                self.refresher_thread = threading.Thread(
+                    target=self._background_refresh_loop,
+                    name='trends_refresher',
+                    daemon=True
+                )
+                self.refresher_thread.start()
+                logger.info(f"🔄 Atualização de tendências em segundo plano a cada {self.refresh_interval:.0f}s")
+    
+    def _background_refresh_loop(self):
+        """Atualiza snapshots populares antes que vençam"""
+        while not self.refresh_stop.wait(self.refresh_interval):
+            # Atualiza quem venceria antes da próxima rodada
+            threshold = self.snapshot_store.ttl - self.refresh_interval
+            for segment in self.snapshot_store.popular_segments(self.popular_segments):
+                if self.refresh_stop.is_set():
+                    return
+                if segment['age'] >= threshold:
+                    self._refresh_async(segment['segmento'])
+    
+    def stop_background_refresh(self):
+        """Interrompe a atualização em segundo plano"""
+        self.refresh_stop.set()
+    
+    def get_snapshot_stats(self) -> Dict[str, Any]:
+        """Estatísticas dos snapshots e segmentos populares"""
+        return {
+            **self.snapshot_store.get_stats(),
+            'refreshing': sorted(self.refreshing),
+            'popular_segments': self.snapshot_store.popular_segments(self.popular_segments)
+        }
+    
+    def _collect_market_trends(self, segmento: str) -> Dict[str, Any]:
+        """Coleta tendências ao vivo de todas as fontes, com fallbacks robustos"""
         
         logger.info(f"🔍 Buscando tendências para segmento: {segmento}")
         
@@ -94,9 +230,6 @@ class EnhancedTrendsService:
                     trends_data['fontes_consultadas'].append(source_name)
                     logger.info(f"✅ {source_name}: {len(source_trends)} tendências encontradas")
                 
-                # Delay entre fontes
-                time.sleep(random.uniform(1.0, 3.0))
-                
             except Exception as e:
                 logger.error(f"❌ Erro em {source_name}: {str(e)}")
                 self._handle_source_error(source_name, e)
@@ -126,22 +259,19 @@ class EnhancedTrendsService:
             
             for query in search_queries:
                 try:
-                    # Delay para evitar rate limiting
-                    time.sleep(random.uniform(2.0, 4.0))
-                    
                     search_url = f"https://www.google.com/search?q={query}&tbm=nws&tbs=qdr:m3"
                     
+                    # Aguarda horário do host no agendador (evita rate limiting)
+                    host_scheduler.acquire(search_url)
                     response = self.session.get(search_url, timeout=15)
+                    host_scheduler.report_response(search_url, response)
                     
                     if response.status_code == 200:
                         # Extrai tendências dos títulos das notícias
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(response.content, 'html.parser')
+                        news_items = serp_parser.parse('google_news', response.content, max_results=10)
                         
-                        news_titles = soup.find_all(['h3', 'h4'], limit=10)
-                        
-                        for title_elem in news_titles:
-                            title = title_elem.get_text(strip=True)
+                        for news_item in news_items:
+                            title = news_item['title']
                             if len(title) > 20 and segmento.lower() in title.lower():
                                 trends.append({
                                     'titulo': title,
@@ -151,8 +281,7 @@ class EnhancedTrendsService:
                                 })
                     
                     elif response.status_code == 429:
-                        logger.warning(f"⚠️ Rate limit detectado para Google Trends, aguardando...")
-                        time.sleep(random.uniform(10.0, 20.0))
+                        logger.warning(f"⚠️ Rate limit detectado para Google Trends, backoff aplicado ao host")
                         continue
                     
                 except Exception as e:
@@ -180,12 +309,12 @@ class EnhancedTrendsService:
             
             for term in search_terms:
                 try:
-                    time.sleep(random.uniform(1.5, 3.0))
-                    
                     # Busca geral para identificar tendências
                     search_url = f"https://www.google.com/search?q={term}+2024"
                     
+                    host_scheduler.acquire(search_url)
                     response = self.session.get(search_url, timeout=12)
+                    host_scheduler.report_response(search_url, response)
                     
                     if response.status_code == 200:
                         # Extrai palavras-chave relacionadas
@@ -232,12 +361,12 @@ class EnhancedTrendsService:
             
             for query in social_queries:
                 try:
-                    time.sleep(random.uniform(1.0, 2.5))
-                    
                     # Busca social trends
                     search_url = f"https://www.google.com/search?q={query}&tbm=nws"
                     
+                    host_scheduler.acquire(search_url)
                     response = self.session.get(search_url, timeout=10)
+                    host_scheduler.report_response(search_url, response)
                     
                     if response.status_code == 200:
                         trends.append({
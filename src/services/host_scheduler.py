@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Host Politeness Scheduler
+Agendador central de requisições por host com token bucket e backoff
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+import requests
+from typing import Dict, Optional, Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Limites específicos por host: (requisições por segundo, rajada)
+HOST_LIMITS = {
+    'www.bing.com': (0.5, 1),
+    'bing.com': (0.5, 1),
+    'duckduckgo.com': (0.4, 1),
+    'html.duckduckgo.com': (0.4, 1),
+    'search.yahoo.com': (0.5, 1),
+    'www.google.com': (0.5, 1),
+    'trends.google.com': (0.3, 1),
+    'www.reddit.com': (0.5, 1),
+    'www.googleapis.com': (5.0, 5),
+    'google.serper.dev': (5.0, 5)
+}
+
+# Status HTTP que indicam sobrecarga do host
+BACKOFF_STATUS = {429, 500, 502, 503, 504}
+
+class HostPolitenessScheduler:
+    """Agenda requisições por host sem bloquear o trabalho de outros hosts"""
+
+    def __init__(self):
+        """Inicializa agendador"""
+        self.enabled = os.getenv('HOST_SCHEDULER_ENABLED', 'true').lower() == 'true'
+        self.default_rate = float(os.getenv('HOST_DEFAULT_RATE', 2.0))  # requisições por segundo
+        self.default_burst = int(os.getenv('HOST_DEFAULT_BURST', 4))
+        self.backoff_base = float(os.getenv('HOST_BACKOFF_BASE', 2.0))  # segundos
+        self.backoff_max = float(os.getenv('HOST_BACKOFF_MAX', 60.0))  # segundos
+
+        self.hosts = {}  # host -> estado do bucket
+        self.lock = threading.Lock()
+        self.random = random.Random()
+        self.stats = {
+            'reservations': 0,
+            'delayed_reservations': 0,
+            'refused_reservations': 0,
+            'total_wait': 0.0,
+            'backoffs': 0
+        }
+
+        logger.info("🚦 Host Politeness Scheduler inicializado")
+
+    def _host(self, url_or_host: str) -> str:
+        """Normaliza URL ou host para a chave do bucket"""
+        if '://' in url_or_host:
+            url_or_host = urlparse(url_or_host).netloc
+        return url_or_host.lower().split(':')[0]
+
+    def _state(self, host: str) -> Dict[str, Any]:
+        """Retorna estado do host (chamado com lock)"""
+        state = self.hosts.get(host)
+        if state is None:
+            rate, burst = HOST_LIMITS.get(host, (self.default_rate, self.default_burst))
+            state = {
+                'interval': 1.0 / rate,
+                'burst': burst,
+                'tat': 0.0,  # instante teórico da próxima chegada (GCRA)
+                'backoff_until': 0.0,
+                'failures': 0,
+                'requests': 0
+            }
+            self.hosts[host] = state
+        return state
+
+    def reserve(self, url_or_host: str, max_wait: Optional[float] = None) -> float:
+        """
+        Reserva o próximo horário permitido para o host e retorna quantos
+        segundos faltam até ele. Não bloqueia: o chamador decide quando esperar.
+        Se a espera excede max_wait, nada é reservado (o agendamento do host
+        não muda) e a espera é retornada mesmo assim.
+        """
+        if not self.enabled:
+            return 0.0
+
+        host = self._host(url_or_host)
+        now = time.time()
+
+        with self.lock:
+            state = self._state(host)
+            tolerance = (state['burst'] - 1) * state['interval']
+            tat = max(state['tat'], now)
+            slot = max(tat - tolerance, now, state['backoff_until'])
+            delay = slot - now
+            if max_wait is not None and delay > max_wait:
+                self.stats['refused_reservations'] += 1
+                return delay
+
+            state['tat'] = max(tat, slot) + state['interval']
+            state['requests'] += 1
+
+            self.stats['reservations'] += 1
+            if delay > 0:
+                self.stats['delayed_reservations'] += 1
+                self.stats['total_wait'] += delay
+
+        return delay
+
+    def acquire(self, url_or_host: str, max_wait: Optional[float] = None) -> bool:
+        """
+        Aguarda o horário reservado para o host. Só a requisição deste host espera;
+        requisições para outros hosts seguem imediatamente.
+        Retorna False se a espera excederia max_wait.
+        """
+        delay = self.reserve(url_or_host, max_wait)
+        if delay <= 0:
+            return True
+
+        if max_wait is not None and delay > max_wait:
+            logger.warning(f"⏳ Horário de {self._host(url_or_host)} excede espera máxima ({delay:.1f}s)")
+            return False
+
+        time.sleep(delay)
+        return True
+
+    def report(self, url_or_host: str, status_code: Optional[int] = None,
+               error: bool = False, retry_after: Optional[str] = None):
+        """Registra resultado da requisição; 429/5xx/erros aplicam backoff exponencial com jitter"""
+        if not self.enabled:
+            return
+
+        host = self._host(url_or_host)
+
+        with self.lock:
+            state = self._state(host)
+
+            if error or status_code in BACKOFF_STATUS:
+                state['failures'] += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (state['failures'] - 1)))
+                delay *= self.random.uniform(0.5, 1.5)
+
+                # Respeita Retry-After em segundos quando informado
+                if retry_after and str(retry_after).isdigit():
+                    delay = max(delay, min(float(retry_after), self.backoff_max))
+
+                state['backoff_until'] = max(state['backoff_until'], time.time() + delay)
+                self.stats['backoffs'] += 1
+                logger.warning(f"🚦 Backoff de {delay:.1f}s para {host} (status {status_code}, falhas {state['failures']})")
+            else:
+                state['failures'] = 0
+
+    def report_response(self, url_or_host: str, response: Any):
+        """Atalho para registrar um requests.Response"""
+        self.report(
+            url_or_host,
+            status_code=response.status_code,
+            retry_after=response.headers.get('Retry-After')
+        )
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+        """Executa requisição HTTP respeitando o horário do host e registrando o resultado"""
+        self.acquire(url)
+        try:
+            response = (session or requests).request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.report(url, error=True)
+            raise
+
+        self.report_response(url, response)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET agendado por host"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST agendado por host"""
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do agendador"""
+        now = time.time()
+        with self.lock:
+            return {
+                **self.stats,
+                'hosts': {
+                    host: {
+                        'requests': state['requests'],
+                        'failures': state['failures'],
+                        'backoff_remaining': max(0.0, state['backoff_until'] - now)
+                    }
+                    for host, state in self.hosts.items()
+                }
+            }
+
+    def reset(self, url_or_host: Optional[str] = None):
+        """Reseta estado de um host ou de todos"""
+        with self.lock:
+            if url_or_host:
+                self.hosts.pop(self._host(url_or_host), None)
+            else:
+                self.hosts.clear()
+
+# Instância global
+host_scheduler = HostPolitenessScheduler()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Local Analysis Index
+Índice SQLite das análises locais: arquivos por seção, tamanhos e metadados,
+mantido no salvamento e na remoção para evitar varrer o diretório
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Tuple
+
+from services.analysis_container import analysis_container, CONTAINER_EXTENSION
+
+logger = logging.getLogger(__name__)
+
+# Colunas de metadados disponíveis na listagem
+ANALYSIS_COLUMNS = (
+    'analysis_id', 'timestamp', 'created_at', 'segmento', 'produto', 'publico', 'preco', 'status',
+    'total_files', 'total_size', 'quality_score', 'processing_time'
+)
+
+# Ordenações permitidas na listagem
+SORT_COLUMNS = {'created_at', 'segmento', 'produto', 'quality_score', 'processing_time', 'total_size'}
+
+# Contador dos arquivos físicos (containers ou JSONs do formato antigo); os
+# demais contadores são por tipo de seção
+DISK_COUNTER = '__disk__'
+
+class LocalAnalysisIndex:
+    """Índice embutido das análises salvas em disco"""
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self.db_path = os.path.join(base_dir, "analysis_index.db")
+        self.lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Inicializa tabelas SQLite do índice"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS analyses (
+                        analysis_id TEXT PRIMARY KEY,
+                        short_id TEXT NOT NULL,
+                        timestamp TEXT,
+                        created_at TEXT,
+                        segmento TEXT,
+                        produto TEXT,
+                        publico TEXT,
+                        preco TEXT,
+                        status TEXT,
+                        total_files INTEGER NOT NULL DEFAULT 0,
+                        total_size INTEGER NOT NULL DEFAULT 0,
+                        quality_score REAL,
+                        processing_time REAL,
+                        disk_files INTEGER NOT NULL DEFAULT 0,
+                        disk_bytes INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS analysis_files (
+                        analysis_id TEXT NOT NULL,
+                        section TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        modified REAL,
+                        PRIMARY KEY (analysis_id, section)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS storage_counters (
+                        name TEXT PRIMARY KEY,
+                        files INTEGER NOT NULL DEFAULT 0,
+                        size_bytes INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                # Índices antigos não têm as colunas status e disk_*
+                columns = {row['name'] for row in conn.execute("PRAGMA table_info(analyses)")}
+                if 'status' not in columns:
+                    conn.execute("ALTER TABLE analyses ADD COLUMN status TEXT")
+                    conn.execute("UPDATE analyses SET status = 'completed'")
+                if 'disk_files' not in columns:
+                    conn.execute("ALTER TABLE analyses ADD COLUMN disk_files INTEGER NOT NULL DEFAULT 0")
+                    conn.execute("ALTER TABLE analyses ADD COLUMN disk_bytes INTEGER NOT NULL DEFAULT 0")
+                    conn.execute("DELETE FROM storage_counters")  # recalculados na reconciliação
+                # Paginação por keyset (created_at, analysis_id), com e sem filtros
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_keyset ON analyses(created_at, analysis_id)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_analyses_segmento_keyset ON analyses(segmento, created_at, analysis_id)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_analyses_status_keyset ON analyses(status, created_at, analysis_id)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_short_id ON analyses(short_id)")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar índice de análises: {e}")
+
+    def add_analysis(self, metadata: Dict[str, Any], files: List[Dict[str, Any]]):
+        """
+        Indexa análise (metadados no formato do arquivo *_metadata.json) e seus
+        arquivos, atualizando os contadores de armazenamento na mesma transação
+        """
+        analysis_id = metadata['analysis_id']
+        project_data = metadata.get('project_data', {})
+        preco = project_data.get('preco')
+
+        file_rows = []
+        disk_sizes = {}
+        for file_info in files:
+            path = file_info['path']
+            try:
+                modified = os.path.getmtime(path)
+                disk_sizes[path] = os.path.getsize(path)
+            except OSError:
+                modified = None
+            file_rows.append((
+                analysis_id, file_info['type'], file_info['name'], path, file_info['size'], modified
+            ))
+
+        with self.lock, self._connect() as conn:
+            # Reindexação: retira dos contadores a versão anterior
+            self._apply_counters(conn, analysis_id, -1)
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (analysis_id, short_id, timestamp, created_at, segmento, "
+                "produto, publico, preco, status, total_files, total_size, quality_score, processing_time, "
+                "disk_files, disk_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    analysis_id, analysis_id[:8], metadata.get('timestamp'), metadata.get('created_at'),
+                    project_data.get('segmento'), project_data.get('produto'), project_data.get('publico'),
+                    str(preco) if preco is not None else None, metadata.get('status', 'completed'),
+                    len(file_rows), sum(row[4] for row in file_rows),
+                    metadata.get('quality_score', 0), metadata.get('processing_time', 0),
+                    len(disk_sizes), sum(disk_sizes.values())
+                )
+            )
+            conn.execute("DELETE FROM analysis_files WHERE analysis_id = ?", (analysis_id,))
+            conn.executemany(
+                "INSERT INTO analysis_files (analysis_id, section, name, path, size, modified) VALUES (?, ?, ?, ?, ?, ?)",
+                file_rows
+            )
+            self._apply_counters(conn, analysis_id, 1)
+            conn.commit()
+
+    def _apply_counters(self, conn: sqlite3.Connection, analysis_id: str, sign: int):
+        """Soma (sign=1) ou subtrai (sign=-1) a análise dos contadores de armazenamento"""
+        rows = conn.execute(
+            "SELECT section, COUNT(*), COALESCE(SUM(size), 0) FROM analysis_files "
+            "WHERE analysis_id = ? GROUP BY section",
+            (analysis_id,)
+        ).fetchall()
+        rows = [tuple(row) for row in rows]
+        disk = conn.execute(
+            "SELECT disk_files, disk_bytes FROM analyses WHERE analysis_id = ?", (analysis_id,)
+        ).fetchone()
+        if disk is not None:
+            rows.append((DISK_COUNTER, disk[0], disk[1]))
+
+        conn.executemany(
+            "INSERT INTO storage_counters (name, files, size_bytes) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET files = files + excluded.files, size_bytes = size_bytes + excluded.size_bytes",
+            [(row[0], sign * row[1], sign * row[2]) for row in rows]
+        )
+
+    def remove_analysis(self, analysis_id: str) -> bool:
+        """Remove análise do índice (e dos contadores de armazenamento)"""
+        resolved_id = self.resolve_id(analysis_id)
+        if not resolved_id:
+            return False
+
+        with self.lock, self._connect() as conn:
+            self._apply_counters(conn, resolved_id, -1)
+            conn.execute("DELETE FROM analysis_files WHERE analysis_id = ?", (resolved_id,))
+            conn.execute("DELETE FROM analyses WHERE analysis_id = ?", (resolved_id,))
+            conn.commit()
+        return True
+
+    def resolve_id(self, analysis_id: str) -> Optional[str]:
+        """ID completo da análise a partir do ID ou do prefixo de 8 caracteres usado nos arquivos"""
+        if not analysis_id:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT analysis_id FROM analyses WHERE analysis_id = ?", (analysis_id,)
+            ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    "SELECT analysis_id FROM analyses WHERE short_id = ? ORDER BY created_at DESC LIMIT 1",
+                    (analysis_id[:8],)
+                ).fetchone()
+        return row['analysis_id'] if row else None
+
+    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Metadados indexados da análise"""
+        resolved_id = self.resolve_id(analysis_id)
+        if not resolved_id:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(ANALYSIS_COLUMNS)} FROM analyses WHERE analysis_id = ?", (resolved_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_files(self, analysis_id: str) -> List[Dict[str, Any]]:
+        """Arquivos indexados da análise, ordenados por seção"""
+        resolved_id = self.resolve_id(analysis_id)
+        if not resolved_id:
+            return []
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT section, name, path, size, modified FROM analysis_files "
+                "WHERE analysis_id = ? ORDER BY section",
+                (resolved_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_section_file(self, analysis_id: str, section: str) -> Optional[str]:
+        """Caminho do arquivo de uma seção"""
+        resolved_id = self.resolve_id(analysis_id)
+        if not resolved_id:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT path FROM analysis_files WHERE analysis_id = ? AND section = ?",
+                (resolved_id, section)
+            ).fetchone()
+        return row['path'] if row else None
+
+    def _filter_conditions(self, filters: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+        """Condições SQL dos filtros de listagem (segmento, status, created_from, created_to)"""
+        filters = filters or {}
+        conditions, params = [], []
+        for column, operator, name in (
+            ('segmento', '=', 'segmento'),
+            ('status', '=', 'status'),
+            ('created_at', '>=', 'created_from'),
+            ('created_at', '<', 'created_to')
+        ):
+            if filters.get(name):
+                conditions.append(f"{column} {operator} ?")
+                params.append(filters[name])
+        return conditions, params
+
+    def list_analyses(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        sort_by: str = 'created_at',
+        descending: bool = True,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Lista análises ordenadas e paginadas sem abrir os arquivos"""
+        if sort_by not in SORT_COLUMNS:
+            sort_by = 'created_at'
+
+        direction = 'DESC' if descending else 'ASC'
+        conditions, params = self._filter_conditions(filters)
+        query = f"SELECT {', '.join(ANALYSIS_COLUMNS)} FROM analyses"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += f" ORDER BY {sort_by} {direction}, analysis_id {direction}"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def list_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Página das análises mais recentes depois de after = (created_at,
+        analysis_id) da última linha da página anterior. A busca parte do
+        índice na posição do cursor, então o custo não cresce com a profundidade.
+        """
+        conditions, params = self._filter_conditions(filters)
+        if after:
+            conditions.append("(created_at, analysis_id) < (?, ?)")
+            params += list(after)
+
+        query = f"SELECT {', '.join(ANALYSIS_COLUMNS)} FROM analyses"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += " ORDER BY created_at DESC, analysis_id DESC LIMIT ?"
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params + [limit]).fetchall()]
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Total de análises indexadas (que atendem aos filtros)"""
+        conditions, params = self._filter_conditions(filters)
+        query = "SELECT COUNT(*) FROM analyses"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def get_file_signatures(self, analysis_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        Assinatura de versão de cada análise (seção, caminho, tamanho e mtime
+        dos arquivos indexados) em uma única consulta, sem tocar no disco.
+        Toda regravação reindexa a análise, então a assinatura muda junto.
+        """
+        query = "SELECT analysis_id, section, path, size, modified FROM analysis_files"
+        params = []
+        if analysis_id:
+            query += " WHERE analysis_id = ?"
+            params.append(analysis_id)
+        query += " ORDER BY analysis_id, section"
+
+        signatures = {}
+        with self._connect() as conn:
+            rows = conn.execute(query, params)
+            for row in rows:
+                signatures.setdefault(row['analysis_id'], []).append(
+                    f"{row['section']}:{row['path']}:{row['size']}:{row['modified']}"
+                )
+        return {
+            analysis_id: hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+            for analysis_id, parts in signatures.items()
+        }
+
+    def get_storage_counters(self) -> Dict[str, Dict[str, int]]:
+        """Contadores de armazenamento (nome -> files, size_bytes), sem tocar no disco"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, files, size_bytes FROM storage_counters").fetchall()
+        return {row['name']: {'files': row['files'], 'size_bytes': row['size_bytes']} for row in rows}
+
+    def reconcile_storage(self) -> Dict[str, Dict[str, int]]:
+        """
+        Recalcula os contadores a partir do índice, conferindo o tamanho real de
+        cada arquivo em disco. Retorna as diferenças encontradas (nome -> delta).
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT analysis_id, path, modified FROM analysis_files").fetchall()
+
+        # stat fora do lock: só a gravação final bloqueia as demais operações
+        snapshot = {}  # analysis_id -> (arquivos indexados, arquivos no disco, bytes no disco)
+        for row in rows:
+            indexed, files, size_bytes = snapshot.get(row['analysis_id'], (frozenset(), 0, 0))
+            indexed = indexed | {(row['path'], row['modified'])}
+            try:
+                size = os.path.getsize(row['path'])
+                files, size_bytes = files + 1, size_bytes + size
+            except OSError:
+                pass
+            snapshot[row['analysis_id']] = (indexed, files, size_bytes)
+
+        with self.lock, self._connect() as conn:
+            before = {
+                row['name']: (row['files'], row['size_bytes'])
+                for row in conn.execute("SELECT name, files, size_bytes FROM storage_counters")
+            }
+            current = {}
+            for row in conn.execute("SELECT DISTINCT analysis_id, path, modified FROM analysis_files"):
+                current.setdefault(row['analysis_id'], set()).add((row['path'], row['modified']))
+
+            # Só corrige análises cujo conjunto de arquivos não mudou desde o
+            # snapshot; as salvas no meio já têm contadores recém-calculados
+            conn.executemany(
+                "UPDATE analyses SET disk_files = ?, disk_bytes = ? WHERE analysis_id = ?",
+                [
+                    (files, size_bytes, analysis_id)
+                    for analysis_id, (indexed, files, size_bytes) in snapshot.items()
+                    if current.get(analysis_id) == indexed
+                ]
+            )
+            conn.execute("DELETE FROM storage_counters")
+            conn.execute(
+                "INSERT INTO storage_counters (name, files, size_bytes) "
+                "SELECT section, COUNT(*), COALESCE(SUM(size), 0) FROM analysis_files GROUP BY section"
+            )
+            conn.execute(
+                "INSERT INTO storage_counters (name, files, size_bytes) "
+                "SELECT ?, COALESCE(SUM(disk_files), 0), COALESCE(SUM(disk_bytes), 0) FROM analyses",
+                (DISK_COUNTER,)
+            )
+            after = {
+                row['name']: (row['files'], row['size_bytes'])
+                for row in conn.execute("SELECT name, files, size_bytes FROM storage_counters")
+            }
+            conn.commit()
+
+        drift = {}
+        for name in set(before) | set(after):
+            old_files, old_size = before.get(name, (0, 0))
+            new_files, new_size = after.get(name, (0, 0))
+            if (old_files, old_size) != (new_files, new_size):
+                drift[name] = {'files': new_files - old_files, 'size_bytes': new_size - old_size}
+        return drift
+
+    def rebuild(self) -> int:
+        """
+        Reconstrói o índice a partir dos containers e dos arquivos *_metadata.json
+        do formato antigo. Retorna o número de análises indexadas.
+        """
+        indexed = self._rebuild_from_containers() + self._rebuild_from_metadata_files()
+        logger.info(f"🗂️ Índice de análises reconstruído: {indexed} análises")
+        return indexed
+
+    def _rebuild_from_containers(self) -> int:
+        """Indexa containers pela seção de metadados e pela tabela de offsets"""
+        containers_dir = os.path.join(self.base_dir, 'containers')
+        if not os.path.isdir(containers_dir):
+            return 0
+
+        indexed = 0
+        for filename in sorted(os.listdir(containers_dir)):
+            if not filename.endswith(CONTAINER_EXTENSION):
+                continue
+
+            file_path = os.path.join(containers_dir, filename)
+            try:
+                table = analysis_container.read_table(file_path)
+                metadata = analysis_container.read_section(file_path, 'metadata')
+                files = [
+                    {'type': section, 'name': filename, 'path': file_path, 'size': entry[1]}
+                    for section, entry in table['sections'].items()
+                ]
+                self.add_analysis(metadata, files)
+                indexed += 1
+            except Exception as e:
+                logger.error(f"❌ Erro ao indexar container {filename}: {str(e)}")
+
+        return indexed
+
+    def _rebuild_from_metadata_files(self) -> int:
+        """Indexa análises do formato antigo (um JSON por seção)"""
+        metadata_dir = os.path.join(self.base_dir, 'metadata')
+        if not os.path.isdir(metadata_dir):
+            return 0
+
+        indexed = 0
+        for filename in sorted(os.listdir(metadata_dir)):
+            if not filename.endswith('_metadata.json'):
+                continue
+
+            file_path = os.path.join(metadata_dir, filename)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+
+                files = [
+                    file_info for file_info in metadata.get('files_saved', [])
+                    if os.path.exists(file_info.get('path', ''))
+                ]
+                files.append({
+                    'type': 'metadata',
+                    'name': filename,
+                    'path': file_path,
+                    'size': os.path.getsize(file_path)
+                })
+                self.add_analysis(metadata, files)
+                indexed += 1
+            except Exception as e:
+                logger.error(f"❌ Erro ao indexar metadata {filename}: {str(e)}")
+
+        return indexed
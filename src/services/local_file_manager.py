@@ -9,12 +9,39 @@ import os
 import logging
 import json
 import time
-from datetime import datetime
+import hashlib
+import threading
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import uuid
 
+from services.local_analysis_index import LocalAnalysisIndex, DISK_COUNTER
+from services.analysis_container import analysis_container, CONTAINER_EXTENSION
+from services.analysis_record import encode_cursor, decode_cursor
+
 logger = logging.getLogger(__name__)
 
+# Seção salva -> chave correspondente nos dados da análise
+ANALYSIS_SECTIONS = {
+    'avatars': 'avatar_ultra_detalhado',
+    'drivers_mentais': 'drivers_mentais_customizados',
+    'provas_visuais': 'provas_visuais_sugeridas',
+    'anti_objecao': 'sistema_anti_objecao',
+    'pre_pitch': 'pre_pitch_invisivel',
+    'predicoes_futuro': 'predicoes_futuro_completas',
+    'posicionamento': 'escopo_posicionamento',
+    'concorrencia': 'analise_concorrencia_detalhada',
+    'palavras_chave': 'estrategia_palavras_chave',
+    'metricas': 'metricas_performance_detalhadas',
+    'funil_vendas': 'funil_vendas_detalhado',
+    'plano_acao': 'plano_acao_detalhado',
+    'insights': 'insights_exclusivos',
+    'pesquisa_web': 'pesquisa_web_massiva'
+}
+
+# Demais campos da análise (fora das seções) dentro do container
+BASE_SECTION = 'dados_base'
+
 class LocalFileManager:
     """Gerenciador de arquivos locais para análises"""
     
@@ -23,93 +50,102 @@ class LocalFileManager:
         self.base_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'analyses_data')
         self._ensure_directory_structure()
         
+        # Índice SQLite: consultas por ID e listagem sem varrer o diretório
+        self.index = LocalAnalysisIndex(self.base_dir)
+        if self.index.count() == 0:
+            self.index.rebuild()
+        
+        # Contadores de armazenamento mantidos pelo índice; a reconciliação
+        # periódica corrige desvios (arquivos alterados fora da aplicação)
+        self.reconcile_interval = float(os.getenv('STORAGE_RECONCILE_INTERVAL', 6 * 3600))
+        self.reconcile_stop = threading.Event()
+        self.last_reconciliation = None
+        if not self.index.get_storage_counters() and self.index.count():
+            self.reconcile_storage()
+        if self.reconcile_interval > 0:
+            threading.Thread(target=self._reconcile_loop, name='storage_reconcile', daemon=True).start()
+        
         logger.info(f"Local File Manager inicializado: {self.base_dir}")
     
     def _ensure_directory_structure(self):
         """Garante que a estrutura de diretórios existe"""
         
-        subdirs = [
-            'avatars', 'drivers_mentais', 'provas_visuais', 'anti_objecao',
-            'pre_pitch', 'predicoes_futuro', 'posicionamento', 'concorrencia',
-            'palavras_chave', 'metricas', 'funil_vendas', 'plano_acao',
-            'insights', 'pesquisa_web', 'completas', 'metadata'
-        ]
-        
         # Cria diretório base
         os.makedirs(self.base_dir, exist_ok=True)
         
-        # Cria subdiretórios
-        for subdir in subdirs:
+        # Containers (formato atual) e metadados; os diretórios por seção só
+        # existem para análises salvas no formato antigo
+        for subdir in ('containers', 'metadata'):
             os.makedirs(os.path.join(self.base_dir, subdir), exist_ok=True)
     
     def save_analysis_locally(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Salva análise completa em arquivos locais organizados"""
+        """
+        Salva análise em um único container comprimido (uma seção por frame,
+        com tabela de offsets). O layout antigo de um JSON por seção continua
+        disponível via export_analysis_layout.
+        """
         
         try:
             # Gera ID único para a análise
             analysis_id = str(uuid.uuid4())
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
-            saved_files = []
-            
-            # Salva cada seção em arquivo separado
-            sections_to_save = {
-                'avatars': analysis_data.get('avatar_ultra_detalhado'),
-                'drivers_mentais': analysis_data.get('drivers_mentais_customizados'),
-                'provas_visuais': analysis_data.get('provas_visuais_sugeridas'),
-                'anti_objecao': analysis_data.get('sistema_anti_objecao'),
-                'pre_pitch': analysis_data.get('pre_pitch_invisivel'),
-                'predicoes_futuro': analysis_data.get('predicoes_futuro_completas'),
-                'posicionamento': analysis_data.get('escopo_posicionamento'),
-                'concorrencia': analysis_data.get('analise_concorrencia_detalhada'),
-                'palavras_chave': analysis_data.get('estrategia_palavras_chave'),
-                'metricas': analysis_data.get('metricas_performance_detalhadas'),
-                'funil_vendas': analysis_data.get('funil_vendas_detalhado'),
-                'plano_acao': analysis_data.get('plano_acao_detalhado'),
-                'insights': analysis_data.get('insights_exclusivos'),
-                'pesquisa_web': analysis_data.get('pesquisa_web_massiva')
-            }
+            container_name = f"{analysis_id[:8]}_{timestamp}{CONTAINER_EXTENSION}"
+            container_path = os.path.join(self.base_dir, 'containers', container_name)
             
-            # Salva cada seção
-            for section_name, section_data in sections_to_save.items():
+            # Cada seção é comprimida separadamente; o restante da análise vai em
+            # 'dados_base', de modo que a análise completa não é duplicada
+            frames = {}
+            saved_keys = set()
+            for section_name, data_key in ANALYSIS_SECTIONS.items():
+                section_data = analysis_data.get(data_key)
                 if section_data:
-                    file_path = self._save_section_file(
-                        section_name, section_data, analysis_id, timestamp
-                    )
-                    if file_path:
-                        saved_files.append({
-                            'type': section_name,
-                            'name': os.path.basename(file_path),
-                            'path': file_path,
-                            'size': os.path.getsize(file_path)
-                        })
-            
-            # Salva análise completa
-            complete_file_path = self._save_complete_analysis(analysis_data, analysis_id, timestamp)
-            if complete_file_path:
-                saved_files.append({
-                    'type': 'completas',
-                    'name': os.path.basename(complete_file_path),
-                    'path': complete_file_path,
-                    'size': os.path.getsize(complete_file_path)
-                })
-            
-            # Salva metadados
-            metadata_file_path = self._save_metadata(analysis_data, analysis_id, timestamp, saved_files)
-            if metadata_file_path:
-                saved_files.append({
-                    'type': 'metadata',
-                    'name': os.path.basename(metadata_file_path),
-                    'path': metadata_file_path,
-                    'size': os.path.getsize(metadata_file_path)
-                })
-            
-            logger.info(f"✅ Análise salva localmente: {len(saved_files)} arquivos")
+                    frames[section_name] = analysis_container.encode(section_data)
+                    saved_keys.add(data_key)
+            
+            frames[BASE_SECTION] = analysis_container.encode(
+                {key: value for key, value in analysis_data.items() if key not in saved_keys}
+            )
+            
+            saved_files = [
+                {
+                    'type': section_name,
+                    'name': container_name,
+                    'path': container_path,
+                    'size': len(frame)
+                }
+                for section_name, (frame, _) in frames.items()
+            ]
+            
+            # Metadados vão no próprio container (e no índice)
+            metadata = self._build_metadata(analysis_data, analysis_id, timestamp, saved_files)
+            frames['metadata'] = analysis_container.encode(metadata)
+            saved_files.append({
+                'type': 'metadata',
+                'name': container_name,
+                'path': container_path,
+                'size': len(frames['metadata'][0])
+            })
+            
+            analysis_container.write(container_path, frames)
+            
+            # Atualiza índice
+            try:
+                self.index.add_analysis(metadata, saved_files)
+            except Exception as e:
+                logger.error(f"❌ Erro ao indexar análise {analysis_id}: {str(e)}")
+            
+            raw_size = sum(raw for _, raw in frames.values())
+            logger.info(
+                f"✅ Análise salva localmente: {len(frames)} seções em {container_name} "
+                f"({os.path.getsize(container_path) / 1024:.1f} KB, {raw_size / 1024:.1f} KB sem compressão)"
+            )
             
             return {
                 'success': True,
                 'analysis_id': analysis_id,
                 'base_directory': self.base_dir,
+                'container': container_path,
                 'files': saved_files,
                 'total_files': len(saved_files),
                 'timestamp': timestamp
@@ -122,139 +158,104 @@ class LocalFileManager:
                 'error': str(e)
             }
     
-    def _save_section_file(
+    def _build_metadata(
         self, 
-        section_name: str, 
-        section_data: Any, 
+        analysis_data: Dict[str, Any], 
         analysis_id: str, 
-        timestamp: str
-    ) -> Optional[str]:
-        """Salva arquivo de uma seção específica"""
+        timestamp: str,
+        saved_files: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Monta metadados da análise"""
         
-        try:
-            filename = f"{analysis_id[:8]}_{timestamp}_{section_name}.json"
-            file_path = os.path.join(self.base_dir, section_name, filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(section_data, f, ensure_ascii=False, indent=2)
-            
-            return file_path
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao salvar seção {section_name}: {str(e)}")
-            return None
+        return {
+            'analysis_id': analysis_id,
+            'timestamp': timestamp,
+            'created_at': datetime.now().isoformat(),
+            'status': analysis_data.get('status', 'completed'),
+            'project_data': {
+                'segmento': analysis_data.get('segmento'),
+                'produto': analysis_data.get('produto'),
+                'publico': analysis_data.get('publico'),
+                'preco': analysis_data.get('preco')
+            },
+            'files_saved': saved_files,
+            'total_files': len(saved_files),
+            'analysis_metadata': analysis_data.get('metadata', {}),
+            'quality_score': analysis_data.get('metadata', {}).get('quality_score', 0),
+            'processing_time': analysis_data.get('metadata', {}).get('processing_time_seconds', 0)
+        }
     
-    def _save_complete_analysis(
-        self, 
-        analysis_data: Dict[str, Any], 
-        analysis_id: str, 
-        timestamp: str
-    ) -> Optional[str]:
-        """Salva análise completa"""
+    def _format_listing(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Linha do índice no formato da listagem"""
+        return {
+            'analysis_id': analysis['analysis_id'],
+            'timestamp': analysis['timestamp'],
+            'created_at': analysis['created_at'],
+            'segmento': analysis['segmento'],
+            'produto': analysis['produto'],
+            'status': analysis['status'],
+            'total_files': analysis['total_files'],
+            'total_size': analysis['total_size'],
+            'quality_score': analysis['quality_score'] or 0,
+            'processing_time': analysis['processing_time'] or 0
+        }
+    
+    def list_local_analyses(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        sort_by: str = 'created_at',
+        descending: bool = True,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Lista análises salvas localmente (pelo índice, sem abrir os metadados)"""
         
         try:
-            filename = f"{analysis_id[:8]}_{timestamp}_completa.json"
-            file_path = os.path.join(self.base_dir, 'completas', filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(analysis_data, f, ensure_ascii=False, indent=2)
-            
-            return file_path
+            analyses = self.index.list_analyses(limit, offset, sort_by, descending, filters)
+            return [self._format_listing(analysis) for analysis in analyses]
             
         except Exception as e:
-            logger.error(f"❌ Erro ao salvar análise completa: {str(e)}")
-            return None
+            logger.error(f"❌ Erro ao listar análises locais: {str(e)}")
+            return []
     
-    def _save_metadata(
-        self, 
-        analysis_data: Dict[str, Any], 
-        analysis_id: str, 
-        timestamp: str,
-        saved_files: List[Dict[str, Any]]
-    ) -> Optional[str]:
-        """Salva metadados da análise"""
+    def list_local_analyses_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Página de análises locais (mais recentes primeiro) por keyset.
+        next_cursor é None na última página; cursor inválido gera ValueError.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        analyses = self.index.list_page(limit, after, filters)
         
-        try:
-            metadata = {
-                'analysis_id': analysis_id,
-                'timestamp': timestamp,
-                'created_at': datetime.now().isoformat(),
-                'project_data': {
-                    'segmento': analysis_data.get('segmento'),
-                    'produto': analysis_data.get('produto'),
-                    'publico': analysis_data.get('publico'),
-                    'preco': analysis_data.get('preco')
-                },
-                'files_saved': saved_files,
-                'total_files': len(saved_files),
-                'analysis_metadata': analysis_data.get('metadata', {}),
-                'quality_score': analysis_data.get('metadata', {}).get('quality_score', 0),
-                'processing_time': analysis_data.get('metadata', {}).get('processing_time_seconds', 0)
-            }
-            
-            filename = f"{analysis_id[:8]}_{timestamp}_metadata.json"
-            file_path = os.path.join(self.base_dir, 'metadata', filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            
-            return file_path
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao salvar metadados: {str(e)}")
-            return None
+        next_cursor = None
+        if len(analyses) == limit:
+            last = analyses[-1]
+            next_cursor = encode_cursor(last['created_at'], last['analysis_id'])
+        
+        return {
+            'analyses': [self._format_listing(analysis) for analysis in analyses],
+            'next_cursor': next_cursor
+        }
     
-    def list_local_analyses(self) -> List[Dict[str, Any]]:
-        """Lista análises salvas localmente"""
+    def count_local_analyses(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Total de análises salvas localmente"""
         
         try:
-            analyses = []
-            metadata_dir = os.path.join(self.base_dir, 'metadata')
-            
-            if not os.path.exists(metadata_dir):
-                return []
-            
-            for filename in os.listdir(metadata_dir):
-                if filename.endswith('_metadata.json'):
-                    file_path = os.path.join(metadata_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                        
-                        analyses.append({
-                            'analysis_id': metadata.get('analysis_id'),
-                            'timestamp': metadata.get('timestamp'),
-                            'created_at': metadata.get('created_at'),
-                            'segmento': metadata.get('project_data', {}).get('segmento'),
-                            'produto': metadata.get('project_data', {}).get('produto'),
-                            'total_files': metadata.get('total_files', 0),
-                            'quality_score': metadata.get('quality_score', 0),
-                            'processing_time': metadata.get('processing_time', 0)
-                        })
-                        
-                    except Exception as e:
-                        logger.error(f"❌ Erro ao ler metadata {filename}: {str(e)}")
-                        continue
-            
-            # Ordena por data de criação (mais recente primeiro)
-            analyses.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
-            return analyses
-            
+            return self.index.count(filters)
         except Exception as e:
-            logger.error(f"❌ Erro ao listar análises locais: {str(e)}")
-            return []
+            logger.error(f"❌ Erro ao contar análises locais: {str(e)}")
+            return 0
     
     def get_analysis_directory(self, analysis_id: str) -> Optional[str]:
         """Obtém diretório de uma análise específica"""
         
-        # Busca por arquivos que contenham o ID da análise
-        for root, dirs, files in os.walk(self.base_dir):
-            for file in files:
-                if analysis_id[:8] in file:
-                    return root
-        
-        return None
+        # Diretório do primeiro arquivo indexado da análise
+        files = self.index.get_files(analysis_id)
+        return os.path.dirname(files[0]['path']) if files else None
     
     def delete_local_analysis(self, analysis_id: str) -> bool:
         """Remove análise local por ID"""
@@ -262,19 +263,18 @@ class LocalFileManager:
         try:
             deleted_files = 0
             
-            # Busca e remove todos os arquivos relacionados
-            for root, dirs, files in os.walk(self.base_dir):
-                for file in files:
-                    if analysis_id[:8] in file:
-                        file_path = os.path.join(root, file)
-                        try:
-                            os.remove(file_path)
-                            deleted_files += 1
-                            logger.info(f"🗑️ Arquivo removido: {file}")
-                        except Exception as e:
-                            logger.error(f"❌ Erro ao remover {file}: {str(e)}")
-            
-            if deleted_files > 0:
+            # Remove os arquivos indexados da análise
+            for file_info in self.index.get_files(analysis_id):
+                try:
+                    os.remove(file_info['path'])
+                    deleted_files += 1
+                    logger.info(f"🗑️ Arquivo removido: {file_info['name']}")
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.error(f"❌ Erro ao remover {file_info['name']}: {str(e)}")
+            
+            if self.index.remove_analysis(analysis_id):
                 logger.info(f"✅ Análise {analysis_id} removida: {deleted_files} arquivos")
                 return True
             else:
@@ -289,97 +289,286 @@ class LocalFileManager:
         """Obtém lista de arquivos de uma análise"""
         
         try:
-            files = []
-            
-            for root, dirs, filenames in os.walk(self.base_dir):
-                for filename in filenames:
-                    if analysis_id[:8] in filename:
-                        file_path = os.path.join(root, filename)
-                        
-                        # Determina tipo baseado no diretório
-                        section_type = os.path.basename(root)
-                        
-                        files.append({
-                            'name': filename,
-                            'path': file_path,
-                            'type': section_type,
-                            'size': os.path.getsize(file_path),
-                            'modified': datetime.fromtimestamp(
-                                os.path.getmtime(file_path)
-                            ).isoformat()
-                        })
-            
-            return files
+            return [
+                {
+                    'name': file_info['name'],
+                    'path': file_info['path'],
+                    'type': file_info['section'],
+                    'size': file_info['size'],
+                    'modified': datetime.fromtimestamp(file_info['modified']).isoformat()
+                    if file_info['modified'] else None
+                }
+                for file_info in self.index.get_files(analysis_id)
+            ]
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter arquivos da análise {analysis_id}: {str(e)}")
             return []
     
+    def _container_path(self, analysis_id: str) -> Optional[str]:
+        """Container da análise (None para análises no formato antigo)"""
+        file_path = self.index.get_section_file(analysis_id, 'metadata')
+        if file_path and file_path.endswith(CONTAINER_EXTENSION) and os.path.exists(file_path):
+            return file_path
+        return None
+    
+    def resolve_local_path(self, file_path: str) -> Optional[str]:
+        """Caminho real do arquivo se estiver dentro do diretório de análises"""
+        real_path = os.path.realpath(file_path)
+        base_dir = os.path.realpath(self.base_dir)
+        if os.path.commonpath([real_path, base_dir]) != base_dir or not os.path.isfile(real_path):
+            return None
+        return real_path
+    
+    def section_source(self, analysis_id: str, section_name: str) -> Optional[str]:
+        """Arquivo que contém a seção (container ou JSON do formato antigo)"""
+        return self._container_path(analysis_id) or self.index.get_section_file(analysis_id, section_name)
+    
+    def content_etag(self, file_path: str, section_name: Optional[str] = None) -> str:
+        """
+        ETag do arquivo (ou de uma seção do container) a partir de caminho,
+        mtime e tamanho, sem ler o conteúdo. Containers são gravados de forma
+        atômica, então qualquer regravação muda o mtime.
+        """
+        stat = os.stat(file_path)
+        key = f"{os.path.realpath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}:{section_name or ''}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    
+    def content_hash(self, analysis_id: str) -> Optional[str]:
+        """SHA-256 do conteúdo gravado da análise (container ou JSONs do formato antigo)"""
+        paths = sorted({file_info['path'] for file_info in self.index.get_files(analysis_id)})
+        if not paths:
+            return None
+
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+    
     def load_analysis_section(self, analysis_id: str, section_name: str) -> Optional[Dict[str, Any]]:
-        """Carrega uma seção específica da análise"""
+        """
+        Carrega uma seção específica da análise. No container, só o frame da
+        seção é lido e descomprimido; 'completas' remonta a análise inteira.
+        """
         
         try:
-            section_dir = os.path.join(self.base_dir, section_name)
+            container_path = self._container_path(analysis_id)
+            if container_path:
+                if section_name == 'completas':
+                    return self._assemble_analysis(analysis_container.read_sections(container_path))
+                if section_name not in analysis_container.list_sections(container_path):
+                    return None
+                return analysis_container.read_section(container_path, section_name)
             
-            if not os.path.exists(section_dir):
-                return None
+            file_path = self.index.get_section_file(analysis_id, section_name)
             
-            # Busca arquivo da seção
-            for filename in os.listdir(section_dir):
-                if analysis_id[:8] in filename and filename.endswith('.json'):
-                    file_path = os.path.join(section_dir, filename)
-                    
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        return json.load(f)
+            if not file_path or not os.path.exists(file_path):
+                return None
             
-            return None
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
             
         except Exception as e:
             logger.error(f"❌ Erro ao carregar seção {section_name} da análise {analysis_id}: {str(e)}")
             return None
     
+    def load_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega a análise completa"""
+        return self.load_analysis_section(analysis_id, 'completas')
+
+    def load_analysis_fields(self, analysis_id: str, keys: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Carrega só os campos pedidos da análise. No container, apenas os frames
+        das seções que contêm esses campos (e dados_base, para os demais) são lidos.
+        """
+
+        try:
+            container_path = self._container_path(analysis_id)
+            if not container_path:
+                analysis_data = self.load_analysis(analysis_id)
+                return None if analysis_data is None else {key: analysis_data.get(key) for key in keys}
+
+            key_sections = {data_key: section_name for section_name, data_key in ANALYSIS_SECTIONS.items()}
+            sections = analysis_container.read_sections(
+                container_path, [key_sections.get(key, BASE_SECTION) for key in keys]
+            )
+            base = sections.get(BASE_SECTION, {})
+            return {
+                key: sections.get(key_sections[key]) if key in key_sections else base.get(key)
+                for key in keys
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar campos da análise {analysis_id}: {str(e)}")
+            return None
+
+    def _assemble_analysis(self, sections: Dict[str, Any]) -> Dict[str, Any]:
+        """Remonta os dados originais da análise a partir das seções do container"""
+        analysis_data = dict(sections.get(BASE_SECTION, {}))
+        for section_name, data_key in ANALYSIS_SECTIONS.items():
+            if section_name in sections:
+                analysis_data[data_key] = sections[section_name]
+        return analysis_data
+    
+    def iter_export_files(self, analysis_id: str):
+        """
+        Visão de exportação no layout de um JSON por seção:
+        gera (caminho relativo, conteúdo JSON em bytes) para cada arquivo.
+        """
+        analysis = self.index.get_analysis(analysis_id)
+        container_path = self._container_path(analysis_id)
+        
+        if not analysis:
+            return
+        
+        if not container_path:
+            # Formato antigo: os arquivos já estão no layout de exportação
+            for file_info in self.index.get_files(analysis_id):
+                if os.path.exists(file_info['path']):
+                    with open(file_info['path'], 'rb') as f:
+                        yield os.path.relpath(file_info['path'], self.base_dir), f.read()
+            return
+        
+        prefix = f"{analysis['analysis_id'][:8]}_{analysis['timestamp']}"
+        sections = analysis_container.read_sections(container_path)
+        
+        for section_name, section_data in sections.items():
+            if section_name == BASE_SECTION:
+                continue
+            yield (
+                os.path.join(section_name, f"{prefix}_{section_name}.json"),
+                json.dumps(section_data, ensure_ascii=False, indent=2).encode('utf-8')
+            )
+        
+        yield (
+            os.path.join('completas', f"{prefix}_completa.json"),
+            json.dumps(self._assemble_analysis(sections), ensure_ascii=False, indent=2).encode('utf-8')
+        )
+    
+    def iter_analysis_ids(self, filters: Optional[Dict[str, Any]] = None, batch_size: int = 200):
+        """IDs das análises (mais recentes primeiro) em páginas do índice, sem carregar a lista toda"""
+        after = None
+        while True:
+            analyses = self.index.list_page(batch_size, after, filters)
+            for analysis in analyses:
+                yield analysis['analysis_id']
+            if len(analyses) < batch_size:
+                return
+            after = (analyses[-1]['created_at'], analyses[-1]['analysis_id'])
+    
+    def iter_bulk_export_files(self, analysis_ids):
+        """Visão de exportação de várias análises, uma de cada vez"""
+        for analysis_id in analysis_ids:
+            yield from self.iter_export_files(analysis_id)
+    
+    def export_analysis_layout(self, analysis_id: str, target_dir: str) -> List[str]:
+        """Grava a visão de exportação (um JSON por seção) em target_dir"""
+        
+        exported = []
+        for relative_path, content in self.iter_export_files(analysis_id):
+            file_path = os.path.join(target_dir, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(content)
+            exported.append(file_path)
+        
+        logger.info(f"📤 Análise {analysis_id} exportada: {len(exported)} arquivos em {target_dir}")
+        return exported
+    
     def get_storage_stats(self) -> Dict[str, Any]:
-        """Obtém estatísticas de armazenamento"""
+        """
+        Estatísticas de armazenamento a partir dos contadores do índice, sem
+        percorrer o diretório. Total = arquivos físicos; seções = entradas por tipo.
+        """
         
         try:
+            counters = self.index.get_storage_counters()
+            disk = counters.pop(DISK_COUNTER, {'files': 0, 'size_bytes': 0})
+            
             stats = {
                 'base_directory': self.base_dir,
-                'total_files': 0,
-                'total_size_bytes': 0,
-                'sections': {}
-            }
-            
-            for root, dirs, files in os.walk(self.base_dir):
-                section_name = os.path.basename(root)
-                
-                if section_name not in stats['sections']:
-                    stats['sections'][section_name] = {
-                        'files': 0,
-                        'size_bytes': 0
+                'total_files': disk['files'],
+                'total_size_bytes': disk['size_bytes'],
+                'total_size_mb': round(disk['size_bytes'] / (1024 * 1024), 2),
+                'sections': {
+                    section_name: {
+                        'files': counter['files'],
+                        'size_bytes': counter['size_bytes'],
+                        'size_mb': round(counter['size_bytes'] / (1024 * 1024), 2)
                     }
-                
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        stats['total_files'] += 1
-                        stats['total_size_bytes'] += file_size
-                        stats['sections'][section_name]['files'] += 1
-                        stats['sections'][section_name]['size_bytes'] += file_size
-                    except:
-                        continue
-            
-            # Converte bytes para MB
-            stats['total_size_mb'] = round(stats['total_size_bytes'] / (1024 * 1024), 2)
-            
-            for section in stats['sections'].values():
-                section['size_mb'] = round(section['size_bytes'] / (1024 * 1024), 2)
+                    for section_name, counter in sorted(counters.items())
+                },
+                'last_reconciliation': self.last_reconciliation
+            }
             
             return stats
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter estatísticas: {str(e)}")
             return {}
+    
+    def reconcile_storage(self) -> Dict[str, Any]:
+        """Recalcula os contadores de armazenamento conferindo o disco"""
+        
+        try:
+            drift = self.index.reconcile_storage()
+            self.last_reconciliation = datetime.now().isoformat()
+            if drift:
+                logger.warning(f"⚠️ Contadores de armazenamento corrigidos: {drift}")
+            else:
+                logger.info("✅ Contadores de armazenamento conferidos")
+            return {'success': True, 'drift': drift, 'reconciled_at': self.last_reconciliation}
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao reconciliar armazenamento: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def _reconcile_loop(self):
+        """Reconciliação periódica dos contadores"""
+        while not self.reconcile_stop.wait(self.reconcile_interval):
+            self.reconcile_storage()
+    
+    def stop_reconciliation(self):
+        """Interrompe a reconciliação periódica"""
+        self.reconcile_stop.set()
+    
+    def cleanup_old_analyses(self, days_old: int = 30, dry_run: bool = True) -> Dict[str, Any]:
+        """
+        Remove análises criadas há mais de days_old dias (pelo índice, de modo
+        que arquivos e contadores saem juntos). dry_run apenas lista.
+        """
+        cutoff_date = datetime.now() - timedelta(days=days_old)
+        filters = {'created_to': cutoff_date.isoformat()}
+        
+        old_analyses = list(self.iter_analysis_ids(filters))
+        files_to_remove = []
+        for analysis_id in old_analyses:
+            # Um container guarda todas as seções: lista cada arquivo físico uma vez
+            paths = dict.fromkeys(file_info['path'] for file_info in self.index.get_files(analysis_id))
+            for path in paths:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                files_to_remove.append({
+                    'analysis_id': analysis_id,
+                    'path': path,
+                    'name': os.path.basename(path),
+                    'size': size
+                })
+        
+        if not dry_run:
+            for analysis_id in old_analyses:
+                self.delete_local_analysis(analysis_id)
+        
+        return {
+            'cutoff_date': cutoff_date.isoformat(),
+            'analyses': old_analyses,
+            'files': files_to_remove,
+            'total_size_bytes': sum(file_info['size'] for file_info in files_to_remove)
+        }
 
 # Instância global
 local_file_manager = LocalFileManager()
\ No newline at end of file
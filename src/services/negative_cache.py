@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Negative Cache
+Cache persistente de URLs e domínios que falham, com re-tentativa exponencial
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Códigos de motivo
+REASON_HTTP_STATUS = 'http_status'
+REASON_TIMEOUT = 'timeout'
+REASON_QUALITY = 'quality_rejected'
+REASON_NO_CONTENT = 'no_content'
+REASON_UNSUPPORTED = 'unsupported_content'
+REASON_CONNECTION = 'connection_error'
+
+# Intervalo inicial de nova tentativa por motivo (segundos); dobra a cada falha
+BASE_INTERVALS = {
+    REASON_HTTP_STATUS: 6 * 3600,
+    REASON_TIMEOUT: 30 * 60,
+    REASON_QUALITY: 3600,  # a rejeição depende da consulta: só evita repetir a mesma busca
+    REASON_NO_CONTENT: 12 * 3600,
+    REASON_UNSUPPORTED: 7 * 86400,
+    REASON_CONNECTION: 3600
+}
+
+# Intervalo inicial por status HTTP: páginas removidas demoram mais a voltar,
+# erros de servidor são re-sondados logo (e não bloqueiam o domínio)
+STATUS_INTERVALS = {
+    404: 7 * 86400,
+    410: 30 * 86400,
+    500: 3600,
+    502: 3600,
+    503: 3600,
+    504: 3600
+}
+
+# Status transitórios ficam com o agendador de hosts, não com o cache negativo
+TRANSIENT_STATUS = {408, 425, 429}
+
+# Motivos que contam para bloquear o domínio inteiro (paywall, Cloudflare, página vazia);
+# REASON_QUALITY fica de fora, pois depende da consulta e não da saúde do domínio
+DOMAIN_REASONS = {REASON_HTTP_STATUS, REASON_NO_CONTENT}
+
+class NegativeCache:
+    """Cache negativo persistente para URLs e domínios"""
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "negative_cache.db")
+        self.enabled = os.getenv('NEGATIVE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_interval = float(os.getenv('NEGATIVE_CACHE_MAX_INTERVAL', 30 * 86400))  # segundos
+        self.domain_threshold = int(os.getenv('NEGATIVE_CACHE_DOMAIN_THRESHOLD', 3))  # URLs distintas
+        # Entradas vencidas há mais que isso são esquecidas (a contagem de falhas recomeça)
+        self.retention = float(os.getenv('NEGATIVE_CACHE_RETENTION', self.max_interval))
+        self.prune_interval = float(os.getenv('NEGATIVE_CACHE_PRUNE_INTERVAL', 3600))
+        self.last_prune = 0.0
+        self.entries = {}  # chave -> entrada (memória)
+        self.domain_failures = {}  # domínio -> {chave da URL: retry_at} das falhas que contam para o domínio
+        self.lock = threading.Lock()
+        self.stats = {'skipped': 0, 'failures_recorded': 0, 'recoveries': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+        self._load_entries()
+
+    def _init_database(self):
+        """Inicializa tabela SQLite do cache negativo"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS negative_entries (
+                        key TEXT PRIMARY KEY,
+                        scope TEXT NOT NULL,
+                        reason TEXT NOT NULL,
+                        status_code INTEGER,
+                        failures INTEGER NOT NULL,
+                        last_failure REAL NOT NULL,
+                        retry_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_negative_entries_retry ON negative_entries(retry_at)")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cache negativo: {e}")
+
+    def _load_entries(self):
+        """Carrega para memória as entradas persistidas ainda dentro da retenção"""
+        try:
+            self.prune()
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT key, scope, reason, status_code, failures, last_failure, retry_at FROM negative_entries"
+                ).fetchall()
+            for key, scope, reason, status_code, failures, last_failure, retry_at in rows:
+                self.entries[key] = {
+                    'scope': scope,
+                    'reason': reason,
+                    'status_code': status_code,
+                    'failures': failures,
+                    'last_failure': last_failure,
+                    'retry_at': retry_at
+                }
+                self._track_domain_failure(key, self.entries[key])
+        except Exception as e:
+            logger.error(f"Erro ao carregar cache negativo: {e}")
+
+    def _track_domain_failure(self, key: str, entry: Optional[Dict[str, Any]]):
+        """Mantém o índice por domínio das URLs cujas falhas contam para bloquear o domínio (com lock)"""
+        if not key.startswith('url:'):
+            return
+        domain = self._domain(key[4:])
+        failures = self.domain_failures.get(domain)
+        if entry is not None and entry['reason'] in DOMAIN_REASONS:
+            self.domain_failures.setdefault(domain, {})[key] = entry['retry_at']
+        elif failures is not None:
+            failures.pop(key, None)
+            if not failures:
+                del self.domain_failures[domain]
+
+    def prune(self) -> int:
+        """Remove da memória e do SQLite as entradas vencidas há mais que a retenção"""
+        now = time.time()
+        cutoff = now - self.retention
+        with self.lock:
+            self.last_prune = now
+            expired = [key for key, entry in self.entries.items() if entry['retry_at'] < cutoff]
+            for key in expired:
+                self._track_domain_failure(key, None)
+                del self.entries[key]
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                removed = conn.execute("DELETE FROM negative_entries WHERE retry_at < ?", (cutoff,)).rowcount
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao limpar entradas vencidas do cache negativo: {e}")
+            return len(expired)
+
+        if removed:
+            logger.info(f"🧹 Cache negativo: {removed} entradas vencidas removidas")
+        return max(removed, len(expired))
+
+    def _persist(self, key: str, entry: Optional[Dict[str, Any]]):
+        """Grava ou remove entrada no SQLite"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                if entry is None:
+                    conn.execute("DELETE FROM negative_entries WHERE key = ?", (key,))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO negative_entries "
+                        "(key, scope, reason, status_code, failures, last_failure, retry_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, entry['scope'], entry['reason'], entry['status_code'],
+                         entry['failures'], entry['last_failure'], entry['retry_at'])
+                    )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao salvar cache negativo: {e}")
+
+    def _domain(self, url: str) -> str:
+        """Extrai domínio normalizado da URL"""
+        domain = urlparse(url).netloc.lower().split(':')[0]
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _domain_key(self, url: str) -> str:
+        return f"domain:{self._domain(url)}"
+
+    def _url_key(self, url: str) -> str:
+        return f"url:{url.split('#')[0]}"
+
+    def _interval(self, reason: str, status_code: Optional[int], failures: int) -> float:
+        """Intervalo até a próxima tentativa (exponencial no número de falhas)"""
+        base = STATUS_INTERVALS.get(status_code, BASE_INTERVALS.get(reason, 3600))
+        return min(self.max_interval, base * (2 ** (failures - 1)))
+
+    def check(self, url: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a entrada negativa se a URL (ou seu domínio) deve ser pulada agora.
+        Após retry_at a URL volta a ser permitida para uma nova sondagem.
+        count=False consulta sem contar como URL pulada.
+        """
+        if not self.enabled or not url:
+            return None
+
+        now = time.time()
+        with self.lock:
+            for key in (self._url_key(url), self._domain_key(url)):
+                entry = self.entries.get(key)
+                if entry and entry['retry_at'] > now:
+                    if count:
+                        self.stats['skipped'] += 1
+                    return {**entry, 'key': key}
+        return None
+
+    def should_skip(self, url: str) -> bool:
+        """Verifica se a URL é conhecidamente ruim"""
+        entry = self.check(url)
+        if entry:
+            logger.info(f"⛔ Pulando {url} (cache negativo: {entry['reason']}"
+                        f"{' ' + str(entry['status_code']) if entry['status_code'] else ''}, {entry['scope']})")
+            return True
+        return False
+
+    def filter_urls(self, urls: List[str]) -> List[str]:
+        """Remove URLs conhecidamente ruins mantendo a ordem"""
+        return [url for url in urls if not self.should_skip(url)]
+
+    def record_failure(self, url: str, reason: str, status_code: Optional[int] = None):
+        """Registra falha da URL e, se recorrente no domínio, bloqueia o domínio"""
+        if not self.enabled or not url:
+            return
+        if status_code in TRANSIENT_STATUS:
+            return
+
+        now = time.time()
+        url_key = self._url_key(url)
+
+        with self.lock:
+            entry = self.entries.get(url_key)
+            failures = entry['failures'] + 1 if entry else 1
+            entry = {
+                'scope': 'url',
+                'reason': reason,
+                'status_code': status_code,
+                'failures': failures,
+                'last_failure': now,
+                'retry_at': now + self._interval(reason, status_code, failures)
+            }
+            self.entries[url_key] = entry
+            self._track_domain_failure(url_key, entry)
+            self.stats['failures_recorded'] += 1
+
+            domain_entry = self._update_domain(url, reason, status_code, now)
+
+        self._persist(url_key, entry)
+        if domain_entry:
+            self._persist(self._domain_key(url), domain_entry)
+
+        logger.info(f"📝 Cache negativo: {url} ({reason}, falha {failures})")
+
+        if now - self.last_prune >= self.prune_interval:
+            self.prune()
+
+    def _update_domain(self, url: str, reason: str, status_code: Optional[int], now: float) -> Optional[Dict[str, Any]]:
+        """Bloqueia domínio quando várias URLs distintas falham pelo mesmo tipo de motivo (com lock)"""
+        if reason not in DOMAIN_REASONS or status_code in STATUS_INTERVALS:
+            return None
+
+        domain = self._domain(url)
+        failing_urls = sum(1 for retry_at in self.domain_failures.get(domain, {}).values() if retry_at > now)
+        if failing_urls < self.domain_threshold:
+            return None
+
+        domain_key = self._domain_key(url)
+        previous = self.entries.get(domain_key)
+        failures = previous['failures'] + 1 if previous else 1
+        entry = {
+            'scope': 'domain',
+            'reason': reason,
+            'status_code': status_code,
+            'failures': failures,
+            'last_failure': now,
+            'retry_at': now + self._interval(reason, status_code, failures)
+        }
+        self.entries[domain_key] = entry
+        logger.warning(f"⛔ Domínio {domain} no cache negativo ({failing_urls} URLs falhando, motivo {reason})")
+        return entry
+
+    def record_success(self, url: str):
+        """Remove URL e domínio do cache negativo após sucesso"""
+        if not self.enabled or not url:
+            return
+
+        removed = []
+        with self.lock:
+            for key in (self._url_key(url), self._domain_key(url)):
+                if self.entries.pop(key, None):
+                    self._track_domain_failure(key, None)
+                    removed.append(key)
+            if removed:
+                self.stats['recoveries'] += 1
+
+        for key in removed:
+            self._persist(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache negativo"""
+        now = time.time()
+        with self.lock:
+            active = [entry for entry in self.entries.values() if entry['retry_at'] > now]
+            reasons = {}
+            for entry in active:
+                reasons[entry['reason']] = reasons.get(entry['reason'], 0) + 1
+            return {
+                **self.stats,
+                'active_urls': sum(1 for entry in active if entry['scope'] == 'url'),
+                'active_domains': sum(1 for entry in active if entry['scope'] == 'domain'),
+                'reasons': reasons
+            }
+
+    def clear(self):
+        """Limpa todo o cache negativo"""
+        with self.lock:
+            self.entries.clear()
+            self.domain_failures.clear()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM negative_entries")
+                conn.commit()
+            logger.info("🧹 Cache negativo limpo")
+        except Exception as e:
+            logger.error(f"Erro ao limpar cache negativo: {e}")
+
+# Instância global
+negative_cache = NegativeCache()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - PDF Extraction Service
+Extração de texto de PDF em memória, com páginas processadas em paralelo
+"""
+
+import os
+import io
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Any, Iterator, Tuple, Union
+
+# Imports condicionais para não quebrar se não estiver instalado
+try:
+    import PyPDF2
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+try:
+    from multiprocessing import shared_memory
+    HAS_SHARED_MEMORY = True
+except ImportError:
+    HAS_SHARED_MEMORY = False
+
+logger = logging.getLogger(__name__)
+
+# PDF atual de cada processo do pool (copiado uma vez da memória compartilhada)
+_worker_pdf = {'name': None, 'data': None}
+
+def _shared_pdf_bytes(name: str, size: int) -> bytes:
+    """Bytes do PDF na memória compartilhada, lidos uma vez por processo e documento"""
+    if _worker_pdf['name'] != name:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            data = bytes(shm.buf[:size])
+        finally:
+            shm.close()
+        _worker_pdf.update(name=name, data=data)
+    return _worker_pdf['data']
+
+def _extract_page_range(source: Union[bytes, Tuple[str, int]], engine: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """
+    Extrai texto das páginas [start, end). No pool, source é (nome, tamanho)
+    de um bloco de memória compartilhada: só o nome cruza o IPC e cada
+    processo copia o PDF uma única vez, em vez de receber uma cópia por lote.
+    """
+    pages = []
+    buffer = io.BytesIO(source if isinstance(source, bytes) else _shared_pdf_bytes(*source))
+
+    if engine == 'pdfplumber':
+        with pdfplumber.open(buffer) as pdf:
+            for index in range(start, min(end, len(pdf.pages))):
+                page = pdf.pages[index]
+                try:
+                    pages.append((index, page.extract_text() or ''))
+                except Exception:
+                    pages.append((index, ''))
+                finally:
+                    page.flush_cache()
+    else:
+        reader = PyPDF2.PdfReader(buffer)
+        for index in range(start, min(end, len(reader.pages))):
+            try:
+                pages.append((index, reader.pages[index].extract_text() or ''))
+            except Exception:
+                pages.append((index, ''))
+
+    return pages
+
+class PDFExtractionService:
+    """Serviço compartilhado de extração de PDF em memória"""
+
+    def __init__(self):
+        """Inicializa serviço de extração de PDF"""
+        self.max_workers = int(os.getenv('PDF_EXTRACTION_WORKERS', min(4, os.cpu_count() or 1)))
+        self.max_pages = int(os.getenv('PDF_MAX_PAGES', 200))
+        self.max_chars = int(os.getenv('PDF_MAX_CHARS', 300000))
+        self.pages_per_task = int(os.getenv('PDF_PAGES_PER_TASK', 8))
+        # PDFs pequenos são extraídos no próprio processo (pool não compensa)
+        self.parallel_min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+        self.stats = {
+            'documents': 0,
+            'pages_extracted': 0,
+            'early_stops': 0,
+            'parallel_runs': 0,
+            'failures': 0,
+            'total_time': 0.0
+        }
+
+        logger.info(f"📄 PDF Extraction Service inicializado ({self.max_workers} workers)")
+
+    def available_engines(self) -> List[str]:
+        """Retorna motores de extração disponíveis em ordem de preferência"""
+        engines = []
+        if HAS_PDFPLUMBER:
+            engines.append('pdfplumber')
+        if HAS_PYPDF2:
+            engines.append('pypdf2')
+        return engines
+
+    def count_pages(self, pdf_bytes: bytes) -> int:
+        """Conta páginas do PDF sem extrair texto"""
+        try:
+            if HAS_PYPDF2:
+                return len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+            if HAS_PDFPLUMBER:
+                with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                    return len(pdf.pages)
+        except Exception as e:
+            logger.error(f"❌ Erro ao contar páginas do PDF: {str(e)}")
+        return 0
+
+    def iter_pages(
+        self,
+        pdf_bytes: bytes,
+        engine: str = 'pypdf2',
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Gera (número da página, texto) em ordem, assim que cada lote fica pronto.
+        Para após max_pages páginas ou quando max_chars caracteres foram coletados.
+        """
+        if engine not in self.available_engines():
+            logger.warning(f"⚠️ Motor de PDF indisponível: {engine}")
+            return
+
+        total_pages = self.count_pages(pdf_bytes)
+        page_limit = min(total_pages, max_pages or self.max_pages)
+        char_limit = max_chars or self.max_chars
+        if page_limit <= 0:
+            return
+
+        ranges = [
+            (start, min(start + self.pages_per_task, page_limit))
+            for start in range(0, page_limit, self.pages_per_task)
+        ]
+
+        executor = self._get_executor() if page_limit >= self.parallel_min_pages else None
+        if executor:
+            self.stats['parallel_runs'] += 1
+            batches = self._iter_parallel(executor, pdf_bytes, engine, ranges)
+        else:
+            batches = (_extract_page_range(pdf_bytes, engine, start, end) for start, end in ranges)
+
+        collected = 0
+        try:
+            for batch in batches:
+                for index, text in batch:
+                    self.stats['pages_extracted'] += 1
+                    collected += len(text)
+                    yield index + 1, text
+
+                    if collected >= char_limit:
+                        logger.info(f"⏹️ Extração de PDF interrompida após {index + 1} páginas ({collected} caracteres)")
+                        self.stats['early_stops'] += 1
+                        return
+        finally:
+            batches.close()
+
+    def extract_text(
+        self,
+        pdf_bytes: bytes,
+        engine: str = 'pypdf2',
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Optional[str]:
+        """Extrai texto do PDF com um motor específico"""
+        start_time = time.time()
+        self.stats['documents'] += 1
+
+        try:
+            parts = [
+                text for _, text in self.iter_pages(pdf_bytes, engine, max_pages, max_chars)
+                if text
+            ]
+            return '\n'.join(parts) if parts else None
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao extrair PDF com {engine}: {str(e)}")
+            self.stats['failures'] += 1
+            return None
+        finally:
+            self.stats['total_time'] += time.time() - start_time
+
+    def extract_best(
+        self,
+        pdf_bytes: bytes,
+        min_length: int = 100,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Optional[str]:
+        """Tenta os motores em ordem de preferência até obter texto suficiente"""
+        for engine in self.available_engines():
+            text = self.extract_text(pdf_bytes, engine, max_pages, max_chars)
+            if text and len(text.strip()) >= min_length:
+                return text
+        return None
+
+    def extract_file(self, file_path: str, **kwargs) -> Optional[str]:
+        """Extrai texto de um PDF em disco"""
+        with open(file_path, 'rb') as file:
+            return self.extract_best(file.read(), **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do serviço"""
+        return {**self.stats, 'engines': self.available_engines(), 'max_workers': self.max_workers}
+
+    def shutdown(self):
+        """Finaliza o pool de processos"""
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _iter_parallel(self, executor, pdf_bytes: bytes, engine: str, ranges: List[Tuple[int, int]]):
+        """
+        Processa lotes no pool mantendo no máximo 2x workers lotes em andamento.
+        O PDF é copiado uma vez para memória compartilhada e os lotes recebem
+        só o nome do bloco. Na parada antecipada os lotes não iniciados são
+        cancelados sem esperar os que estão rodando; o bloco é liberado quando
+        o último deles termina.
+        """
+        shm = None
+        if HAS_SHARED_MEMORY:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, len(pdf_bytes)))
+            shm.buf[:len(pdf_bytes)] = pdf_bytes
+            source = (shm.name, len(pdf_bytes))
+        else:
+            source = pdf_bytes
+
+        pending = deque()
+        remaining = iter(ranges)
+
+        try:
+            for start, end in remaining:
+                pending.append(executor.submit(_extract_page_range, source, engine, start, end))
+                if len(pending) >= self.max_workers * 2:
+                    break
+
+            while pending:
+                batch = pending.popleft().result()
+                next_range = next(remaining, None)
+                if next_range:
+                    pending.append(executor.submit(_extract_page_range, source, engine, *next_range))
+                yield batch
+
+        except BrokenProcessPool:
+            logger.warning("⚠️ Pool de processos de PDF quebrado - recriando na próxima extração")
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self._executor_lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            running = [future for future in pending if not future.cancel()]
+            pending.clear()
+            if shm is not None:
+                self._release_when_done(shm, running)
+
+    def _release_when_done(self, shm, futures: List[Any]):
+        """Libera a memória compartilhada quando os lotes em execução terminarem"""
+        def release():
+            try:
+                shm.close()
+                shm.unlink()
+            except (OSError, BufferError) as e:
+                logger.warning(f"⚠️ Não foi possível liberar memória compartilhada do PDF: {str(e)}")
+
+        if not futures:
+            release()
+            return
+
+        state = {'remaining': len(futures)}
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                state['remaining'] -= 1
+                last = state['remaining'] == 0
+            if last:
+                release()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Cria o pool de processos sob demanda"""
+        if self.max_workers <= 1:
+            return None
+
+        with self._executor_lock:
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                except (OSError, NotImplementedError) as e:
+                    logger.warning(f"⚠️ Pool de processos indisponível, extraindo PDF sequencialmente: {str(e)}")
+                    self.max_workers = 1
+                    return None
+            return self._executor
+
+# Instância global
+pdf_extraction_service = PDFExtractionService()
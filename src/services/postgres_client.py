@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - PostgreSQL Client
+Backend direto no PostgreSQL (mesmo esquema do Supabase) com pool de conexões,
+inserções em lote, cursores no servidor e statements preparados
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple, Callable, Set
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    from psycopg2 import sql
+    from psycopg2.pool import ThreadedConnectionPool
+    HAS_PSYCOPG2 = True
+except ImportError:
+    HAS_PSYCOPG2 = False
+
+from services.analysis_record import (
+    SECTION_COLUMNS, LIST_COLUMNS, ROW_COLUMNS, build_analysis_row, split_blobs, encode_blob, decode_blob,
+    assemble_analysis, project_analysis, build_file_row, stats_from_rows
+)
+
+logger = logging.getLogger(__name__)
+
+JSONB_COLUMNS = set(SECTION_COLUMNS) | {'pesquisa_web_data', 'comprehensive_analysis'}
+
+FILE_COLUMNS = ('id', 'analysis_id', 'file_type', 'file_name', 'file_path', 'file_size', 'content_preview', 'created_at')
+
+# Statements preparados por conexão
+PREPARED_STATEMENTS = {
+    'arqv_get_analysis': "SELECT * FROM analyses WHERE id = $1",
+    'arqv_get_blobs': "SELECT kind, encoding, data FROM analysis_blobs WHERE analysis_id = $1"
+}
+
+class PostgresClient:
+    """Cliente PostgreSQL com a mesma interface do SupabaseClient"""
+
+    def __init__(self):
+        """Inicializa pool de conexões"""
+        self.dsn = os.getenv('DATABASE_URL')
+        self.min_connections = int(os.getenv('DATABASE_POOL_MIN', 1))
+        self.max_connections = int(os.getenv('DATABASE_POOL_MAX', 10))
+        self.pool = None
+        self.prepared = set()  # (conexão, pid do backend) com statements preparados
+        self.lock = threading.Lock()
+        # getconn() falha com PoolError se o pool estiver esgotado; o semáforo faz esperar
+        self.pool_slots = threading.BoundedSemaphore(self.max_connections)
+
+        if not HAS_PSYCOPG2:
+            logger.warning("⚠️ psycopg2 não instalado - backend PostgreSQL indisponível")
+            return
+
+        if not self.dsn:
+            logger.warning("⚠️ DATABASE_URL não configurada")
+            return
+
+        try:
+            self.pool = ThreadedConnectionPool(self.min_connections, self.max_connections, self.dsn)
+            logger.info(f"✅ PostgreSQL client inicializado (pool {self.min_connections}-{self.max_connections})")
+        except Exception as e:
+            logger.error(f"❌ Erro ao conectar ao PostgreSQL: {str(e)}")
+            self.pool = None
+
+    @contextmanager
+    def _connection(self):
+        """Conexão do pool com commit ao final (rollback em erro); espera se o pool estiver esgotado"""
+        with self.pool_slots:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn)
+
+    def _cursor(self, conn, name: Optional[str] = None):
+        return conn.cursor(name=name, cursor_factory=psycopg2.extras.RealDictCursor)
+
+    def _prepare(self, conn):
+        """Prepara os statements na conexão (uma vez por sessão do backend)"""
+        key = (id(conn), conn.get_backend_pid())
+        if key in self.prepared:
+            return
+
+        with conn.cursor() as cursor:
+            for name, statement in PREPARED_STATEMENTS.items():
+                cursor.execute(f"PREPARE {name} (uuid) AS {statement}")
+        with self.lock:
+            self.prepared.add(key)
+
+    def _adapt(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Envolve colunas jsonb para o psycopg2"""
+        return {
+            key: psycopg2.extras.Json(value) if key in JSONB_COLUMNS and value is not None else value
+            for key, value in row.items()
+        }
+
+    def _record(self, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Registro no mesmo formato da API REST (datas ISO, UUIDs como texto)"""
+        if row is None:
+            return None
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in dict(row).items()
+        }
+
+    def is_connected(self) -> bool:
+        """Verifica se o pool foi criado"""
+        return self.pool is not None
+
+    def test_connection(self) -> bool:
+        """Testa conexão com o PostgreSQL"""
+        if not self.pool:
+            return False
+
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao testar conexão PostgreSQL: {str(e)}")
+            return False
+
+    def create_analysis(
+        self,
+        analysis_data: Dict[str, Any],
+        analysis_id: Optional[str] = None,
+        validate_key: bool = True,
+        max_retries: int = 3,
+        created_at: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cria (ou atualiza, se o ID já existir) a análise e seus blobs em uma
+        única transação; created_at só vale na inserção. validate_key existe
+        só por compatibilidade.
+        """
+        if not self.pool:
+            logger.warning("⚠️ PostgreSQL não conectado")
+            return None
+
+        row = self._adapt(build_analysis_row(analysis_data, analysis_id or str(uuid.uuid4()), created_at))
+        columns = list(row)
+        query = sql.SQL(
+            "INSERT INTO analyses ({columns}) VALUES ({values}) "
+            "ON CONFLICT (id) DO UPDATE SET {updates} RETURNING {returning}"
+        ).format(
+            columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+            values=sql.SQL(', ').join(sql.Placeholder(column) for column in columns),
+            updates=sql.SQL(', ').join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                for column in columns if column not in ('id', 'created_at')
+            ),
+            returning=sql.SQL(', ').join(map(sql.Identifier, LIST_COLUMNS))
+        )
+
+        for attempt in range(max_retries):
+            try:
+                with self._connection() as conn:
+                    with self._cursor(conn) as cursor:
+                        cursor.execute(query, row)
+                        record = self._record(cursor.fetchone())
+                    self._save_blobs(conn, record['id'], split_blobs(analysis_data))
+
+                logger.info(f"✅ Análise criada no PostgreSQL com ID: {record['id']}")
+                return record
+
+            except psycopg2.OperationalError as e:
+                if attempt < max_retries - 1:
+                    wait_time = (2 ** attempt) + 1
+                    logger.warning(f"⚠️ Tentativa {attempt + 1} falhou, tentando novamente em {wait_time}s: {str(e)}")
+                    time.sleep(wait_time)
+                else:
+                    logger.error(f"❌ Erro ao criar análise no PostgreSQL: {str(e)}")
+            except Exception as e:
+                logger.error(f"❌ Erro ao criar análise no PostgreSQL: {str(e)}")
+                break
+
+        return None
+
+    def upsert_analyses(
+        self,
+        analyses: List[Tuple[str, Dict[str, Any], Optional[str], List[Dict[str, Any]]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Upsert em lote de análises (id, dados, created_at, arquivos) em uma
+        transação: um INSERT para as linhas de analyses (um por conjunto de
+        colunas), um para os blobs e um para os arquivos. Retorna ID -> registro
+        e levanta exceção em falha (o chamador pode reenviar uma a uma).
+        """
+        if not self.pool or not analyses:
+            return {}
+
+        # Linhas sem campos None: cada conjunto de colunas vira um INSERT
+        groups = {}
+        for analysis_id, analysis_data, created_at, _ in analyses:
+            row = self._adapt(build_analysis_row(analysis_data, analysis_id, created_at))
+            groups.setdefault(tuple(row), []).append(row)
+
+        records = {}
+        with self._connection() as conn:
+            with self._cursor(conn) as cursor:
+                for columns, rows in groups.items():
+                    query = sql.SQL(
+                        "INSERT INTO analyses ({columns}) VALUES %s "
+                        "ON CONFLICT (id) DO UPDATE SET {updates} RETURNING {returning}"
+                    ).format(
+                        columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+                        updates=sql.SQL(', ').join(
+                            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                            for column in columns if column not in ('id', 'created_at')
+                        ),
+                        returning=sql.SQL(', ').join(map(sql.Identifier, LIST_COLUMNS))
+                    ).as_string(conn)
+                    saved = psycopg2.extras.execute_values(
+                        cursor, query, [tuple(row[column] for column in columns) for row in rows], fetch=True
+                    )
+                    records.update({str(record['id']): self._record(record) for record in saved})
+
+            blob_rows = [
+                (analysis_id, kind, encoded['encoding'], encoded['data'], encoded['raw_size'])
+                for analysis_id, analysis_data, _, _ in analyses
+                for kind, encoded in (
+                    (kind, encode_blob(data)) for kind, data in split_blobs(analysis_data).items() if data is not None
+                )
+            ]
+            file_rows = [
+                tuple(row[column] for column in FILE_COLUMNS)
+                for analysis_id, _, _, files in analyses
+                for row in (build_file_row(analysis_id, file_data) for file_data in files)
+            ]
+            with conn.cursor() as cursor:
+                if blob_rows:
+                    psycopg2.extras.execute_values(
+                        cursor,
+                        "INSERT INTO analysis_blobs (analysis_id, kind, encoding, data, raw_size) VALUES %s "
+                        "ON CONFLICT (analysis_id, kind) DO UPDATE SET encoding = EXCLUDED.encoding, "
+                        "data = EXCLUDED.data, raw_size = EXCLUDED.raw_size",
+                        blob_rows
+                    )
+                if file_rows:
+                    psycopg2.extras.execute_values(
+                        cursor,
+                        f"INSERT INTO analysis_files ({', '.join(FILE_COLUMNS)}) VALUES %s "
+                        "ON CONFLICT (id) DO UPDATE SET file_name = EXCLUDED.file_name, "
+                        "file_path = EXCLUDED.file_path, file_size = EXCLUDED.file_size, "
+                        "content_preview = EXCLUDED.content_preview",
+                        file_rows
+                    )
+
+        logger.info(f"✅ {len(records)} análises gravadas no PostgreSQL em lote ({len(file_rows)} arquivos)")
+        return records
+
+    def get_analysis(
+        self,
+        analysis_id: str,
+        include_blobs: bool = True,
+        columns: Optional[Iterable[str]] = None,
+        blob_kinds: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca análise por ID. Sem projeção usa statements preparados; com
+        columns/blob_kinds só as colunas e blobs pedidos saem do banco.
+        """
+        if not self.pool:
+            return None
+
+        try:
+            with self._connection() as conn:
+                if columns is not None:
+                    return self._get_projection(conn, analysis_id, columns, blob_kinds)
+
+                self._prepare(conn)
+                with self._cursor(conn) as cursor:
+                    cursor.execute("EXECUTE arqv_get_analysis (%s)", (analysis_id,))
+                    record = self._record(cursor.fetchone())
+                    if record is None:
+                        return None
+
+                    if include_blobs:
+                        cursor.execute("EXECUTE arqv_get_blobs (%s)", (analysis_id,))
+                        blobs = {row['kind']: decode_blob(row['encoding'], row['data']) for row in cursor.fetchall()}
+                        record = assemble_analysis(record, blobs)
+                    else:
+                        record = {column: record.get(column) for column in LIST_COLUMNS}
+
+            return record
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar análise {analysis_id}: {str(e)}")
+            return None
+
+    def _get_projection(self, conn, analysis_id: str, columns: Iterable[str], blob_kinds: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Colunas e blobs pedidos de uma análise"""
+        blob_kinds = list(blob_kinds)
+        with self._cursor(conn) as cursor:
+            cursor.execute(
+                sql.SQL("SELECT {columns} FROM analyses WHERE id = %s").format(
+                    columns=sql.SQL(', ').join(map(sql.Identifier, columns))
+                ),
+                (analysis_id,)
+            )
+            record = self._record(cursor.fetchone())
+            if record is None or not blob_kinds:
+                return record
+
+            cursor.execute(
+                "SELECT kind, encoding, data FROM analysis_blobs WHERE analysis_id = %s AND kind = ANY(%s)",
+                (analysis_id, blob_kinds)
+            )
+            blobs = {row['kind']: decode_blob(row['encoding'], row['data']) for row in cursor.fetchall()}
+
+        return project_analysis(record, blobs, blob_kinds)
+
+    def list_analyses(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[Tuple[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lista análises (mais recentes primeiro). Com cursor = (created_at, id)
+        da última linha da página anterior, pagina por keyset em vez de offset.
+        """
+        if not self.pool:
+            return []
+
+        filters = filters or {}
+        conditions, params = [], []
+        for column, operator, name in (
+            ('segmento', '=', 'segmento'),
+            ('status', '=', 'status'),
+            ('created_at', '>=', 'created_from'),
+            ('created_at', '<', 'created_to')
+        ):
+            if filters.get(name):
+                conditions.append(sql.SQL("{} " + operator + " %s").format(sql.Identifier(column)))
+                params.append(filters[name])
+        if cursor:
+            conditions.append(sql.SQL("(created_at, id) < (%s, %s)"))
+            params += list(cursor)
+
+        query = sql.SQL("SELECT {columns} FROM analyses").format(
+            columns=sql.SQL(', ').join(map(sql.Identifier, LIST_COLUMNS))
+        )
+        if conditions:
+            query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+        query += sql.SQL(" ORDER BY created_at DESC, id DESC LIMIT %s")
+        params.append(limit)
+        if not cursor:
+            query += sql.SQL(" OFFSET %s")
+            params.append(offset)
+
+        try:
+            with self._connection() as conn, self._cursor(conn) as db_cursor:
+                db_cursor.execute(query, params)
+                return [self._record(row) for row in db_cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar análises: {str(e)}")
+            return []
+
+    def iter_analyses(self, columns: Iterable[str] = LIST_COLUMNS, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre todas as análises com cursor no servidor (relatórios e backfills),
+        buscando batch_size linhas por ida ao banco
+        """
+        if not self.pool:
+            return
+
+        with self._connection() as conn:
+            with self._cursor(conn, name=f"arqv_iter_{uuid.uuid4().hex[:8]}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(
+                    sql.SQL("SELECT {columns} FROM analyses ORDER BY created_at DESC").format(
+                        columns=sql.SQL(', ').join(map(sql.Identifier, columns))
+                    )
+                )
+                for row in cursor:
+                    yield self._record(row)
+
+    def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        """Atualiza análise existente"""
+        if not self.pool:
+            return False
+
+        try:
+            update_data = self._adapt({**update_data, 'updated_at': datetime.now().isoformat()})
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("UPDATE analyses SET {updates} WHERE id = %(analysis_id)s").format(
+                        updates=sql.SQL(', ').join(
+                            sql.SQL("{} = {}").format(sql.Identifier(column), sql.Placeholder(column))
+                            for column in update_data
+                        )
+                    ),
+                    {**update_data, 'analysis_id': analysis_id}
+                )
+                updated = cursor.rowcount > 0
+
+            if updated:
+                logger.info(f"✅ Análise {analysis_id} atualizada no PostgreSQL")
+            return updated
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar análise {analysis_id}: {str(e)}")
+            return False
+
+    def delete_analysis(self, analysis_id: str) -> bool:
+        """Remove análise (arquivos e blobs em cascata)"""
+        if not self.pool:
+            return False
+
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM analyses WHERE id = %s", (analysis_id,))
+                deleted = cursor.rowcount > 0
+
+            if deleted:
+                logger.info(f"✅ Análise {analysis_id} removida do PostgreSQL")
+            return deleted
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao remover análise {analysis_id}: {str(e)}")
+            return False
+
+    def save_analysis_file(self, analysis_id: str, file_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Salva informações de arquivo de análise"""
+        try:
+            rows = self.save_analysis_files(analysis_id, [file_data])
+            return rows[0] if rows else None
+        except Exception:
+            return None
+
+    def save_analysis_files(self, analysis_id: str, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Salva os registros de arquivos de uma análise com um único INSERT (execute_values)"""
+        if not self.pool or not files:
+            return []
+
+        rows = [build_file_row(analysis_id, file_data) for file_data in files]
+        try:
+            with self._connection() as conn, self._cursor(conn) as cursor:
+                saved = psycopg2.extras.execute_values(
+                    cursor,
+                    f"INSERT INTO analysis_files ({', '.join(FILE_COLUMNS)}) VALUES %s "
+                    "ON CONFLICT (id) DO UPDATE SET file_name = EXCLUDED.file_name, "
+                    "file_path = EXCLUDED.file_path, file_size = EXCLUDED.file_size, "
+                    "content_preview = EXCLUDED.content_preview RETURNING *",
+                    [tuple(row[column] for column in FILE_COLUMNS) for row in rows],
+                    fetch=True
+                )
+
+            logger.info(f"✅ {len(rows)} arquivos da análise {analysis_id} salvos")
+            return [self._record(row) for row in saved]
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar arquivos da análise {analysis_id}: {str(e)}")
+            raise
+
+    def get_analysis_files(self, analysis_id: str) -> List[Dict[str, Any]]:
+        """Busca arquivos de uma análise"""
+        if not self.pool:
+            return []
+
+        try:
+            with self._connection() as conn, self._cursor(conn) as cursor:
+                cursor.execute(
+                    "SELECT * FROM analysis_files WHERE analysis_id = %s ORDER BY created_at DESC",
+                    (analysis_id,)
+                )
+                return [self._record(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar arquivos da análise {analysis_id}: {str(e)}")
+            return []
+
+    def _save_blobs(self, conn, analysis_id: str, blobs: Dict[str, Any]):
+        """Grava blobs comprimidos na transação corrente"""
+        rows = [
+            (analysis_id, kind, encoded['encoding'], encoded['data'], encoded['raw_size'])
+            for kind, encoded in ((kind, encode_blob(data)) for kind, data in blobs.items() if data is not None)
+        ]
+        if not rows:
+            return
+
+        with conn.cursor() as cursor:
+            psycopg2.extras.execute_values(
+                cursor,
+                "INSERT INTO analysis_blobs (analysis_id, kind, encoding, data, raw_size) VALUES %s "
+                "ON CONFLICT (analysis_id, kind) DO UPDATE SET encoding = EXCLUDED.encoding, "
+                "data = EXCLUDED.data, raw_size = EXCLUDED.raw_size",
+                rows
+            )
+
+    def save_analysis_blobs(self, analysis_id: str, blobs: Dict[str, Any]):
+        """Grava blobs comprimidos da análise"""
+        with self._connection() as conn:
+            self._save_blobs(conn, analysis_id, blobs)
+
+    def get_analysis_blobs(self, analysis_id: str) -> Dict[str, Any]:
+        """Blobs descomprimidos da análise (tipo -> dados)"""
+        try:
+            with self._connection() as conn:
+                self._prepare(conn)
+                with self._cursor(conn) as cursor:
+                    cursor.execute("EXECUTE arqv_get_blobs (%s)", (analysis_id,))
+                    return {row['kind']: decode_blob(row['encoding'], row['data']) for row in cursor.fetchall()}
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar blobs da análise {analysis_id}: {str(e)}")
+            return {}
+
+    def _copy_value(self, column: str, value: Any) -> str:
+        """Valor no formato texto do COPY"""
+        if value is None:
+            return '\\N'
+        if column in JSONB_COLUMNS:
+            value = json.dumps(value, ensure_ascii=False)
+        return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+    def bulk_load_analyses(
+        self,
+        analyses: Iterable[Tuple[str, Dict[str, Any], Optional[str], List[Dict[str, Any]]]],
+        batch_size: int = 500,
+        on_inserted: Optional[Callable[[List[str]], None]] = None
+    ) -> int:
+        """
+        Carga em lote (backfill) de análises (id, dados, created_at original,
+        registros de arquivos) via COPY para tabela temporária; IDs já
+        existentes são ignorados. on_inserted recebe os IDs inseridos de cada
+        lote, já com blobs e arquivos gravados. Retorna quantas foram inseridas.
+        """
+        if not self.pool:
+            return 0
+
+        inserted = 0
+        batch = []
+        for item in analyses:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                inserted += self._load_batch(batch, on_inserted)
+                batch = []
+        if batch:
+            inserted += self._load_batch(batch, on_inserted)
+
+        logger.info(f"📥 Backfill PostgreSQL: {inserted} análises inseridas")
+        return inserted
+
+    def _load_batch(self, batch, on_inserted) -> int:
+        inserted_ids = self._copy_batch(batch)
+        if on_inserted and inserted_ids:
+            on_inserted(sorted(inserted_ids))
+        return len(inserted_ids)
+
+    def _copy_batch(self, batch: List[Tuple[str, Dict[str, Any], Optional[str], List[Dict[str, Any]]]]) -> Set[str]:
+        """COPY de um lote de análises, seus blobs e arquivos em uma transação; retorna os IDs inseridos"""
+        buffer = io.StringIO()
+        for analysis_id, analysis_data, created_at, _ in batch:
+            row = build_analysis_row(analysis_data, analysis_id, created_at)
+            buffer.write('\t'.join(self._copy_value(column, row.get(column)) for column in ROW_COLUMNS) + '\n')
+        buffer.seek(0)
+
+        columns = ', '.join(ROW_COLUMNS)
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE arqv_analyses_load (LIKE analyses INCLUDING DEFAULTS) ON COMMIT DROP")
+            cursor.copy_expert(f"COPY arqv_analyses_load ({columns}) FROM STDIN", buffer)
+            cursor.execute(
+                f"INSERT INTO analyses ({columns}) SELECT {columns} FROM arqv_analyses_load "
+                "ON CONFLICT (id) DO NOTHING RETURNING id"
+            )
+            inserted_ids = {row[0] for row in cursor.fetchall()}
+
+            blob_rows = [
+                (analysis_id, kind, encoded['encoding'], encoded['data'], encoded['raw_size'])
+                for analysis_id, analysis_data, _, _ in batch if analysis_id in inserted_ids
+                for kind, encoded in (
+                    (kind, encode_blob(data)) for kind, data in split_blobs(analysis_data).items() if data is not None
+                )
+            ]
+            if blob_rows:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    "INSERT INTO analysis_blobs (analysis_id, kind, encoding, data, raw_size) VALUES %s "
+                    "ON CONFLICT (analysis_id, kind) DO NOTHING",
+                    blob_rows
+                )
+
+            file_rows = [
+                tuple(row[column] for column in FILE_COLUMNS)
+                for analysis_id, _, _, files in batch if analysis_id in inserted_ids
+                for row in (build_file_row(analysis_id, file_data) for file_data in files)
+            ]
+            if file_rows:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    f"INSERT INTO analysis_files ({', '.join(FILE_COLUMNS)}) VALUES %s "
+                    "ON CONFLICT (id) DO NOTHING",
+                    file_rows
+                )
+
+        return inserted_ids
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do banco em uma única consulta agregada"""
+        if not self.pool:
+            return {
+                'total_analyses': 0,
+                'status_counts': {},
+                'recent_analyses': 0,
+                'error': 'PostgreSQL não conectado'
+            }
+
+        try:
+            week_ago = datetime.now() - timedelta(days=7)
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT status, COUNT(*), COUNT(*) FILTER (WHERE created_at >= %s) "
+                    "FROM analyses GROUP BY status",
+                    (week_ago,)
+                )
+                return stats_from_rows(cursor.fetchall())
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter estatísticas: {str(e)}")
+            return {
+                'total_analyses': 0,
+                'status_counts': {},
+                'recent_analyses': 0,
+                'error': str(e)
+            }
+
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            self.prepared.clear()
+
+# Instância global
+postgres_client = PostgresClient()
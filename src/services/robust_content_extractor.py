@@ -12,8 +12,16 @@ import requests
 import json
 from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import urljoin, urlparse
+from datetime import datetime
 import re
-import tempfile
+import copy
+import codecs
+import random
+import sqlite3
+import socket
+import atexit
+import threading
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Imports condicionais para não quebrar se não estiver instalado
@@ -37,27 +45,346 @@ except ImportError:
     HAS_NEWSPAPER = False
 
 try:
-    from bs4 import BeautifulSoup
-    HAS_BEAUTIFULSOUP = True
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAS_LXML = True
 except ImportError:
-    HAS_BEAUTIFULSOUP = False
-
-try:
-    import PyPDF2
-    HAS_PYPDF2 = True
-except ImportError:
-    HAS_PYPDF2 = False
-
-try:
-    import pdfplumber
-    HAS_PDFPLUMBER = True
-except ImportError:
-    HAS_PDFPLUMBER = False
+    HAS_LXML = False
 
 from services.url_resolver import url_resolver
+from services.pdf_extraction_service import pdf_extraction_service, HAS_PYPDF2, HAS_PDFPLUMBER
+from services.host_scheduler import host_scheduler
+from services.negative_cache import (
+    negative_cache, REASON_HTTP_STATUS, REASON_TIMEOUT, REASON_NO_CONTENT,
+    REASON_UNSUPPORTED, REASON_CONNECTION
+)
 
 logger = logging.getLogger(__name__)
 
+# Seletores usados pelas estratégias de DOM (compilados uma única vez para XPath)
+DYNAMIC_CONTENT_SELECTORS = [
+    '[data-content]', '[data-text]', '.content-loaded',
+    '.server-rendered', '.static-content', '.preloaded',
+    'main', 'article', '.post-content', '.article-content',
+    '.entry-content', '.page-content', '.text-content'
+]
+
+CONTENT_SELECTORS = [
+    '.content', '#content', '.post', '.article',
+    '.entry', '.text', '.body', '.main-content',
+    '.post-content', '.article-content', '.entry-content',
+    '.page-content', '.text-content', '.story-content'
+]
+
+def _selector_to_xpath(selector: str) -> str:
+    """Converte seletor CSS simples (tag, .classe, #id, [atributo]) para XPath"""
+    if selector.startswith('.'):
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    if selector.startswith('#'):
+        return f"//*[@id='{selector[1:]}']"
+    if selector.startswith('[') and selector.endswith(']'):
+        return f"//*[@{selector[1:-1]}]"
+    return f"//{selector}"
+
+def _compile_selectors(selectors: List[str]) -> List[Tuple[str, Any]]:
+    """Pré-compila lista de seletores em objetos XPath reutilizáveis"""
+    if not HAS_LXML:
+        return []
+    return [(selector, etree.XPath(_selector_to_xpath(selector))) for selector in selectors]
+
+COMPILED_DYNAMIC_SELECTORS = _compile_selectors(DYNAMIC_CONTENT_SELECTORS)
+COMPILED_CONTENT_SELECTORS = _compile_selectors(CONTENT_SELECTORS)
+
+if HAS_LXML:
+    XPATH_SEMANTIC = etree.XPath('//article | //main | //section')
+    XPATH_BLOCKS = etree.XPath('//div | //section | //article')
+    XPATH_BODY = etree.XPath('//body')
+    XPATH_LINKS = etree.XPath('//a[@href]')
+
+# Links coletados por página para navegação (crawler)
+MAX_PAGE_LINKS = 200
+SKIPPED_LINK_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.rar', '.mp4', '.mp3', '.exe')
+
+# Tipos de conteúdo aceitos no download em streaming
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml')
+PDF_CONTENT_TYPES = ('application/pdf', 'application/x-pdf')
+SNIFF_BYTES = 2048
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+
+# Nomes antigos de extratores mantidos nas estatísticas públicas (alias -> nome atual)
+EXTRACTOR_STATS_ALIASES = {'beautifulsoup': 'dom'}
+
+class FetchAbortedError(Exception):
+    """Download interrompido por tipo de conteúdo, tamanho ou prazo"""
+    
+    def __init__(self, message: str, reason: str = REASON_UNSUPPORTED):
+        super().__init__(message)
+        self.reason = reason
+
+class DomainExtractorRouter:
+    """
+    Tabela persistente de roteamento de extratores por domínio. Em memória fica
+    um LRU dos domínios recentes; os resultados são gravados no SQLite em lotes
+    (a cada N registros ou T segundos), fora do lock do roteador.
+    """
+    
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "extractor_routes.db")
+        self.enabled = os.getenv('EXTRACTOR_ROUTING_ENABLED', 'true').lower() == 'true'
+        self.half_life = float(os.getenv('EXTRACTOR_ROUTING_HALF_LIFE', 7 * 86400))  # segundos
+        self.min_exploration = float(os.getenv('EXTRACTOR_ROUTING_MIN_EXPLORATION', 0.05))
+        self.max_domains = int(os.getenv('EXTRACTOR_ROUTING_MAX_DOMAINS', 2000))
+        self.flush_every = int(os.getenv('EXTRACTOR_ROUTING_FLUSH_EVERY', 50))
+        self.flush_interval = float(os.getenv('EXTRACTOR_ROUTING_FLUSH_INTERVAL', 30))
+        self.routes = OrderedDict()  # domínio -> {extrator: {...}}, LRU
+        self.dirty = {}  # domínio -> {extrator: {...}} ainda não gravados
+        self.flushing = {}  # lote sendo gravado pelo flush()
+        self.dirty_count = 0
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.random = random.Random()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+        atexit.register(self.flush)
+    
+    def _init_database(self):
+        """Inicializa tabela SQLite de rotas"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS extractor_routes (
+                        domain TEXT NOT NULL,
+                        extractor TEXT NOT NULL,
+                        successes REAL NOT NULL,
+                        failures REAL NOT NULL,
+                        avg_latency REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (domain, extractor)
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar rotas de extratores: {e}")
+    
+    def _load_domain(self, domain: str) -> Dict[str, Dict[str, float]]:
+        """Carrega rotas de um domínio (memória primeiro, depois SQLite)"""
+        if domain in self.routes:
+            self.routes.move_to_end(domain)
+            return self.routes[domain]
+        
+        entries = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT extractor, successes, failures, avg_latency, updated_at FROM extractor_routes WHERE domain = ?",
+                    (domain,)
+                ).fetchall()
+            for extractor, successes, failures, avg_latency, updated_at in rows:
+                entries[extractor] = {
+                    'successes': successes,
+                    'failures': failures,
+                    'avg_latency': avg_latency,
+                    'updated_at': updated_at
+                }
+        except Exception as e:
+            logger.error(f"Erro ao carregar rotas de {domain}: {e}")
+        
+        # Registros ainda não gravados de um domínio que saiu do LRU
+        for pending in (self.flushing, self.dirty):
+            for extractor, entry in pending.get(domain, {}).items():
+                entries[extractor] = dict(entry)
+        
+        self.routes[domain] = entries
+        while len(self.routes) > self.max_domains:
+            self.routes.popitem(last=False)
+        return entries
+    
+    def _decay(self, entry: Dict[str, float], now: float) -> float:
+        """Fator de decaimento exponencial pela idade da observação"""
+        elapsed = max(0.0, now - entry['updated_at'])
+        return 0.5 ** (elapsed / self.half_life) if self.half_life > 0 else 1.0
+    
+    def order_extractors(self, domain: str, default_order: List[str]) -> List[str]:
+        """Ordena extratores colocando primeiro o que funcionou no domínio"""
+        if not self.enabled or not domain:
+            return list(default_order)
+        
+        with self.lock:
+            entries = self._load_domain(domain)
+            now = time.time()
+            
+            scored = []
+            observations = 0.0
+            for extractor in default_order:
+                entry = entries.get(extractor)
+                if not entry:
+                    continue
+                decay = self._decay(entry, now)
+                successes = entry['successes'] * decay
+                failures = entry['failures'] * decay
+                observations += successes + failures
+                if successes > 0:
+                    # Suavização de Laplace: poucas observações pesam menos
+                    success_rate = (successes + 1) / (successes + failures + 2)
+                    scored.append((success_rate, -entry['avg_latency'], extractor))
+            
+            # Exploração decai com o número de observações recentes
+            exploration = max(self.min_exploration, 1.0 / (1.0 + observations))
+            if not scored or self.random.random() < exploration:
+                return list(default_order)
+            
+            scored.sort(reverse=True)
+            preferred = [extractor for _, _, extractor in scored]
+            return preferred + [e for e in default_order if e not in preferred]
+    
+    def domain_success_rate(self, domain: str) -> Optional[float]:
+        """Taxa de sucesso (suavizada) do melhor extrator no domínio; None sem histórico"""
+        if not self.enabled or not domain:
+            return None
+        
+        with self.lock:
+            entries = self._load_domain(domain)
+            now = time.time()
+            
+            best_rate = None
+            for entry in entries.values():
+                decay = self._decay(entry, now)
+                successes = entry['successes'] * decay
+                failures = entry['failures'] * decay
+                rate = (successes + 1) / (successes + failures + 2)
+                best_rate = rate if best_rate is None else max(best_rate, rate)
+            return best_rate
+    
+    def record(self, domain: str, extractor: str, success: bool, latency: float):
+        """Registra resultado de um extrator para o domínio"""
+        if not self.enabled or not domain:
+            return
+        
+        with self.lock:
+            entries = self._load_domain(domain)
+            now = time.time()
+            entry = entries.get(extractor)
+            
+            if entry:
+                decay = self._decay(entry, now)
+                entry['successes'] *= decay
+                entry['failures'] *= decay
+            else:
+                entry = {'successes': 0.0, 'failures': 0.0, 'avg_latency': 0.0, 'updated_at': now}
+                entries[extractor] = entry
+            
+            if success:
+                # Média móvel exponencial da latência dos sucessos
+                entry['avg_latency'] = latency if entry['successes'] == 0 else (
+                    0.7 * entry['avg_latency'] + 0.3 * latency
+                )
+                entry['successes'] += 1
+            else:
+                entry['failures'] += 1
+            entry['updated_at'] = now
+            
+            self.dirty.setdefault(domain, {})[extractor] = dict(entry)
+            self.dirty_count += 1
+            flush_due = (self.dirty_count >= self.flush_every or
+                         now - self.last_flush >= self.flush_interval)
+        
+        if flush_due:
+            self.flush()
+    
+    def flush(self):
+        """Grava no SQLite os resultados pendentes"""
+        with self.flush_lock:
+            with self.lock:
+                pending = self.flushing = self.dirty
+                self.dirty = {}
+                self.dirty_count = 0
+                self.last_flush = time.time()
+            
+            if not pending:
+                return
+            
+            rows = [
+                (domain, extractor, entry['successes'], entry['failures'],
+                 entry['avg_latency'], entry['updated_at'])
+                for domain, entries in pending.items()
+                for extractor, entry in entries.items()
+            ]
+            try:
+                with sqlite3.connect(self.db_path, timeout=10) as conn:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO extractor_routes
+                        (domain, extractor, successes, failures, avg_latency, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Erro ao salvar {len(rows)} rotas de extratores: {e}")
+                # Devolve à fila o que não foi substituído por registro mais novo
+                with self.lock:
+                    for domain, entries in pending.items():
+                        domain_dirty = self.dirty.setdefault(domain, {})
+                        for extractor, entry in entries.items():
+                            if extractor not in domain_dirty:
+                                domain_dirty[extractor] = entry
+                                self.dirty_count += 1
+            finally:
+                with self.lock:
+                    self.flushing = {}
+    
+    def get_domain_stats(self, limit: int = 50) -> Dict[str, Any]:
+        """Retorna estatísticas por domínio (mais recentes primeiro)"""
+        self.flush()
+        domains = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute("""
+                    SELECT domain, extractor, successes, failures, avg_latency, updated_at
+                    FROM extractor_routes
+                    WHERE domain IN (
+                        SELECT domain FROM extractor_routes
+                        GROUP BY domain ORDER BY MAX(updated_at) DESC LIMIT ?
+                    )
+                """, (limit,)).fetchall()
+            
+            for domain, extractor, successes, failures, avg_latency, updated_at in rows:
+                total = successes + failures
+                domain_entry = domains.setdefault(domain, {'preferred': None, 'extractors': {}})
+                domain_entry['extractors'][extractor] = {
+                    'successes': round(successes, 2),
+                    'failures': round(failures, 2),
+                    'success_rate': round((successes / total) * 100, 1) if total else 0.0,
+                    'avg_latency': round(avg_latency, 3),
+                    'updated_at': datetime.fromtimestamp(updated_at).isoformat()
+                }
+            
+            for domain_entry in domains.values():
+                best = max(
+                    domain_entry['extractors'].items(),
+                    key=lambda item: (item[1]['success_rate'], -item[1]['avg_latency'])
+                )
+                domain_entry['preferred'] = best[0] if best[1]['successes'] > 0 else None
+                
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas de rotas: {e}")
+        
+        return domains
+    
+    def reset(self, domain: Optional[str] = None):
+        """Remove rotas de um domínio ou de todos"""
+        with self.lock:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    if domain:
+                        conn.execute("DELETE FROM extractor_routes WHERE domain = ?", (domain,))
+                        self.routes.pop(domain, None)
+                    else:
+                        conn.execute("DELETE FROM extractor_routes")
+                        self.routes = {}
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Erro ao limpar rotas de extratores: {e}")
+
 class RobustContentExtractor:
     """Extrator de conteúdo multicamadas e robusto com suporte aprimorado a PDF"""
     
@@ -73,6 +400,10 @@ class RobustContentExtractor:
         })
         
         self.timeout = 30
+        self.connect_timeout = 10
+        self.max_download_bytes = int(os.getenv('EXTRACTOR_MAX_DOWNLOAD_BYTES', 5 * 1024 * 1024))
+        self.max_pdf_bytes = int(os.getenv('EXTRACTOR_MAX_PDF_BYTES', 20 * 1024 * 1024))
+        self.fetch_deadline = float(os.getenv('EXTRACTOR_FETCH_DEADLINE', 45))  # segundos por URL
         self.min_content_length = 200  # Reduzido de 500 para 200
         self.max_content_length = 50000  # 50K chars max
         
@@ -81,7 +412,7 @@ class RobustContentExtractor:
             'trafilatura': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_TRAFILATURA},
             'readability': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_READABILITY},
             'newspaper': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_NEWSPAPER},
-            'beautifulsoup': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_BEAUTIFULSOUP},
+            'dom': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_LXML},
             'pdf_pypdf2': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_PYPDF2},
             'pdf_pdfplumber': {'success': 0, 'failed': 0, 'total_time': 0, 'usage_count': 0, 'available': HAS_PDFPLUMBER},
             'global': {
@@ -92,13 +423,23 @@ class RobustContentExtractor:
             }
         }
         
+        # Roteamento adaptativo por domínio
+        self.router = DomainExtractorRouter()
+        
         logger.info("🔧 Robust Content Extractor inicializado")
         logger.info(f"📚 Extratores disponíveis: {self._get_available_extractors()}")
     
-    def extract_content(self, url: str) -> Optional[str]:
+    def extract_content(self, url: str, resolve_url: bool = True,
+                        document_info: Optional[Dict[str, Any]] = None,
+                        deadline: Optional[float] = None) -> Optional[str]:
         """
         Extrai conteúdo usando múltiplos extratores em ordem de prioridade
         Agora com suporte aprimorado a PDF e melhor fallback
+        
+        resolve_url=False quando o chamador já resolveu redirecionamentos.
+        document_info, se informado, recebe 'url', 'kind', 'bytes' (recebidos
+        pela rede) e 'links' (url absoluta, texto âncora) do documento baixado,
+        sem novo download. deadline (time.time()) encurta o prazo do download.
         """
         if not url or not url.startswith('http'):
             logger.error(f"❌ URL inválida: {url}")
@@ -110,8 +451,8 @@ class RobustContentExtractor:
             
             logger.info(f"🔍 Iniciando extração de: {url}")
             
-            # 1. Resolve URL de redirecionamento
-            resolved_url = url_resolver.resolve_redirect_url(url)
+            # 1. Resolve URL de redirecionamento (com cache)
+            resolved_url = url_resolver.resolve_redirect_url(url) if resolve_url else url
             if resolved_url != url:
                 logger.info(f"🔄 URL resolvida: {url} -> {resolved_url}")
                 url = resolved_url
@@ -123,23 +464,40 @@ class RobustContentExtractor:
                 self._update_global_stats()
                 return None
             
-            # 2. Verifica se é PDF
-            if self._is_pdf_url(url):
+            # URLs e domínios que falham sempre são pulados até a próxima sondagem
+            if negative_cache.should_skip(url):
+                return None
+            
+            # 2. Baixa documento em streaming (HTML ou PDF, detectado pelo conteúdo)
+            document = self._fetch_document(url, deadline)
+            if not document:
+                logger.error(f"❌ Falha ao baixar conteúdo de {url}")
+                self.stats['global']['total_failures'] += 1
+                self._update_global_stats()
+                return None
+            
+            document_kind, payload, received_bytes = document
+            if document_info is not None:
+                document_info.update({'url': url, 'kind': document_kind, 'bytes': received_bytes, 'links': []})
+            
+            if document_kind == 'pdf':
                 logger.info("📄 Detectado PDF - usando extratores especializados")
-                content = self._extract_pdf_content(url)
+                content = self._extract_pdf_content(url, payload)
                 if content and self._validate_content(content, url):
                     self.stats['global']['total_successes'] += 1
                     self._update_global_stats()
+                    negative_cache.record_success(url)
                     return content
-            
-            # 3. Baixa conteúdo HTML
-            html_content = self._fetch_html(url)
-            if not html_content:
-                logger.error(f"❌ Falha ao baixar HTML para {url}")
+                
+                logger.error(f"❌ Falha na extração do PDF {url}")
+                negative_cache.record_failure(url, REASON_NO_CONTENT)
                 self.stats['global']['total_failures'] += 1
                 self._update_global_stats()
                 return None
             
+            # 3. Conteúdo HTML
+            html_content = payload
+            
             # Valida HTML mínimo
             if len(html_content) < 500:
                 logger.warning(f"⚠️ HTML muito pequeno: {len(html_content)} caracteres")
@@ -147,34 +505,44 @@ class RobustContentExtractor:
             
             logger.info(f"📥 HTML baixado: {len(html_content)} caracteres")
             
+            # Faz o parse do HTML uma única vez; cada estratégia recebe a árvore
+            # (ou uma cópia, se precisar modificá-la)
+            tree = self._parse_html(html_content)
+            if document_info is not None and tree is not None:
+                document_info['links'] = self._extract_links(tree, url)
+            
             # 4. Verifica se é página dinâmica (JavaScript-heavy)
-            if self._is_dynamic_page(html_content):
+            if self._is_dynamic_page(html_content, tree):
                 logger.warning(f"⚠️ Página dinâmica detectada: {url}")
                 # Tenta extração mais agressiva
-                content = self._extract_dynamic_content(html_content, url)
+                content = self._extract_dynamic_content(html_content, url, tree)
                 if content and self._validate_content(content, url):
                     self.stats['global']['total_successes'] += 1
                     self._update_global_stats()
+                    negative_cache.record_success(url)
                     return content
             
-            # 5. Tenta extratores em ordem de prioridade
-            extractors = [
-                ('trafilatura', self._extract_with_trafilatura),
-                ('readability', self._extract_with_readability),
-                ('newspaper', self._extract_with_newspaper),
-                ('beautifulsoup', self._extract_with_beautifulsoup)
-            ]
+            # 5. Tenta extratores na ordem aprendida para o domínio
+            extractor_funcs = {
+                'trafilatura': self._extract_with_trafilatura,
+                'readability': self._extract_with_readability,
+                'newspaper': self._extract_with_newspaper,
+                'dom': self._extract_with_dom
+            }
+            domain = self._get_domain(url)
+            extractor_order = self.router.order_extractors(domain, list(extractor_funcs.keys()))
             
-            for extractor_name, extractor_func in extractors:
+            for extractor_name in extractor_order:
+                extractor_func = extractor_funcs[extractor_name]
                 if not self._is_extractor_available(extractor_name):
                     continue
                 
+                extractor_start = time.time()
                 try:
                     logger.info(f"🔍 Tentando extração com {extractor_name}...")
-                    extractor_start = time.time()
                     self.stats[extractor_name]['usage_count'] += 1
                     
-                    content = extractor_func(html_content, url)
+                    content = extractor_func(html_content, url, tree)
                     extractor_time = time.time() - extractor_start
                     
                     if self._validate_content(content, url):
@@ -182,29 +550,35 @@ class RobustContentExtractor:
                         self.stats[extractor_name]['total_time'] += extractor_time
                         self.stats['global']['total_successes'] += 1
                         self._update_global_stats()
+                        self.router.record(domain, extractor_name, True, extractor_time)
+                        negative_cache.record_success(url)
                         
                         logger.info(f"✅ Extração bem-sucedida com {extractor_name}: {len(content)} caracteres em {extractor_time:.2f}s")
                         return content
                     else:
                         self.stats[extractor_name]['failed'] += 1
+                        self.router.record(domain, extractor_name, False, extractor_time)
                         logger.warning(f"⚠️ Conteúdo insuficiente com {extractor_name}: {len(content) if content else 0} caracteres")
                         
                 except Exception as e:
                     self.stats[extractor_name]['failed'] += 1
+                    self.router.record(domain, extractor_name, False, time.time() - extractor_start)
                     logger.error(f"❌ Erro com {extractor_name}: {str(e)}")
                     continue
             
             # 6. Fallback final - extração agressiva
             logger.warning(f"⚠️ Todos os extratores padrão falharam, tentando extração agressiva...")
-            content = self._aggressive_fallback_extraction(html_content, url)
+            content = self._aggressive_fallback_extraction(html_content, url, tree)
             if content and len(content) >= 100:  # Critério mais flexível para fallback
                 logger.info(f"✅ Extração agressiva bem-sucedida: {len(content)} caracteres")
                 self.stats['global']['total_successes'] += 1
                 self._update_global_stats()
+                negative_cache.record_success(url)
                 return content
             
             # Todos os extratores falharam
             logger.error(f"❌ FALHA CRÍTICA: Todos os extratores falharam para {url}")
+            negative_cache.record_failure(url, REASON_NO_CONTENT)
             self.stats['global']['total_failures'] += 1
             self._update_global_stats()
             return None
@@ -215,98 +589,112 @@ class RobustContentExtractor:
             self._update_global_stats()
             return None
     
+    def _get_domain(self, url: str) -> str:
+        """Domínio normalizado usado como chave de roteamento"""
+        netloc = urlparse(url).netloc.lower()
+        return netloc[4:] if netloc.startswith('www.') else netloc
+    
     def _is_pdf_url(self, url: str) -> bool:
         """Verifica se a URL aponta para um PDF"""
         return (url.lower().endswith('.pdf') or 
                 'pdf' in url.lower() or 
                 'application/pdf' in url.lower())
     
-    def _extract_pdf_content(self, url: str) -> Optional[str]:
+    def _extract_pdf_content(self, url: str, pdf_bytes: Optional[bytes] = None) -> Optional[str]:
         """Extrai conteúdo de PDF usando múltiplas estratégias"""
         
         try:
-            # Baixa o PDF
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            # Baixa o PDF se ainda não foi baixado
+            if pdf_bytes is None:
+                document = self._fetch_document(url)
+                if not document or document[0] != 'pdf':
+                    logger.error(f"❌ Conteúdo de {url} não é PDF")
+                    return None
+                pdf_bytes = document[1]
             
-            # Salva temporariamente
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
+            # Tenta PDFPlumber primeiro (melhor para PDFs complexos)
+            if HAS_PDFPLUMBER:
+                content = self._extract_pdf_with_pdfplumber(pdf_bytes)
+                if content and len(content) > 100:
+                    self.stats['pdf_pdfplumber']['success'] += 1
+                    logger.info(f"✅ PDF extraído com PDFPlumber: {len(content)} caracteres")
+                    return content
+                else:
+                    self.stats['pdf_pdfplumber']['failed'] += 1
             
-            try:
-                # Tenta PDFPlumber primeiro (melhor para PDFs complexos)
-                if HAS_PDFPLUMBER:
-                    content = self._extract_pdf_with_pdfplumber(temp_path)
-                    if content and len(content) > 100:
-                        self.stats['pdf_pdfplumber']['success'] += 1
-                        logger.info(f"✅ PDF extraído com PDFPlumber: {len(content)} caracteres")
-                        return content
-                    else:
-                        self.stats['pdf_pdfplumber']['failed'] += 1
-                
-                # Fallback para PyPDF2
-                if HAS_PYPDF2:
-                    content = self._extract_pdf_with_pypdf2(temp_path)
-                    if content and len(content) > 100:
-                        self.stats['pdf_pypdf2']['success'] += 1
-                        logger.info(f"✅ PDF extraído com PyPDF2: {len(content)} caracteres")
-                        return content
-                    else:
-                        self.stats['pdf_pypdf2']['failed'] += 1
-                
-                logger.error(f"❌ Falha na extração de PDF: {url}")
-                return None
-                
-            finally:
-                # Remove arquivo temporário
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+            # Fallback para PyPDF2
+            if HAS_PYPDF2:
+                content = self._extract_pdf_with_pypdf2(pdf_bytes)
+                if content and len(content) > 100:
+                    self.stats['pdf_pypdf2']['success'] += 1
+                    logger.info(f"✅ PDF extraído com PyPDF2: {len(content)} caracteres")
+                    return content
+                else:
+                    self.stats['pdf_pypdf2']['failed'] += 1
+            
+            logger.error(f"❌ Falha na extração de PDF: {url}")
+            return None
                     
         except Exception as e:
             logger.error(f"❌ Erro ao processar PDF {url}: {str(e)}")
             return None
     
-    def _extract_pdf_with_pdfplumber(self, pdf_path: str) -> Optional[str]:
-        """Extrai texto usando PDFPlumber"""
-        try:
-            import pdfplumber
-            
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            return self._clean_content(text) if text else None
-            
-        except Exception as e:
-            logger.error(f"Erro PDFPlumber: {e}")
-            return None
+    def _extract_pdf_with_pdfplumber(self, pdf_bytes: bytes) -> Optional[str]:
+        """Extrai texto usando PDFPlumber (em memória, páginas em paralelo)"""
+        text = pdf_extraction_service.extract_text(pdf_bytes, engine='pdfplumber')
+        return self._clean_content(text) if text else None
+    
+    def _extract_pdf_with_pypdf2(self, pdf_bytes: bytes) -> Optional[str]:
+        """Extrai texto usando PyPDF2 (em memória, páginas em paralelo)"""
+        text = pdf_extraction_service.extract_text(pdf_bytes, engine='pypdf2')
+        return self._clean_content(text) if text else None
     
-    def _extract_pdf_with_pypdf2(self, pdf_path: str) -> Optional[str]:
-        """Extrai texto usando PyPDF2"""
+    def _parse_html(self, html: str) -> Optional[Any]:
+        """Faz o parse do HTML uma única vez em árvore lxml compartilhada"""
+        if not HAS_LXML or not html:
+            return None
+        
         try:
-            import PyPDF2
-            
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            return self._clean_content(text) if text else None
-            
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # lxml recusa strings unicode com declaração de encoding
+            try:
+                parser = lxml_html.HTMLParser(encoding='utf-8')
+                return lxml_html.document_fromstring(html.encode('utf-8'), parser=parser)
+            except Exception as e:
+                logger.error(f"Erro no parse do HTML: {e}")
+                return None
         except Exception as e:
-            logger.error(f"Erro PyPDF2: {e}")
+            logger.error(f"Erro no parse do HTML: {e}")
             return None
     
-    def _is_dynamic_page(self, html: str) -> bool:
+    def _extract_links(self, tree, base_url: str) -> List[Tuple[str, str]]:
+        """Links HTTP absolutos da página com o texto âncora (sem fragmentos, imagens e arquivos)"""
+        links = []
+        seen = {base_url.split('#')[0]}
+        for anchor in XPATH_LINKS(tree):
+            link = urljoin(base_url, anchor.get('href', '').strip()).split('#')[0]
+            if not link.startswith('http') or link in seen or link.lower().endswith(SKIPPED_LINK_EXTENSIONS):
+                continue
+            seen.add(link)
+            links.append((link, ' '.join(anchor.text_content().split())[:200]))
+            if len(links) >= MAX_PAGE_LINKS:
+                break
+        return links
+    
+    def _stripped_copy(self, tree, tags: List[str]):
+        """Retorna cópia da árvore sem os elementos indicados"""
+        tree_copy = copy.deepcopy(tree)
+        etree.strip_elements(tree_copy, *tags, with_tail=False)
+        return tree_copy
+    
+    def _element_text(self, element, strip: bool = False) -> str:
+        """Texto de um elemento lxml (equivalente ao get_text do BeautifulSoup)"""
+        if strip:
+            return ''.join(part.strip() for part in element.itertext())
+        return element.text_content()
+    
+    def _is_dynamic_page(self, html: str, tree=None) -> bool:
         """Verifica se é página dinâmica (JavaScript-heavy)"""
         if not html:
             return False
@@ -323,42 +711,31 @@ class RobustContentExtractor:
         js_indicators = sum(1 for indicator in dynamic_indicators if indicator in html_lower)
         
         # Se tem muitos indicadores JS e pouco conteúdo de texto
-        text_content = BeautifulSoup(html, 'html.parser').get_text() if HAS_BEAUTIFULSOUP else html
+        text_content = tree.text_content() if tree is not None else html
         text_ratio = len(text_content.strip()) / len(html) if html else 0
         
         return js_indicators > 3 and text_ratio < 0.1
     
-    def _extract_dynamic_content(self, html: str, url: str) -> Optional[str]:
+    def _extract_dynamic_content(self, html: str, url: str, tree=None) -> Optional[str]:
         """Extração especializada para conteúdo dinâmico"""
         
-        if not HAS_BEAUTIFULSOUP:
+        if tree is None:
             return None
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
             # Remove scripts e elementos dinâmicos
-            for element in soup(['script', 'style', 'noscript', 'iframe']):
-                element.decompose()
+            doc = self._stripped_copy(tree, ['script', 'style', 'noscript', 'iframe'])
             
             # Busca por elementos com conteúdo pré-renderizado
-            content_selectors = [
-                '[data-content]', '[data-text]', '.content-loaded',
-                '.server-rendered', '.static-content', '.preloaded',
-                'main', 'article', '.post-content', '.article-content',
-                '.entry-content', '.page-content', '.text-content'
-            ]
-            
             extracted_content = []
             
-            for selector in content_selectors:
+            for selector, xpath in COMPILED_DYNAMIC_SELECTORS:
                 try:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        text = element.get_text(strip=True)
+                    for element in xpath(doc):
+                        text = self._element_text(element, strip=True)
                         if len(text) > 50:  # Conteúdo substancial
                             extracted_content.append(text)
-                except:
+                except Exception:
                     continue
             
             if extracted_content:
@@ -366,28 +743,25 @@ class RobustContentExtractor:
                 return self._clean_content(combined)
             
             # Fallback: extrai todo texto disponível
-            all_text = soup.get_text()
+            all_text = doc.text_content()
             return self._clean_content(all_text) if len(all_text) > 100 else None
             
         except Exception as e:
             logger.error(f"Erro na extração dinâmica: {e}")
             return None
     
-    def _aggressive_fallback_extraction(self, html: str, url: str) -> Optional[str]:
+    def _aggressive_fallback_extraction(self, html: str, url: str, tree=None) -> Optional[str]:
         """Extração agressiva como último recurso"""
         
-        if not HAS_BEAUTIFULSOUP:
+        if tree is None:
             return None
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove apenas elementos críticos
-            for element in soup(['script', 'style']):
-                element.decompose()
+            # Última estratégia: pode modificar a árvore original sem copiar
+            etree.strip_elements(tree, 'script', 'style', with_tail=False)
             
             # Coleta todo texto disponível
-            all_text = soup.get_text()
+            all_text = tree.text_content()
             
             # Filtra linhas com conteúdo significativo
             lines = all_text.split('\n')
@@ -411,56 +785,273 @@ class RobustContentExtractor:
             return None
     
     def _fetch_html(self, url: str) -> Optional[str]:
-        """Baixa conteúdo HTML da URL com retry"""
+        """Baixa conteúdo HTML da URL (streaming, com limites de tamanho e tempo)"""
+        document = self._fetch_document(url)
+        if document and document[0] == 'html':
+            return document[1]
+        return None
+    
+    def _fetch_document(self, url: str, deadline: Optional[float] = None) -> Optional[Tuple[str, Any, int]]:
+        """
+        Baixa a URL em streaming com retry, limite de bytes e prazo total.
+        Retorna ('html', texto, bytes recebidos) ou ('pdf', bytes, bytes
+        recebidos); outros tipos são abortados.
+        """
         max_retries = 3
+        deadline = min(time.time() + self.fetch_deadline, deadline or float('inf'))
+        last_failure = None  # (motivo, status) para o cache negativo
         
         for attempt in range(max_retries):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logger.warning(f"⏰ Prazo total de download esgotado para {url}")
+                break
+            
+            # Aguarda horário do host no agendador (inclui backoff de falhas anteriores)
+            if not host_scheduler.acquire(url, max_wait=remaining):
+                logger.warning(f"⏰ Próximo horário do host excede o prazo de download para {url}")
+                break
+            
             try:
-                response = self.session.get(
-                    url,
-                    timeout=self.timeout,
-                    verify=False,  # Para evitar problemas de SSL
-                    allow_redirects=True
-                )
-                
-                response.raise_for_status()
-                
-                # Detecta encoding
-                if response.encoding is None:
-                    response.encoding = 'utf-8'
-                
-                html = response.text
+                document = self._stream_document(url, deadline)
+                kind, payload, _ = document
                 
-                if len(html) < 500:
-                    logger.warning(f"⚠️ HTML muito pequeno (tentativa {attempt + 1}): {len(html)} caracteres")
+                if kind == 'html' and len(payload) < 500:
+                    logger.warning(f"⚠️ HTML muito pequeno (tentativa {attempt + 1}): {len(payload)} caracteres")
                     if attempt < max_retries - 1:
-                        time.sleep(2)  # Aguarda antes de tentar novamente
+                        host_scheduler.report(url, error=True)  # Backoff antes de tentar novamente
                         continue
                 
-                return html
+                host_scheduler.report(url, status_code=200)
+                return document
                 
+            except FetchAbortedError as e:
+                # Tipo errado, tamanho excedido ou prazo: não adianta tentar de novo
+                logger.warning(f"🚫 Download abortado para {url}: {str(e)}")
+                negative_cache.record_failure(url, e.reason)
+                return None
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                logger.error(f"❌ HTTP {status} ao baixar {url} (tentativa {attempt + 1})")
+                host_scheduler.report(
+                    url,
+                    status_code=status,
+                    retry_after=e.response.headers.get('Retry-After') if e.response is not None else None
+                )
+                last_failure = (REASON_HTTP_STATUS, status)
+                if status != 429 and status < 500:
+                    # 401/403/404/451...: paywall, Cloudflare ou página removida
+                    negative_cache.record_failure(url, REASON_HTTP_STATUS, status)
+                    return None
             except requests.exceptions.Timeout:
                 logger.warning(f"⏰ Timeout na tentativa {attempt + 1} para {url}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 + random.uniform(0, 2))  # Delay aleatório
-                    continue
+                host_scheduler.report(url, error=True)
+                last_failure = (REASON_TIMEOUT, None)
             except Exception as e:
                 logger.error(f"❌ Erro ao baixar {url} (tentativa {attempt + 1}): {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 + random.uniform(0, 2))  # Delay aleatório
-                    continue
+                host_scheduler.report(url, error=True)
+                last_failure = (REASON_CONNECTION, None)
         
+        if last_failure:
+            negative_cache.record_failure(url, *last_failure)
         return None
     
-    def _extract_with_trafilatura(self, html: str, url: str) -> Optional[str]:
+    def _stream_document(self, url: str, deadline: float) -> Tuple[str, Any, int]:
+        """Executa um único download em streaming respeitando tipo, tamanho e prazo"""
+        remaining = max(1.0, deadline - time.time())
+        
+        with self.session.get(
+            url,
+            timeout=(min(self.connect_timeout, remaining), min(self.timeout, remaining)),
+            verify=False,  # Para evitar problemas de SSL
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            # O timeout de leitura vale por recv: um servidor que pinga um byte
+            # por vez nunca o dispara. No prazo o vigia derruba o socket (fechar
+            # a resposta esperaria a leitura em andamento) e a leitura termina.
+            expired = threading.Event()
+            
+            def expire():
+                expired.set()
+                self._abort_response(response)
+            
+            watchdog = threading.Timer(max(0.0, deadline - time.time()), expire)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                document = self._read_response(response, deadline)
+            except FetchAbortedError:
+                raise
+            except Exception as e:
+                if expired.is_set():
+                    raise FetchAbortedError("prazo total excedido", REASON_TIMEOUT) from e
+                raise
+            finally:
+                watchdog.cancel()
+            
+            # Corpo cortado pelo vigia pode terminar como fim de fluxo, sem erro
+            if expired.is_set():
+                raise FetchAbortedError("prazo total excedido", REASON_TIMEOUT)
+            return document
+    
+    def _abort_response(self, response):
+        """Interrompe leitura em andamento da resposta derrubando o socket"""
+        connection = getattr(response.raw, '_connection', None)
+        sock = getattr(connection, 'sock', None)
+        if sock is None:
+            # Conexão que fecha ao fim da resposta: o socket fica só no arquivo do http.client
+            http_response = getattr(response.raw, '_fp', None)
+            socket_io = getattr(getattr(http_response, 'fp', None), 'raw', None)
+            sock = getattr(socket_io, '_sock', None)
+        try:
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+            else:
+                response.close()
+        except (OSError, ValueError) as e:
+            logger.debug(f"Erro ao interromper download: {e}")
+    
+    def _read_response(self, response, deadline: float) -> Tuple[str, Any, int]:
+        """Valida tipo e tamanho e lê o corpo da resposta em streaming"""
+        response.raise_for_status()
+        
+        content_type = response.headers.get('Content-Type', '')
+        declared_type = content_type.split(';')[0].strip().lower()
+        
+        # Aborta antes de ler o corpo se o cabeçalho já indica binário
+        if declared_type and not self._is_accepted_content_type(declared_type):
+            raise FetchAbortedError(f"tipo de conteúdo não suportado: {declared_type}")
+        
+        declared_length = response.headers.get('Content-Length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > self.max_pdf_bytes:
+            raise FetchAbortedError(f"Content-Length excede limite: {declared_length} bytes")
+        
+        chunks = response.iter_content(chunk_size=16384)
+        
+        # Lê os primeiros bytes para detectar o tipo real
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+            if time.time() > deadline:
+                raise FetchAbortedError("prazo total excedido", REASON_TIMEOUT)
+        
+        kind = self._sniff_document_kind(declared_type, head)
+        if kind is None:
+            raise FetchAbortedError(f"conteúdo não é HTML nem PDF ({declared_type or 'sem Content-Type'})")
+        
+        if kind == 'pdf':
+            payload = self._read_pdf_stream(head, chunks, deadline)
+        else:
+            payload = self._read_html_stream(head, chunks, deadline, content_type)
+        
+        # Bytes recebidos pela rede (antes de descompressão e decodificação)
+        raw_tell = getattr(response.raw, 'tell', None)
+        received = raw_tell() if callable(raw_tell) else 0
+        if not received:
+            received = len(payload) if kind == 'pdf' else len(payload.encode('utf-8'))
+        return kind, payload, received
+    
+    def _read_pdf_stream(self, head: bytes, chunks, deadline: float) -> bytes:
+        """Lê corpo de PDF com limite de bytes e prazo"""
+        parts = [head]
+        total = len(head)
+        
+        for chunk in chunks:
+            total += len(chunk)
+            if total > self.max_pdf_bytes:
+                raise FetchAbortedError(f"PDF excede {self.max_pdf_bytes} bytes")
+            if time.time() > deadline:
+                raise FetchAbortedError("prazo total excedido", REASON_TIMEOUT)
+            parts.append(chunk)
+        
+        return b''.join(parts)
+    
+    def _read_html_stream(self, head: bytes, chunks, deadline: float, content_type: str) -> str:
+        """Decodifica HTML incrementalmente com limite de bytes e prazo"""
+        encoding = self._detect_encoding(content_type, head)
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        
+        if len(head) > self.max_download_bytes:
+            logger.warning(f"✂️ HTML truncado em {self.max_download_bytes} bytes")
+            return decoder.decode(head[:self.max_download_bytes], final=True)
+        
+        parts = [decoder.decode(head)]
+        total = len(head)
+        
+        for chunk in chunks:
+            if total + len(chunk) > self.max_download_bytes:
+                # HTML truncado ainda é útil para extração
+                parts.append(decoder.decode(chunk[:self.max_download_bytes - total]))
+                logger.warning(f"✂️ HTML truncado em {self.max_download_bytes} bytes")
+                break
+            if time.time() > deadline:
+                raise FetchAbortedError("prazo total excedido", REASON_TIMEOUT)
+            total += len(chunk)
+            parts.append(decoder.decode(chunk))
+        
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
+    
+    def _is_accepted_content_type(self, declared_type: str) -> bool:
+        """Verifica se o Content-Type declarado pode ser HTML ou PDF"""
+        return (declared_type in HTML_CONTENT_TYPES or
+                declared_type in PDF_CONTENT_TYPES or
+                declared_type in ('application/octet-stream', 'binary/octet-stream'))
+    
+    def _sniff_document_kind(self, declared_type: str, head: bytes) -> Optional[str]:
+        """Detecta HTML ou PDF a partir do cabeçalho e dos primeiros bytes"""
+        if b'%PDF-' in head[:1024]:
+            return 'pdf'
+        
+        if declared_type in PDF_CONTENT_TYPES:
+            # Declarado como PDF mas sem assinatura: provavelmente página de erro HTML
+            declared_type = ''
+        
+        sample = head[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+        looks_like_html = (sample.startswith(b'<') or
+                           b'<html' in sample or
+                           b'<!doctype' in sample or
+                           b'<body' in sample)
+        is_binary = b'\x00' in head[:1024]
+        
+        if is_binary:
+            return None
+        if looks_like_html:
+            return 'html'
+        if declared_type in HTML_CONTENT_TYPES:
+            return 'html'
+        return None
+    
+    def _detect_encoding(self, content_type: str, head: bytes) -> str:
+        """Detecta encoding pelo cabeçalho HTTP ou pela meta tag"""
+        match = re.search(r'charset=([\w\-]+)', content_type or '', re.IGNORECASE)
+        if match:
+            return match.group(1).strip().lower()
+        
+        meta_match = META_CHARSET_RE.search(head)
+        if meta_match:
+            return meta_match.group(1).decode('ascii', errors='ignore').lower()
+        
+        return 'utf-8'
+    
+    def _extract_with_trafilatura(self, html: str, url: str, tree=None) -> Optional[str]:
         """Extrai com Trafilatura (prioridade 1) com configurações aprimoradas"""
         if not HAS_TRAFILATURA:
             return None
         
         try:
+            # Trafilatura aceita a árvore lxml diretamente (cópia, pois ela é modificada)
+            source = copy.deepcopy(tree) if tree is not None else html
+            
             # Configurações mais agressivas para trafilatura
             content = trafilatura.extract(
-                html, 
+                source, 
                 include_comments=False,
                 include_tables=True,
                 include_formatting=False,
@@ -480,21 +1071,23 @@ class RobustContentExtractor:
             logger.error(f"Erro Trafilatura: {e}")
             return None
     
-    def _extract_with_readability(self, html: str, url: str) -> Optional[str]:
+    def _extract_with_readability(self, html: str, url: str, tree=None) -> Optional[str]:
         """Extrai com Readability (prioridade 2) com configurações aprimoradas"""
         if not HAS_READABILITY:
             return None
         
         try:
+            # Readability aceita HtmlElement e o modifica, por isso recebe uma cópia
+            source = copy.deepcopy(tree) if tree is not None else html
+            
             # Configurações mais inclusivas
-            doc = Document(html, positive_keywords=['content', 'article', 'post', 'text', 'main'])
+            doc = Document(source, positive_keywords=['content', 'article', 'post', 'text', 'main'])
             content = doc.summary()
             
             if content:
                 # Remove tags HTML
-                if HAS_BEAUTIFULSOUP:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    content = soup.get_text()
+                if HAS_LXML:
+                    content = lxml_html.fromstring(content).text_content()
                 else:
                     # Remove tags manualmente
                     content = re.sub(r'<[^>]+>', '', content)
@@ -508,12 +1101,13 @@ class RobustContentExtractor:
             logger.error(f"Erro Readability: {e}")
             return None
     
-    def _extract_with_newspaper(self, html: str, url: str) -> Optional[str]:
+    def _extract_with_newspaper(self, html: str, url: str, tree=None) -> Optional[str]:
         """Extrai com Newspaper3k (prioridade 3) com configurações aprimoradas"""
         if not HAS_NEWSPAPER:
             return None
         
         try:
+            # Newspaper só aceita HTML bruto (faz seu próprio parse)
             article = Article(url)
             article.set_html(html)
             article.parse()
@@ -529,28 +1123,25 @@ class RobustContentExtractor:
             logger.error(f"Erro Newspaper: {e}")
             return None
     
-    def _extract_with_beautifulsoup(self, html: str, url: str) -> Optional[str]:
-        """Extrai com BeautifulSoup (fallback final) com estratégia aprimorada"""
-        if not HAS_BEAUTIFULSOUP:
+    def _extract_with_dom(self, html: str, url: str, tree=None) -> Optional[str]:
+        """Extrai direto da árvore lxml (fallback final) com estratégia em camadas"""
+        if tree is None:
             return None
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove scripts e styles
-            for script in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form']):
-                script.decompose()
+            # Remove scripts, styles e elementos de navegação
+            doc = self._stripped_copy(tree, ['script', 'style', 'nav', 'header', 'footer', 'aside', 'form'])
             
             # Estratégia em camadas para encontrar conteúdo
             content_strategies = [
                 # Estratégia 1: Elementos semânticos
-                lambda: self._extract_semantic_content(soup),
+                lambda: self._extract_semantic_content(doc),
                 # Estratégia 2: Elementos por classe/ID
-                lambda: self._extract_by_selectors(soup),
+                lambda: self._extract_by_selectors(doc),
                 # Estratégia 3: Maior bloco de texto
-                lambda: self._extract_largest_text_block(soup),
+                lambda: self._extract_largest_text_block(doc),
                 # Estratégia 4: Todo o body
-                lambda: self._extract_full_body(soup)
+                lambda: self._extract_full_body(doc)
             ]
             
             for strategy in content_strategies:
@@ -558,23 +1149,23 @@ class RobustContentExtractor:
                     content = strategy()
                     if content and len(content) > 100:
                         return self._clean_content(content)
-                except:
+                except Exception:
                     continue
             
             return None
             
         except Exception as e:
-            logger.error(f"Erro BeautifulSoup: {e}")
+            logger.error(f"Erro extração DOM: {e}")
             return None
     
-    def _extract_semantic_content(self, soup) -> Optional[str]:
+    def _extract_semantic_content(self, doc) -> Optional[str]:
         """Extrai usando elementos semânticos HTML5"""
-        semantic_elements = soup.find_all(['article', 'main', 'section'])
+        semantic_elements = XPATH_SEMANTIC(doc)
         
         if semantic_elements:
             content_parts = []
             for element in semantic_elements:
-                text = element.get_text()
+                text = element.text_content()
                 if len(text) > 50:
                     content_parts.append(text)
             
@@ -583,54 +1174,45 @@ class RobustContentExtractor:
         
         return None
     
-    def _extract_by_selectors(self, soup) -> Optional[str]:
-        """Extrai usando seletores CSS comuns"""
-        content_selectors = [
-            '.content', '#content', '.post', '.article',
-            '.entry', '.text', '.body', '.main-content',
-            '.post-content', '.article-content', '.entry-content',
-            '.page-content', '.text-content', '.story-content'
-        ]
-        
-        for selector in content_selectors:
+    def _extract_by_selectors(self, doc) -> Optional[str]:
+        """Extrai usando seletores CSS comuns (pré-compilados)"""
+        for selector, xpath in COMPILED_CONTENT_SELECTORS:
             try:
-                elements = soup.select(selector)
+                elements = xpath(doc)
                 if elements:
                     content_parts = []
                     for element in elements:
-                        text = element.get_text()
+                        text = element.text_content()
                         if len(text) > 50:
                             content_parts.append(text)
                     
                     if content_parts:
                         return '\n\n'.join(content_parts)
-            except:
+            except Exception:
                 continue
         
         return None
     
-    def _extract_largest_text_block(self, soup) -> Optional[str]:
+    def _extract_largest_text_block(self, doc) -> Optional[str]:
         """Encontra e extrai o maior bloco de texto"""
-        all_divs = soup.find_all(['div', 'section', 'article'])
-        
         largest_text = ""
         largest_size = 0
         
-        for div in all_divs:
-            text = div.get_text()
+        for div in XPATH_BLOCKS(doc):
+            text = div.text_content()
             if len(text) > largest_size:
                 largest_size = len(text)
                 largest_text = text
         
         return largest_text if largest_size > 100 else None
     
-    def _extract_full_body(self, soup) -> Optional[str]:
+    def _extract_full_body(self, doc) -> Optional[str]:
         """Extrai todo o conteúdo do body como último recurso"""
-        body = soup.find('body')
+        body = XPATH_BODY(doc)
         if body:
-            return body.get_text()
+            return body[0].text_content()
         else:
-            return soup.get_text()
+            return doc.text_content()
     
     def _clean_content(self, content: str) -> str:
         """Limpa e normaliza o conteúdo extraído com melhorias"""
@@ -762,20 +1344,25 @@ class RobustContentExtractor:
                     stats['reason'] = 'Biblioteca readability-lxml não instalada'
                 elif extractor_name == 'newspaper' and not HAS_NEWSPAPER:
                     stats['reason'] = 'Biblioteca newspaper3k não instalada'
-                elif extractor_name == 'beautifulsoup' and not HAS_BEAUTIFULSOUP:
-                    stats['reason'] = 'Biblioteca beautifulsoup4 não instalada'
+                elif extractor_name == 'dom' and not HAS_LXML:
+                    stats['reason'] = 'Biblioteca lxml não instalada'
                 elif extractor_name == 'pdf_pypdf2' and not HAS_PYPDF2:
                     stats['reason'] = 'Biblioteca PyPDF2 não instalada'
                 elif extractor_name == 'pdf_pdfplumber' and not HAS_PDFPLUMBER:
                     stats['reason'] = 'Biblioteca pdfplumber não instalada'
     
     def get_extractor_stats(self) -> Dict[str, Any]:
-        """Retorna estatísticas dos extratores"""
+        """Retorna estatísticas dos extratores e do roteamento por domínio"""
         self._update_global_stats()
-        return self.stats.copy()
+        stats = self.stats.copy()
+        for alias, name in EXTRACTOR_STATS_ALIASES.items():
+            stats[alias] = stats[name]
+        stats['domain_routing'] = self.router.get_domain_stats()
+        return stats
     
     def reset_extractor_stats(self, extractor_name: Optional[str] = None):
         """Reset estatísticas dos extratores"""
+        extractor_name = EXTRACTOR_STATS_ALIASES.get(extractor_name, extractor_name)
         if extractor_name and extractor_name in self.stats:
             if extractor_name != 'global':
                 self.stats[extractor_name].update({
@@ -804,8 +1391,14 @@ class RobustContentExtractor:
         """Extrai conteúdo de múltiplas URLs em paralelo"""
         results = {}
         
+        # Resolve todos os redirecionamentos de uma vez antes da extração
+        resolved_urls = url_resolver.resolve_batch(urls)
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_url = {executor.submit(self.extract_content, url): url for url in urls}
+            future_to_url = {
+                executor.submit(self.extract_content, resolved_urls.get(url, url), False): url
+                for url in urls
+            }
             
             for future in as_completed(future_to_url):
                 url = future_to_url[future]
@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any, Tuple, List  # Added List import
 from services.robust_content_extractor import robust_content_extractor
 from services.content_quality_validator import content_quality_validator
 from services.url_resolver import url_resolver
+from services.negative_cache import negative_cache, REASON_QUALITY
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +66,15 @@ class SafeContentExtractor:
                 logger.error(f"❌ {result['error']}")
                 return result
             
-            # 4. Extrai conteúdo com timeout
+            # 4. Pula URLs/domínios no cache negativo
+            cached_failure = negative_cache.check(url)
+            if cached_failure:
+                result['error'] = f"URL no cache negativo: {cached_failure['reason']}"
+                result['metadata']['negative_cache'] = cached_failure
+                logger.info(f"⛔ {result['error']} para {url}")
+                return result
+            
+            # 5. Extrai conteúdo com timeout
             extraction_start = time.time()
             content = self._extract_with_timeout(url)
             extraction_time = time.time() - extraction_start
@@ -77,27 +86,29 @@ class SafeContentExtractor:
                 logger.error(f"❌ {result['error']} para {url}")
                 return result
             
-            # 5. Valida tamanho mínimo
+            # 6. Valida tamanho mínimo
             if len(content) < self.min_content_length:
                 result['error'] = f"Conteúdo muito pequeno: {len(content)} < {self.min_content_length}"
                 logger.error(f"❌ {result['error']} para {url}")
                 return result
             
-            # 6. Valida qualidade do conteúdo
+            # 7. Valida qualidade do conteúdo
             validation = content_quality_validator.validate_content(content, url, context)
             result['validation'] = validation
             
             if not validation['valid']:
                 result['error'] = f"Conteúdo de baixa qualidade: {validation['reason']}"
                 logger.error(f"❌ {result['error']} para {url}")
+                negative_cache.record_failure(url, REASON_QUALITY)
                 return result
             
             if validation['score'] < self.min_quality_score:
                 result['error'] = f"Score de qualidade muito baixo: {validation['score']:.1f}% < {self.min_quality_score}%"
                 logger.error(f"❌ {result['error']} para {url}")
+                negative_cache.record_failure(url, REASON_QUALITY)
                 return result
             
-            # 7. Sucesso - conteúdo válido
+            # 8. Sucesso - conteúdo válido
             result['success'] = True
             result['content'] = content
             result['metadata'].update({
@@ -148,14 +159,14 @@ class SafeContentExtractor:
             signal.signal(signal.SIGALRM, timeout_handler)
             signal.alarm(self.max_extraction_time)
             
-            content = robust_content_extractor.extract_content(url)
+            content = robust_content_extractor.extract_content(url, resolve_url=False)
             
             signal.alarm(0)  # Cancela timeout
             return content
             
         except AttributeError:
             # Sistema Windows - sem timeout por signal
-            return robust_content_extractor.extract_content(url)
+            return robust_content_extractor.extract_content(url, resolve_url=False)
         except TimeoutError:
             logger.error(f"⏰ Timeout na extração de {url}")
             return None
@@ -175,6 +186,9 @@ class SafeContentExtractor:
         
         results = {}
         
+        # Pré-resolve redirecionamentos em lote (ficam em cache para cada extração)
+        url_resolver.resolve_batch(urls)
+        
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_url = {
                 executor.submit(self.safe_extract_content, url, context): url 
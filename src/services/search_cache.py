@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Search Cache
+Resultado de busca e cache SQLite compartilhado por todos os caminhos de pesquisa
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+from typing import List, Optional
+from datetime import datetime
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SearchResult:
+    """Estrutura de dados para resultados de busca"""
+    title: str
+    url: str
+    snippet: str
+    source: str
+    relevance_score: float = 0.0
+    timestamp: datetime = None
+
+    def __post_init__(self):
+        if self.timestamp is None:
+            self.timestamp = datetime.now()
+
+class ProductionSearchCache:
+    """Sistema de cache robusto para produção"""
+
+    def __init__(self, cache_dir: str = "cache", ttl: int = 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.db_path = os.path.join(cache_dir, "search_cache.db")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa banco de dados SQLite para cache"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS search_cache (
+                        query_hash TEXT PRIMARY KEY,
+                        query TEXT NOT NULL,
+                        results BLOB NOT NULL,
+                        timestamp REAL NOT NULL,
+                        ttl INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_timestamp ON search_cache(timestamp)
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cache: {e}")
+
+    def _get_query_hash(self, query: str, provider: str = "") -> str:
+        """Gera hash único para query"""
+        combined = f"{query}:{provider}".encode('utf-8')
+        return hashlib.sha256(combined).hexdigest()
+
+    def get(self, query: str, provider: str = "") -> Optional[List[SearchResult]]:
+        """Recupera resultados do cache"""
+        if not os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true':
+            return None
+
+        try:
+            query_hash = self._get_query_hash(query, provider)
+
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    "SELECT results, timestamp, ttl FROM search_cache WHERE query_hash = ?",
+                    (query_hash,)
+                )
+                row = cursor.fetchone()
+
+                if row:
+                    results_blob, timestamp, ttl = row
+
+                    # Verifica se não expirou
+                    if time.time() - timestamp < ttl:
+                        results = pickle.loads(results_blob)
+                        logger.info(f"✅ Cache hit para query: {query[:50]}...")
+                        return results
+                    else:
+                        # Remove entrada expirada
+                        conn.execute("DELETE FROM search_cache WHERE query_hash = ?", (query_hash,))
+                        conn.commit()
+                        logger.info(f"🗑️ Cache expirado removido para: {query[:50]}...")
+
+                return None
+
+        except Exception as e:
+            logger.error(f"Erro ao recuperar cache: {e}")
+            return None
+
+    def set(self, query: str, results: List[SearchResult], provider: str = ""):
+        """Armazena resultados no cache"""
+        if not os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true':
+            return
+
+        try:
+            query_hash = self._get_query_hash(query, provider)
+            results_blob = pickle.dumps(results)
+            timestamp = time.time()
+            ttl = int(os.getenv('SEARCH_CACHE_TTL', self.ttl))
+
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO search_cache 
+                    (query_hash, query, results, timestamp, ttl) 
+                    VALUES (?, ?, ?, ?, ?)
+                """, (query_hash, query, results_blob, timestamp, ttl))
+                conn.commit()
+
+            logger.info(f"💾 Cache salvo para query: {query[:50]}...")
+
+        except Exception as e:
+            logger.error(f"Erro ao salvar cache: {e}")
+
+    def cleanup_expired(self):
+        """Remove entradas expiradas do cache"""
+        try:
+            current_time = time.time()
+
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    "SELECT COUNT(*) FROM search_cache WHERE ? - timestamp > ttl",
+                    (current_time,)
+                )
+                expired_count = cursor.fetchone()[0]
+
+                if expired_count > 0:
+                    conn.execute("DELETE FROM search_cache WHERE ? - timestamp > ttl", (current_time,))
+                    conn.commit()
+                    logger.info(f"🗑️ {expired_count} entradas expiradas removidas do cache")
+
+        except Exception as e:
+            logger.error(f"Erro na limpeza do cache: {e}")
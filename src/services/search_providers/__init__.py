@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Search Providers
+Registro de provedores de busca com adaptadores carregados sob demanda
+"""
+
+from services.search_providers.base import SearchProviderAdapter, SearchProviderError
+from services.search_providers.registry import search_provider_registry, SearchProviderRegistry
+
+__all__ = [
+    'SearchProviderAdapter',
+    'SearchProviderError',
+    'SearchProviderRegistry',
+    'search_provider_registry'
+]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Search Provider Base
+Interface comum dos adaptadores de provedores de busca
+"""
+
+import os
+import random
+import logging
+import requests
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Any
+
+from services.host_scheduler import host_scheduler
+
+logger = logging.getLogger(__name__)
+
+# User agents rotativos para evitar detecção
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
+]
+
+class SearchProviderError(Exception):
+    """Falha do provedor de busca (status HTTP, quota ou resposta inválida)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, quota_exceeded: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.quota_exceeded = quota_exceeded
+
+class SearchProviderAdapter(ABC):
+    """Adaptador base: executa a busca no provedor e retorna dicts com title, url e snippet"""
+
+    name = ''
+    referer = None
+
+    def __init__(self, session: requests.Session):
+        """Recebe a sessão HTTP com pool de conexões do registro"""
+        self.session = session
+        self.timeout = int(os.getenv('REQUEST_TIMEOUT', 30))
+
+    @abstractmethod
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Executa a busca (implementado por cada adaptador)"""
+
+    def headers(self) -> Dict[str, str]:
+        """Gera headers de navegador para o provedor"""
+        headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8,en-US;q=0.7',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1'
+        }
+
+        if os.getenv('SEARCH_USER_AGENT_ROTATION', 'true').lower() == 'true':
+            headers['User-Agent'] = random.choice(USER_AGENTS)
+        else:
+            headers['User-Agent'] = USER_AGENTS[0]
+
+        if self.referer:
+            headers['Referer'] = self.referer
+
+        return headers
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Requisição agendada por host na sessão do provedor; erros de status viram SearchProviderError"""
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('headers', self.headers())
+        response = host_scheduler.request(method, url, session=self.session, **kwargs)
+
+        if response.status_code in (403, 429):
+            raise SearchProviderError(
+                f"{self.name} retornou status {response.status_code}",
+                status_code=response.status_code,
+                quota_exceeded=True
+            )
+        if response.status_code != 200:
+            raise SearchProviderError(f"{self.name} retornou status {response.status_code}", status_code=response.status_code)
+
+        return response
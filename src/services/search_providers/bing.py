@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Bing Search Adapter
+"""
+
+import logging
+from typing import Dict, List, Any
+
+from services.search_providers.base import SearchProviderAdapter
+from services.serp_parser import serp_parser
+
+logger = logging.getLogger(__name__)
+
+class BingSearchAdapter(SearchProviderAdapter):
+    """Bing via scraping da página de resultados"""
+
+    name = 'bing'
+    url = "https://www.bing.com/search"
+    referer = 'https://www.bing.com/'
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Busca no Bing e interpreta a SERP"""
+        params = {
+            'q': query,
+            'cc': 'br',
+            'setlang': 'pt-br',
+            'count': max_results,
+            'first': 1,
+            'FORM': 'PERE'
+        }
+
+        response = self._request('GET', self.url, params=params, allow_redirects=True)
+        return serp_parser.parse('bing', response.content, max_results)
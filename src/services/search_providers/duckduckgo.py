@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - DuckDuckGo Search Adapter
+"""
+
+import logging
+from typing import Dict, List, Any
+
+from services.search_providers.base import SearchProviderAdapter
+from services.serp_parser import serp_parser
+
+logger = logging.getLogger(__name__)
+
+class DuckDuckGoSearchAdapter(SearchProviderAdapter):
+    """DuckDuckGo via versão HTML"""
+
+    name = 'duckduckgo'
+    url = "https://html.duckduckgo.com/html/"
+    referer = 'https://duckduckgo.com/'
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Busca no DuckDuckGo e interpreta a SERP"""
+        params = {
+            'q': query,
+            'kl': 'br-pt',
+            'df': 'm'
+        }
+
+        response = self._request('GET', self.url, params=params)
+        return serp_parser.parse('duckduckgo', response.content, max_results)
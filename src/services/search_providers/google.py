@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Google Custom Search Adapter
+"""
+
+import os
+import logging
+from typing import Dict, List, Any
+
+from services.search_providers.base import SearchProviderAdapter, SearchProviderError
+
+logger = logging.getLogger(__name__)
+
+class GoogleSearchAdapter(SearchProviderAdapter):
+    """Google Custom Search API"""
+
+    name = 'google'
+    url = "https://www.googleapis.com/customsearch/v1"
+    referer = 'https://www.google.com/'
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Busca na API do Google (máximo de 10 resultados por página)"""
+        params = {
+            'key': os.getenv('GOOGLE_SEARCH_KEY'),
+            'cx': os.getenv('GOOGLE_CSE_ID'),
+            'q': query,
+            'num': min(max_results, 10),
+            'lr': 'lang_pt',
+            'gl': 'br',
+            'safe': 'off',
+            'dateRestrict': os.getenv('GOOGLE_SEARCH_DATE_RESTRICT', 'y1'),
+            'sort': 'date',
+            'fields': 'items(title,link,snippet,displayLink),error'
+        }
+
+        data = self._request('GET', self.url, params=params).json()
+
+        if 'error' in data:
+            error_msg = data['error'].get('message', 'Erro desconhecido')
+            raise SearchProviderError(
+                f"Google API Error: {error_msg}",
+                quota_exceeded='quota' in error_msg.lower() or 'limit' in error_msg.lower()
+            )
+
+        return [
+            {
+                'title': item.get('title', ''),
+                'url': item.get('link', ''),
+                'snippet': item.get('snippet', '')
+            }
+            for item in data.get('items', [])
+            if item.get('link') and item.get('title')
+        ]
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Search Provider Registry
+Registro único de provedores de busca: cache, quotas, pool de conexões e métricas
+para todos os caminhos de pesquisa
+"""
+
+import os
+import time
+import logging
+import importlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Any
+
+from services.search_cache import ProductionSearchCache
+from services.search_providers.base import SearchProviderError
+
+logger = logging.getLogger(__name__)
+
+# Provedores conhecidos; o módulo do adaptador só é importado no primeiro uso
+PROVIDER_CONFIGS = {
+    'google': {
+        'module': 'services.search_providers.google',
+        'class_name': 'GoogleSearchAdapter',
+        'priority': 1,
+        'rate_limit': 100,  # requisições por dia (cota gratuita da Custom Search API)
+        'rate_window': 86400,
+        'required_env': ['GOOGLE_SEARCH_KEY', 'GOOGLE_CSE_ID']
+    },
+    'serper': {
+        'module': 'services.search_providers.serper',
+        'class_name': 'SerperSearchAdapter',
+        'priority': 2,
+        'rate_limit': 2500,  # requisições por mês
+        'rate_window': 30 * 86400,
+        'required_env': ['SERPER_API_KEY']
+    },
+    'bing': {
+        'module': 'services.search_providers.bing',
+        'class_name': 'BingSearchAdapter',
+        'priority': 3,
+        'rate_limit': 1000,
+        'required_env': []
+    },
+    'duckduckgo': {
+        'module': 'services.search_providers.duckduckgo',
+        'class_name': 'DuckDuckGoSearchAdapter',
+        'priority': 4,
+        'rate_limit': 500,
+        'required_env': []
+    },
+    'yahoo': {
+        'module': 'services.search_providers.yahoo',
+        'class_name': 'YahooSearchAdapter',
+        'priority': 5,
+        'rate_limit': 500,
+        'required_env': []
+    }
+}
+
+# Janela padrão da quota (rate_limit requisições a cada rate_window segundos)
+DEFAULT_RATE_WINDOW = 3600
+
+# Status que não contam como erro do provedor (busca ainda em processamento)
+SOFT_STATUS = {202}
+
+class SearchProviderRegistry:
+    """Ponto único de acesso aos provedores de busca"""
+
+    def __init__(self):
+        """Inicializa registro de provedores"""
+        self.cache = ProductionSearchCache()
+        self.page_size = int(os.getenv('SEARCH_PROVIDER_PAGE_SIZE', 10))
+        self.pool_size = int(os.getenv('SEARCH_POOL_SIZE', 10))
+        self.max_errors = int(os.getenv('SEARCH_PROVIDER_MAX_ERRORS', 5))
+
+        self.configs = {}
+        self.providers = {}  # nome -> estado (habilitado, erros, quota, latência)
+        self.adapters = {}  # nome -> adaptador carregado
+        self.rate_limiter = {}  # nome -> horários das requisições dentro da janela da quota
+        self.stats = {}
+        self.lock = threading.RLock()
+
+        for name, config in PROVIDER_CONFIGS.items():
+            self.register(name, **config)
+
+        enabled = [name for name, state in self.providers.items() if state['enabled']]
+        logger.info(f"🔌 Search Provider Registry inicializado: {', '.join(enabled)}")
+
+    def register(self, name: str, module: str, class_name: str, priority: int = 10,
+                 rate_limit: int = 1000, required_env: Optional[List[str]] = None,
+                 rate_window: float = DEFAULT_RATE_WINDOW):
+        """Registra provedor; o adaptador é carregado sob demanda a partir de module.class_name"""
+        required_env = required_env or []
+
+        with self.lock:
+            self.configs[name] = {
+                'module': module,
+                'class_name': class_name,
+                'required_env': required_env
+            }
+            self.providers[name] = {
+                'enabled': all(os.getenv(var) for var in required_env),
+                'priority': priority,
+                'rate_limit': rate_limit,
+                'rate_window': rate_window,
+                'error_count': 0,
+                'last_error': None,
+                'quota_reset': None,
+                'avg_latency': None,
+                'late_count': 0
+            }
+            self.stats[name] = {'requests': 0, 'cache_hits': 0, 'errors': 0, 'results': 0}
+            self.adapters.pop(name, None)
+
+    def _adapter(self, name: str):
+        """Carrega adaptador do provedor no primeiro uso, com sessão HTTP própria"""
+        adapter = self.adapters.get(name)
+        if adapter is not None:
+            return adapter
+
+        with self.lock:
+            adapter = self.adapters.get(name)
+            if adapter is None:
+                config = self.configs[name]
+                adapter_class = getattr(importlib.import_module(config['module']), config['class_name'])
+                adapter = adapter_class(self._create_session())
+                self.adapters[name] = adapter
+                logger.info(f"🔌 Adaptador de busca carregado: {name}")
+        return adapter
+
+    def _create_session(self) -> requests.Session:
+        """Sessão com pool de conexões reutilizáveis (keep-alive)"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def is_available(self, name: str) -> bool:
+        """Verifica se o provedor está habilitado e fora de bloqueio por quota/erros"""
+        state = self.providers.get(name)
+        if state is None:
+            return False
+
+        with self.lock:
+            if state['quota_reset'] and time.time() > state['quota_reset']:
+                logger.info(f"🔄 Reabilitando provedor {name}")
+                state['quota_reset'] = None
+                state['error_count'] = 0
+                state['enabled'] = all(os.getenv(var) for var in self.configs[name]['required_env'])
+            return state['enabled'] and not state['quota_reset']
+
+    def available_providers(self, names: Optional[List[str]] = None) -> List[str]:
+        """Provedores disponíveis por prioridade e, no empate, pelo mais rápido"""
+        candidates = [name for name in (names or self.providers) if self.is_available(name)]
+        candidates.sort(key=lambda name: (self.providers[name]['priority'], self.providers[name]['avg_latency'] or 0.0))
+        return candidates
+
+    def search(self, name: str, query: str, max_results: int = 10,
+               use_cache: bool = True, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca no provedor com cache compartilhado, quota e métricas.
+        Retorna dicts com title, url, snippet e source (nome do provedor).
+        raise_errors=True propaga falhas para quem implementa fallback próprio.
+        """
+        if name not in self.providers:
+            logger.error(f"❌ Provedor de busca desconhecido: {name}")
+            return []
+
+        cache_key = f"provider:{name}"
+        if use_cache:
+            cached = self.cache.get(query, cache_key)
+            if cached is not None:
+                with self.lock:
+                    self.stats[name]['cache_hits'] += 1
+                return self._tag(cached[:max_results], name)
+
+        if not self.is_available(name) or not self._check_rate_limit(name):
+            if raise_errors:
+                raise SearchProviderError(f"Provedor {name} indisponível")
+            return []
+
+        # Busca sempre uma página completa para que todos os caminhos compartilhem o cache
+        fetch_size = max(max_results, self.page_size)
+        self._record_request(name)
+        start_time = time.time()
+
+        try:
+            results = self._adapter(name).search(query, fetch_size)
+        except Exception as e:
+            self.handle_error(name, e)
+            if raise_errors:
+                raise
+            return []
+
+        self._record_latency(name, time.time() - start_time)
+        with self.lock:
+            self.stats[name]['results'] += len(results)
+            self.providers[name]['error_count'] = 0
+
+        if results and use_cache:
+            self.cache.set(query, results, cache_key)
+
+        logger.info(f"✅ {name}: {len(results)} resultados")
+        return self._tag(results[:max_results], name)
+
+    def _tag(self, results: List[Dict[str, Any]], name: str) -> List[Dict[str, Any]]:
+        """Cópias dos resultados com o provedor de origem"""
+        return [{**result, 'source': name} for result in results]
+
+    def _record_latency(self, name: str, latency: float):
+        """Latência média do provedor (EWMA), só para requisições de rede"""
+        with self.lock:
+            state = self.providers[name]
+            previous = state['avg_latency']
+            state['avg_latency'] = latency if previous is None else previous * 0.7 + latency * 0.3
+
+    def _check_rate_limit(self, name: str) -> bool:
+        """Verifica quota de requisições do provedor na janela configurada (rate_window)"""
+        current_time = time.time()
+        with self.lock:
+            window = self.providers[name]['rate_window']
+            requests_window = [
+                req_time for req_time in self.rate_limiter.get(name, [])
+                if current_time - req_time < window
+            ]
+            self.rate_limiter[name] = requests_window
+
+            if len(requests_window) >= self.providers[name]['rate_limit']:
+                logger.warning(f"⚠️ Rate limit atingido para {name}")
+                return False
+        return True
+
+    def _record_request(self, name: str):
+        """Registra requisição para quota e métricas"""
+        with self.lock:
+            self.rate_limiter.setdefault(name, []).append(time.time())
+            self.stats[name]['requests'] += 1
+
+    def handle_error(self, name: str, error: Exception):
+        """Contabiliza erro; quota excedida ou erros repetidos bloqueiam o provedor temporariamente"""
+        status_code = getattr(error, 'status_code', None)
+        if status_code in SOFT_STATUS:
+            logger.warning(f"⚠️ {name}: busca em processamento ({status_code})")
+            return
+
+        with self.lock:
+            state = self.providers[name]
+            state['error_count'] += 1
+            state['last_error'] = str(error)
+            self.stats[name]['errors'] += 1
+
+            if getattr(error, 'quota_exceeded', False):
+                # 403 e erros de quota da API duram mais que um 429
+                block = 3600 if status_code == 429 else 86400
+                state['quota_reset'] = time.time() + block
+                logger.warning(f"⚠️ Quota de {name} excedida ({error}) - bloqueado por {block // 3600}h")
+            elif state['error_count'] >= self.max_errors:
+                state['quota_reset'] = time.time() + 3600
+                logger.error(f"❌ Provedor {name} desabilitado temporariamente (muitos erros)")
+            else:
+                logger.error(f"❌ Erro em {name}: {error}")
+
+    def get_provider_status(self) -> Dict[str, Any]:
+        """Retorna status detalhado dos provedores"""
+        status = {}
+        with self.lock:
+            for name, state in self.providers.items():
+                status[name] = {
+                    'enabled': state['enabled'],
+                    'priority': state['priority'],
+                    'error_count': state['error_count'],
+                    'last_error': state['last_error'],
+                    'rate_limited': (state['quota_reset'] or 0) > time.time(),
+                    'requests_today': len(self.rate_limiter.get(name, [])),
+                    'rate_limit': state['rate_limit'],
+                    'rate_window': state['rate_window'],
+                    'avg_latency': state['avg_latency'],
+                    'late_count': state['late_count'],
+                    'adapter_loaded': name in self.adapters,
+                    **self.stats[name]
+                }
+        return status
+
+    def reset_provider_errors(self, name: Optional[str] = None):
+        """Reset contadores de erro e bloqueios de quota"""
+        with self.lock:
+            for provider_name in ([name] if name else list(self.providers)):
+                state = self.providers.get(provider_name)
+                if state is None:
+                    continue
+                state['error_count'] = 0
+                state['quota_reset'] = None
+                state['enabled'] = all(os.getenv(var) for var in self.configs[provider_name]['required_env'])
+        logger.info(f"🔄 Reset erros do provedor: {name}" if name else "🔄 Reset erros de todos os provedores")
+
+# Instância global
+search_provider_registry = SearchProviderRegistry()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Serper Search Adapter
+"""
+
+import os
+import logging
+from typing import Dict, List, Any
+
+from services.search_providers.base import SearchProviderAdapter, SearchProviderError
+
+logger = logging.getLogger(__name__)
+
+class SerperSearchAdapter(SearchProviderAdapter):
+    """Serper API (resultados do Google)"""
+
+    name = 'serper'
+    url = "https://google.serper.dev/search"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Busca na API do Serper"""
+        api_key = os.getenv('SERPER_API_KEY')
+        if not api_key or len(api_key) < 30:
+            raise SearchProviderError("SERPER_API_KEY não configurada ou inválida", quota_exceeded=True)
+
+        headers = {
+            **self.headers(),
+            'X-API-KEY': api_key,
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            'q': query,
+            'gl': 'br',
+            'hl': 'pt',
+            'num': max_results,
+            'autocorrect': True,
+            'page': 1
+        }
+
+        data = self._request('POST', self.url, json=payload, headers=headers).json()
+
+        return [
+            {
+                'title': item.get('title', ''),
+                'url': item.get('link', ''),
+                'snippet': item.get('snippet', '')
+            }
+            for item in data.get('organic', [])
+            if item.get('link') and item.get('title')
+        ]
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Yahoo Search Adapter
+"""
+
+import logging
+from typing import Dict, List, Any
+
+from services.search_providers.base import SearchProviderAdapter
+from services.serp_parser import serp_parser
+
+logger = logging.getLogger(__name__)
+
+class YahooSearchAdapter(SearchProviderAdapter):
+    """Yahoo Brasil via scraping da página de resultados"""
+
+    name = 'yahoo'
+    url = "https://br.search.yahoo.com/search"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Busca no Yahoo e interpreta a SERP"""
+        response = self._request('GET', self.url, params={'p': query})
+        return serp_parser.parse('yahoo', response.content, max_results)
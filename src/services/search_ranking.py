@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Search Result Ranking
+Fusão de rankings entre provedores com reputação de domínio e relevância da query
+"""
+
+import os
+import re
+import logging
+import unicodedata
+from typing import Dict, List, Any
+from urllib.parse import urlparse
+
+from services.robust_content_extractor import robust_content_extractor
+from services.negative_cache import negative_cache
+from services.url_resolver import url_resolver
+
+logger = logging.getLogger(__name__)
+
+# Reputação de domínios (0.0 a 1.0) para pesquisa de mercado no Brasil
+DOMAIN_REPUTATION = {
+    'ibge.gov.br': 1.0,
+    'sebrae.com.br': 0.95,
+    'bcb.gov.br': 0.95,
+    'valor.globo.com': 0.9,
+    'exame.com': 0.85,
+    'estadao.com.br': 0.85,
+    'folha.uol.com.br': 0.85,
+    'infomoney.com.br': 0.85,
+    'g1.globo.com': 0.8,
+    'forbes.com.br': 0.8,
+    'mckinsey.com': 0.85,
+    'statista.com': 0.8,
+    'abcomm.org': 0.8,
+    'ecommercebrasil.com.br': 0.75,
+    'meioemensagem.com.br': 0.75,
+    'rockcontent.com': 0.65,
+    'wikipedia.org': 0.6,
+    # Redes sociais e agregadores raramente rendem conteúdo extraível
+    'facebook.com': 0.1,
+    'instagram.com': 0.1,
+    'tiktok.com': 0.1,
+    'twitter.com': 0.1,
+    'x.com': 0.1,
+    'pinterest.com': 0.05,
+    'youtube.com': 0.15,
+    'linkedin.com': 0.2
+}
+
+# Reputação por sufixo quando o domínio não está na tabela
+SUFFIX_REPUTATION = {
+    '.gov.br': 0.9,
+    '.edu.br': 0.8,
+    '.gov': 0.85,
+    '.edu': 0.75,
+    '.org.br': 0.65,
+    '.org': 0.6
+}
+
+DEFAULT_REPUTATION = 0.5
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na',
+    'nos', 'nas', 'para', 'por', 'com', 'um', 'uma', 'que', 'the', 'of', 'and', 'in', 'to'
+}
+
+class SearchResultRanker:
+    """Ranqueia resultados de múltiplos provedores"""
+
+    def __init__(self):
+        """Inicializa ranqueador"""
+        self.rrf_k = int(os.getenv('SEARCH_RRF_K', 60))
+        self.weights = {
+            'rrf': float(os.getenv('SEARCH_RANK_WEIGHT_RRF', 0.4)),
+            'overlap': float(os.getenv('SEARCH_RANK_WEIGHT_OVERLAP', 0.3)),
+            'reputation': float(os.getenv('SEARCH_RANK_WEIGHT_REPUTATION', 0.15)),
+            'extraction': float(os.getenv('SEARCH_RANK_WEIGHT_EXTRACTION', 0.15))
+        }
+
+    def rank(self, query: str, provider_results: Dict[str, List[Any]]) -> List[Any]:
+        """
+        Funde listas de resultados por provedor (reciprocal rank fusion) e
+        reordena pela pontuação final, preenchendo relevance_score.
+        """
+        fused = {}  # url efetiva -> {'result': ..., 'rrf': ...}
+
+        for provider_name, results in provider_results.items():
+            for position, result in enumerate(results, start=1):
+                if not result.url:
+                    continue
+                # Redirecionamentos do Bing/Google apontam para a mesma página que a URL direta
+                effective_url = self._effective_url(result.url)
+                entry = fused.setdefault(effective_url, {'result': result, 'rrf': 0.0})
+                entry['rrf'] += 1.0 / (self.rrf_k + position)
+
+        if not fused:
+            return []
+
+        query_terms = self._terms(query)
+        max_rrf = max(entry['rrf'] for entry in fused.values())
+
+        ranked = []
+        for url, entry in fused.items():
+            result = entry['result']
+            domain = self._domain(url)
+
+            components = {
+                'rrf': entry['rrf'] / max_rrf,
+                'overlap': self._query_overlap(query_terms, result.title, result.snippet),
+                'reputation': self._reputation(domain),
+                'extraction': self._extraction_success(domain)
+            }
+            score = sum(self.weights[name] * value for name, value in components.items())
+
+            # URLs no cache negativo vão para o fim da lista
+            if negative_cache.check(url, count=False):
+                score *= 0.1
+
+            result.relevance_score = round(score, 4)
+            ranked.append(result)
+
+        ranked.sort(key=lambda result: result.relevance_score, reverse=True)
+        return ranked
+
+    def _effective_url(self, url: str) -> str:
+        """Decodifica redirecionamentos de buscadores (sem seguir encurtadores)"""
+        if 'bing.com/ck/a' in url or 'url?q=' in url:
+            return url_resolver.resolve_redirect_url(url)
+        return url
+
+    def _terms(self, text: str) -> set:
+        """Termos normalizados (sem acento e sem stopwords)"""
+        normalized = unicodedata.normalize('NFKD', (text or '').lower())
+        normalized = ''.join(char for char in normalized if not unicodedata.combining(char))
+        return {term for term in re.findall(r'\w+', normalized) if len(term) > 2 and term not in STOPWORDS}
+
+    def _query_overlap(self, query_terms: set, title: str, snippet: str) -> float:
+        """Fração dos termos da query presentes no título (peso 2) e snippet (peso 1)"""
+        if not query_terms:
+            return 0.0
+        title_hits = len(query_terms & self._terms(title))
+        snippet_hits = len(query_terms & self._terms(snippet))
+        return (2 * title_hits + snippet_hits) / (3 * len(query_terms))
+
+    def _domain(self, url: str) -> str:
+        """Domínio normalizado"""
+        domain = urlparse(url).netloc.lower().split(':')[0]
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _reputation(self, domain: str) -> float:
+        """Reputação do domínio pela tabela, pelo domínio pai ou pelo sufixo"""
+        parts = domain.split('.')
+        for i in range(len(parts) - 1):
+            candidate = '.'.join(parts[i:])
+            if candidate in DOMAIN_REPUTATION:
+                return DOMAIN_REPUTATION[candidate]
+
+        for suffix, reputation in SUFFIX_REPUTATION.items():
+            if domain.endswith(suffix):
+                return reputation
+
+        return DEFAULT_REPUTATION
+
+    def _extraction_success(self, domain: str) -> float:
+        """Sucesso histórico de extração no domínio (neutro sem histórico)"""
+        rate = robust_content_extractor.router.domain_success_rate(domain)
+        return 0.5 if rate is None else rate
+
+# Instância global
+search_result_ranker = SearchResultRanker()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - SERP Parser
+Parser compartilhado de páginas de resultados (Bing, DuckDuckGo, Yahoo, Google News)
+com lxml e seletores XPath pré-compilados por buscador
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Union
+from urllib.parse import urlparse, parse_qs
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+logger = logging.getLogger(__name__)
+
+def _has_class(name: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS .classe"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Seletores por buscador, em ordem de preferência. 'items' usa o primeiro
+# seletor que encontrar resultados; 'title', 'link' e 'snippet' são relativos ao item
+# e podem retornar elementos ou nós de texto.
+ENGINE_SELECTORS = {
+    'bing': {
+        'items': [
+            f"//li[{_has_class('b_algo')}]",
+            f"//*[{_has_class('b_algo')}]",
+            "//li[contains(@class, 'algo')]",
+            f"//*[{_has_class('b_webResult')}]"
+        ],
+        'title': [
+            ".//h2",
+            f".//*[{_has_class('b_title')}]//a[@href]",
+            ".//a[@href]"
+        ],
+        'link': [
+            ".//h2//a/@href",
+            f".//*[{_has_class('b_title')}]//a/@href",
+            ".//a/@href"
+        ],
+        'snippet': [
+            f".//*[{_has_class('b_caption')}]//p",
+            ".//p",
+            f".//*[{_has_class('b_snippet')}]",
+            ".//*[contains(@class, 'caption')]"
+        ],
+        'require_url': True
+    },
+    'duckduckgo': {
+        'items': [
+            f"//div[{_has_class('result')} and not({_has_class('result--ad')})]",
+            f"//*[{_has_class('web-result')}]",
+            f"//*[{_has_class('results_links')}]",
+            "//div[contains(@class, 'result')]"
+        ],
+        'title': [
+            f".//a[{_has_class('result__a')}]",
+            f".//a[{_has_class('result__title')}]",
+            ".//h2//a",
+            ".//a[contains(@href, 'uddg')]"
+        ],
+        'link': [
+            f".//a[{_has_class('result__a')}]/@href",
+            f".//a[{_has_class('result__title')}]/@href",
+            ".//h2//a/@href",
+            ".//a[contains(@href, 'uddg')]/@href"
+        ],
+        'snippet': [
+            f".//*[{_has_class('result__snippet')}]",
+            f".//*[{_has_class('snippet')}]",
+            ".//p"
+        ],
+        'require_url': True
+    },
+    'yahoo': {
+        'items': [
+            f"//div[{_has_class('Sr')}]",
+            f"//div[{_has_class('algo')}]"
+        ],
+        'title': [
+            ".//h3//a/text()",
+            ".//h3"
+        ],
+        'link': [
+            ".//h3//a/@href"
+        ],
+        'snippet': [
+            f".//span[{_has_class('fz-ms')}]",
+            f".//*[{_has_class('compText')}]//p",
+            f".//*[{_has_class('compText')}]"
+        ],
+        'require_url': True
+    },
+    'google_news': {
+        'items': [
+            "//h3 | //h4"
+        ],
+        'title': [
+            "self::*"
+        ],
+        'link': [
+            ".//a/@href",
+            "ancestor::a[1]/@href"
+        ],
+        'snippet': [],
+        'require_url': False
+    }
+}
+
+def _compile_engine_selectors(selectors: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Pré-compila os seletores de todos os buscadores em objetos XPath reutilizáveis"""
+    if not HAS_LXML:
+        return {}
+    compiled = {}
+    for engine, spec in selectors.items():
+        compiled[engine] = {
+            field: [etree.XPath(expression) for expression in spec[field]]
+            for field in ('items', 'title', 'link', 'snippet')
+        }
+        compiled[engine]['require_url'] = spec['require_url']
+    return compiled
+
+COMPILED_ENGINE_SELECTORS = _compile_engine_selectors(ENGINE_SELECTORS)
+
+class SerpParser:
+    """Extrai título, URL e snippet de páginas de resultados de busca"""
+
+    def __init__(self):
+        """Inicializa parser"""
+        self.lock = threading.Lock()
+        self.stats = {}  # buscador -> {'pages', 'results', 'total_time'}
+
+        if not HAS_LXML:
+            logger.warning("⚠️ lxml não instalado - parser de SERP indisponível")
+
+    def parse(self, engine: str, content: Union[str, bytes], max_results: int = 10) -> List[Dict[str, Any]]:
+        """
+        Extrai resultados da página do buscador.
+        Retorna lista de dicts com title, url, snippet e position.
+        """
+        compiled = COMPILED_ENGINE_SELECTORS.get(engine)
+        if compiled is None:
+            if HAS_LXML:
+                logger.error(f"❌ Buscador sem seletores de SERP: {engine}")
+            return []
+        if not content:
+            return []
+
+        start_time = time.time()
+        results = []
+
+        try:
+            tree = lxml_html.document_fromstring(content)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning(f"⚠️ SERP {engine} não pôde ser interpretada: {e}")
+            return []
+
+        items = []
+        for xpath in compiled['items']:
+            items = xpath(tree)
+            if items:
+                break
+
+        seen_urls = set()
+        for item in items:
+            if len(results) >= max_results:
+                break
+
+            title = self._first_text(compiled['title'], item)
+
+            url = self._normalize_url(engine, self._first(compiled['link'], item) or '')
+            if not title or (compiled['require_url'] and not url.startswith('http')):
+                continue
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+
+            results.append({
+                'title': title,
+                'url': url,
+                'snippet': self._first_text(compiled['snippet'], item),
+                'position': len(results) + 1
+            })
+
+        self._record(engine, len(results), time.time() - start_time)
+        return results
+
+    def _first(self, xpaths: List[Any], item) -> Optional[Any]:
+        """Primeiro nó encontrado pela lista de seletores"""
+        for xpath in xpaths:
+            found = xpath(item)
+            if found:
+                return found[0]
+        return None
+
+    def _first_text(self, xpaths: List[Any], item) -> str:
+        """Texto do primeiro seletor com resultado, com espaços normalizados"""
+        for xpath in xpaths:
+            found = xpath(item)
+            if found:
+                if isinstance(found[0], str):
+                    text = ' '.join(found)
+                else:
+                    text = ''.join(found[0].itertext())
+                return ' '.join(text.split())
+        return ''
+
+    def _normalize_url(self, engine: str, url: str) -> str:
+        """Decodifica redirecionamentos do próprio buscador (DuckDuckGo /l/?uddg=)"""
+        url = str(url).strip()
+        if engine == 'duckduckgo' and 'uddg=' in url:
+            query = parse_qs(urlparse(url).query)
+            if 'uddg' in query:
+                return query['uddg'][0]
+        if url.startswith('//'):
+            return f"https:{url}"
+        return url
+
+    def _record(self, engine: str, results: int, elapsed: float):
+        """Atualiza estatísticas de parse por buscador"""
+        with self.lock:
+            stats = self.stats.setdefault(engine, {'pages': 0, 'results': 0, 'total_time': 0.0})
+            stats['pages'] += 1
+            stats['results'] += results
+            stats['total_time'] += elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de parse (tempo médio por página em ms)"""
+        with self.lock:
+            return {
+                engine: {
+                    **stats,
+                    'avg_parse_ms': round(stats['total_time'] / stats['pages'] * 1000, 2) if stats['pages'] else 0.0
+                }
+                for engine, stats in self.stats.items()
+            }
+
+# Instância global
+serp_parser = SerpParser()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Stats Service
+Estatísticas e saúde do banco com cache em memória de TTL curto e
+atualização em segundo plano, para que painéis consultando /api/stats e
+/api/status não gerem consultas ao banco a cada requisição
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional, Any, Callable
+
+from services.analysis_backend import analysis_backend
+
+logger = logging.getLogger(__name__)
+
+class StatsService:
+    """
+    Cache stale-while-revalidate das estatísticas do backend.
+    Dentro do TTL a resposta sai da memória; vencida, o valor anterior é
+    devolvido e uma única thread atualiza em segundo plano. Só espera pelo
+    banco a primeira chamada ou quando o valor passou de max_stale.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.ttl = {
+            'stats': float(os.getenv('STATS_CACHE_TTL', 30)),
+            'health': float(os.getenv('STATS_HEALTH_TTL', 15))
+        }
+        self.max_stale = float(os.getenv('STATS_CACHE_MAX_STALE', 300))
+        self.loaders: Dict[str, Callable[[], Any]] = {
+            'stats': self.backend.get_stats,
+            'health': self.backend.test_connection
+        }
+        self.entries = {}  # nome -> {'value', 'updated_at'}
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.load_locks = {name: threading.Lock() for name in self.loaders}
+        self.stats = {'hits': 0, 'stale_hits': 0, 'loads': 0, 'background_refreshes': 0, 'errors': 0}
+
+    def _load(self, name: str) -> Dict[str, Any]:
+        """Consulta o backend e guarda o resultado (chamar com load_locks[name])"""
+        entry = {'value': self.loaders[name](), 'updated_at': time.time()}
+        with self.lock:
+            self.entries[name] = entry
+            self.stats['loads'] += 1
+        return entry
+
+    def _refresh_async(self, name: str):
+        """Atualiza uma entrada em segundo plano (no máximo uma thread por entrada)"""
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+            self.stats['background_refreshes'] += 1
+
+        def refresh():
+            try:
+                with self.load_locks[name]:
+                    self._load(name)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"❌ Erro ao atualizar estatísticas ({name}): {str(e)}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(name)
+
+        threading.Thread(target=refresh, name=f'stats_refresh_{name}', daemon=True).start()
+
+    def _get(self, name: str) -> Dict[str, Any]:
+        """Entrada do cache ({'value', 'updated_at'}), atualizando se preciso"""
+        entry = self.entries.get(name)
+        age = time.time() - entry['updated_at'] if entry else None
+
+        if entry is not None and age <= self.ttl[name]:
+            self.stats['hits'] += 1
+            return entry
+
+        if entry is not None and age <= self.max_stale:
+            self.stats['stale_hits'] += 1
+            self._refresh_async(name)
+            return entry
+
+        # Sem valor utilizável: chamadas concorrentes esperam a mesma consulta
+        with self.load_locks[name]:
+            entry = self.entries.get(name)
+            if entry is not None and time.time() - entry['updated_at'] <= self.ttl[name]:
+                self.stats['hits'] += 1
+                return entry
+            return self._load(name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do banco (cópia, com a idade do cache)"""
+        entry = self._get('stats')
+        return {**entry['value'], 'cache_age': round(time.time() - entry['updated_at'], 1)}
+
+    def is_connected(self) -> bool:
+        """Resultado recente de test_connection"""
+        return bool(self._get('health')['value'])
+
+    def invalidate(self, name: Optional[str] = None):
+        """Descarta o cache (todas as entradas ou uma)"""
+        with self.lock:
+            if name is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(name, None)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache"""
+        now = time.time()
+        return {
+            **self.stats,
+            'ttl': self.ttl,
+            'max_stale': self.max_stale,
+            'ages': {name: round(now - entry['updated_at'], 1) for name, entry in self.entries.items()}
+        }
+
+# Instância global
+stats_service = StatsService(analysis_backend)
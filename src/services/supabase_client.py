@@ -8,11 +8,16 @@ Cliente configurado para integração com Supabase
 import os
 import logging
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from supabase import create_client, Client
 from datetime import datetime
 import json
 
+from services.analysis_record import (
+    LIST_COLUMNS, build_analysis_row, split_blobs, encode_blob, decode_blob,
+    assemble_analysis, project_analysis, build_file_row, stats_from_rows
+)
+
 logger = logging.getLogger(__name__)
 
 class SupabaseClient:
@@ -64,60 +69,47 @@ class SupabaseClient:
             logger.error(f"❌ Erro ao testar conexão Supabase: {str(e)}")
             return False
     
-    def create_analysis(self, analysis_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Cria nova análise no Supabase"""
+    def create_analysis(
+        self,
+        analysis_data: Dict[str, Any],
+        analysis_id: Optional[str] = None,
+        validate_key: bool = True,
+        max_retries: int = 3,
+        created_at: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cria nova análise no Supabase.
+        Com analysis_id, o ID é usado como chave primária e a gravação é um
+        upsert: reenviar a mesma análise não cria duplicatas. Sem created_at,
+        o upsert não envia a coluna e a data de criação remota é preservada.
+        """
         if not self.client:
             logger.warning("⚠️ Supabase não conectado")
             return None
         
         # Valida chave de API antes de tentar
-        if not self._validate_api_key():
+        if validate_key and not self._validate_api_key():
             logger.error("❌ Chave de API do Supabase inválida")
             return None
         
         try:
-            # Prepara dados para inserção
-            insert_data = {
-                'segmento': analysis_data.get('segmento', ''),
-                'produto': analysis_data.get('produto', ''),
-                'publico': analysis_data.get('publico', ''),
-                'preco': float(analysis_data.get('preco', 0)) if analysis_data.get('preco') else None,
-                'objetivo_receita': float(analysis_data.get('objetivo_receita', 0)) if analysis_data.get('objetivo_receita') else None,
-                'orcamento_marketing': float(analysis_data.get('orcamento_marketing', 0)) if analysis_data.get('orcamento_marketing') else None,
-                'prazo_lancamento': analysis_data.get('prazo_lancamento', ''),
-                'concorrentes': analysis_data.get('concorrentes', ''),
-                'dados_adicionais': analysis_data.get('dados_adicionais', ''),
-                'query': analysis_data.get('query', ''),
-                'status': analysis_data.get('status', 'completed'),
-                'avatar_data': analysis_data.get('avatar_ultra_detalhado'),
-                'positioning_data': analysis_data.get('escopo'),
-                'competition_data': analysis_data.get('analise_concorrencia_detalhada'),
-                'marketing_data': analysis_data.get('estrategia_palavras_chave'),
-                'metrics_data': analysis_data.get('metricas_performance_detalhadas'),
-                'funnel_data': analysis_data.get('funil_vendas_detalhado'),
-                'action_plan_data': analysis_data.get('plano_acao_detalhado'),
-                'insights_data': analysis_data.get('insights_exclusivos'),
-                'drivers_mentais_data': analysis_data.get('drivers_mentais_customizados'),
-                'provas_visuais_data': analysis_data.get('provas_visuais_instantaneas'),
-                'anti_objecao_data': analysis_data.get('sistema_anti_objecao'),
-                'pre_pitch_data': analysis_data.get('pre_pitch_invisivel'),
-                'predicoes_futuro_data': analysis_data.get('predicoes_futuro_completas'),
-                'pesquisa_web_data': analysis_data.get('pesquisa_web_massiva'),
-                'comprehensive_analysis': analysis_data,
-                'local_files_path': analysis_data.get('local_files_path'),
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            # Remove campos None
-            insert_data = {k: v for k, v in insert_data.items() if v is not None}
+            # Prepara dados para inserção (linha enxuta; blobs vão para analysis_blobs)
+            insert_data = build_analysis_row(analysis_data, analysis_id, created_at)
+            if analysis_id and not created_at:
+                insert_data.pop('created_at', None)
             
             # Insere no banco com retry
-            result = self._insert_with_retry(insert_data)
+            result = self._insert_with_retry(insert_data, max_retries, upsert=bool(analysis_id))
             
             if result.data:
-                logger.info(f"✅ Análise criada no Supabase com ID: {result.data[0]['id']}")
-                return result.data[0]
+                record = result.data[0]
+                
+                # pesquisa_web e o restante da análise vão comprimidos na tabela lateral;
+                # as seções já gravadas nas colunas não são repetidas
+                self.save_analysis_blobs(record['id'], split_blobs(analysis_data))
+                
+                logger.info(f"✅ Análise criada no Supabase com ID: {record['id']}")
+                return record
             else:
                 logger.error("❌ Erro ao criar análise no Supabase: resultado vazio")
                 return None
@@ -126,6 +118,51 @@ class SupabaseClient:
             logger.error(f"❌ Erro ao criar análise no Supabase: {str(e)}")
             return None
     
+    def upsert_analyses(
+        self,
+        analyses: List[Tuple[str, Dict[str, Any], Optional[str], List[Dict[str, Any]]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Upsert em lote de análises (id, dados, created_at, arquivos): uma
+        requisição para as linhas de analyses (uma por conjunto de colunas),
+        uma para os blobs e uma para os arquivos. Retorna ID -> registro e
+        levanta exceção em falha (o chamador pode reenviar uma a uma).
+        """
+        if not self.client or not analyses:
+            return {}
+        
+        # O PostgREST exige as mesmas chaves em todas as linhas de um upsert em lote
+        groups = {}
+        for analysis_id, analysis_data, created_at, _ in analyses:
+            row = build_analysis_row(analysis_data, analysis_id, created_at)
+            if not created_at:
+                row.pop('created_at', None)
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        
+        records = {}
+        for rows in groups.values():
+            result = self.client.table('analyses').upsert(rows, on_conflict='id').execute()
+            records.update({record['id']: record for record in result.data or []})
+        
+        blob_rows = [
+            {'analysis_id': analysis_id, 'kind': kind, **encode_blob(data)}
+            for analysis_id, analysis_data, _, _ in analyses if analysis_id in records
+            for kind, data in split_blobs(analysis_data).items() if data is not None
+        ]
+        if blob_rows:
+            self.client.table('analysis_blobs').upsert(blob_rows, on_conflict='analysis_id,kind').execute()
+        
+        file_rows = [
+            build_file_row(analysis_id, file_data)
+            for analysis_id, _, _, files in analyses if analysis_id in records
+            for file_data in files
+        ]
+        if file_rows:
+            self.client.table('analysis_files').upsert(file_rows, on_conflict='id').execute()
+        
+        logger.info(f"✅ {len(records)} análises enviadas ao Supabase em lote ({len(file_rows)} arquivos)")
+        return records
+    
     def _validate_api_key(self) -> bool:
         """Valida se a chave de API está funcionando"""
         try:
@@ -140,11 +177,13 @@ class SupabaseClient:
             # Outros erros podem ser temporários
             return True
     
-    def _insert_with_retry(self, insert_data: Dict[str, Any], max_retries: int = 3) -> Any:
+    def _insert_with_retry(self, insert_data: Dict[str, Any], max_retries: int = 3, upsert: bool = False) -> Any:
         """Insere dados com retry e backoff exponencial"""
         for attempt in range(max_retries):
             try:
-                result = self.client.table('analyses').insert(insert_data).execute()
+                table = self.client.table('analyses')
+                query = table.upsert(insert_data, on_conflict='id') if upsert else table.insert(insert_data)
+                result = query.execute()
                 return result
             except Exception as e:
                 error_str = str(e).lower()
@@ -160,35 +199,84 @@ class SupabaseClient:
                 else:
                     raise e
     
-    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
-        """Busca análise por ID"""
+    def get_analysis(
+        self,
+        analysis_id: str,
+        include_blobs: bool = True,
+        columns: Optional[Iterable[str]] = None,
+        blob_kinds: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca análise por ID.
+        include_blobs=True remonta pesquisa_web_data e comprehensive_analysis
+        a partir da tabela analysis_blobs. Com columns/blob_kinds (projeção)
+        só as colunas e os blobs pedidos são buscados.
+        """
         if not self.client:
             return None
         
         try:
-            result = self.client.table('analyses').select('*').eq('id', analysis_id).execute()
-            
-            if result.data:
-                return result.data[0]
+            if columns is not None:
+                selected = ', '.join(columns)
             else:
+                selected = '*' if include_blobs else ', '.join(LIST_COLUMNS)
+            result = self.client.table('analyses').select(selected).eq('id', analysis_id).execute()
+            
+            if not result.data:
                 return None
+            
+            record = result.data[0]
+            if columns is not None:
+                if blob_kinds:
+                    record = project_analysis(record, self.get_analysis_blobs(analysis_id, blob_kinds), blob_kinds)
+            elif include_blobs:
+                record = assemble_analysis(record, self.get_analysis_blobs(analysis_id))
+            
+            return record
                 
         except Exception as e:
             logger.error(f"❌ Erro ao buscar análise {analysis_id}: {str(e)}")
             return None
     
-    def list_analyses(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        """Lista análises com paginação"""
+    def list_analyses(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[Tuple[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lista análises (mais recentes primeiro). Com cursor = (created_at, id)
+        da última linha da página anterior, pagina por keyset em vez de offset.
+        Filtros: segmento, status, created_from (inclusivo), created_to (exclusivo).
+        """
         if not self.client:
             return []
         
         try:
-            result = self.client.table('analyses')\
-                .select('id, segmento, produto, status, created_at, updated_at, local_files_path')\
-                .order('created_at', desc=True)\
-                .range(offset, offset + limit - 1)\
-                .execute()
+            filters = filters or {}
+            query = self.client.table('analyses').select(', '.join(LIST_COLUMNS))
             
+            if filters.get('segmento'):
+                query = query.eq('segmento', filters['segmento'])
+            if filters.get('status'):
+                query = query.eq('status', filters['status'])
+            if filters.get('created_from'):
+                query = query.gte('created_at', filters['created_from'])
+            if filters.get('created_to'):
+                query = query.lt('created_at', filters['created_to'])
+            
+            query = query.order('created_at', desc=True).order('id', desc=True)
+            
+            if cursor:
+                created_at, last_id = cursor
+                query = query.or_(
+                    f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})'
+                ).limit(limit)
+            else:
+                query = query.range(offset, offset + limit - 1)
+            
+            result = query.execute()
             return result.data if result.data else []
             
         except Exception as e:
@@ -238,22 +326,18 @@ class SupabaseClient:
             return False
     
     def save_analysis_file(self, analysis_id: str, file_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Salva informações de arquivo de análise"""
+        """
+        Salva informações de arquivo de análise.
+        O ID do registro deriva da análise e do tipo do arquivo, então reenviar
+        o mesmo arquivo atualiza o registro em vez de duplicá-lo.
+        """
         if not self.client:
             return None
         
         try:
-            insert_data = {
-                'analysis_id': analysis_id,
-                'file_type': file_data.get('file_type'),
-                'file_name': file_data.get('file_name'),
-                'file_path': file_data.get('file_path'),
-                'file_size': file_data.get('file_size', 0),
-                'content_preview': file_data.get('content_preview', ''),
-                'created_at': datetime.now().isoformat()
-            }
+            insert_data = build_file_row(analysis_id, file_data)
             
-            result = self.client.table('analysis_files').insert(insert_data).execute()
+            result = self.client.table('analysis_files').upsert(insert_data, on_conflict='id').execute()
             
             if result.data:
                 logger.info(f"✅ Arquivo de análise salvo: {file_data.get('file_name')}")
@@ -266,6 +350,55 @@ class SupabaseClient:
             logger.error(f"❌ Erro ao salvar arquivo de análise: {str(e)}")
             return None
     
+    def save_analysis_files(self, analysis_id: str, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Salva os registros de arquivos de uma análise em uma única requisição"""
+        if not self.client or not files:
+            return []
+        
+        try:
+            rows = [build_file_row(analysis_id, file_data) for file_data in files]
+            
+            result = self.client.table('analysis_files').upsert(rows, on_conflict='id').execute()
+            logger.info(f"✅ {len(rows)} arquivos da análise {analysis_id} salvos")
+            return result.data or []
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar arquivos da análise {analysis_id}: {str(e)}")
+            raise
+    
+    def save_analysis_blobs(self, analysis_id: str, blobs: Dict[str, Any]):
+        """Grava blobs comprimidos da análise em uma única requisição"""
+        rows = [
+            {'analysis_id': analysis_id, 'kind': kind, **encode_blob(data)}
+            for kind, data in blobs.items() if data is not None
+        ]
+        if not rows:
+            return
+        
+        self.client.table('analysis_blobs').upsert(rows, on_conflict='analysis_id,kind').execute()
+        compressed = sum(len(row['data']) for row in rows)
+        raw = sum(row['raw_size'] for row in rows)
+        logger.info(f"📦 Blobs da análise {analysis_id}: {raw / 1024:.1f} KB -> {compressed / 1024:.1f} KB")
+    
+    def get_analysis_blobs(self, analysis_id: str, kinds: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Blobs descomprimidos da análise (tipo -> dados), opcionalmente só os tipos pedidos"""
+        try:
+            query = self.client.table('analysis_blobs')\
+                .select('kind, encoding, data')\
+                .eq('analysis_id', analysis_id)
+            if kinds:
+                query = query.in_('kind', list(kinds))
+            result = query.execute()
+            
+            return {
+                row['kind']: decode_blob(row['encoding'], row['data'])
+                for row in (result.data or [])
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar blobs da análise {analysis_id}: {str(e)}")
+            return {}
+    
     def get_analysis_files(self, analysis_id: str) -> List[Dict[str, Any]]:
         """Busca arquivos de uma análise"""
         if not self.client:
@@ -295,36 +428,32 @@ class SupabaseClient:
             }
         
         try:
-            # Total de análises
-            total_result = self.client.table('analyses').select('id', count='exact').execute()
-            total_analyses = total_result.count if total_result.count else 0
-            
-            # Análises por status
-            status_result = self.client.table('analyses')\
-                .select('status', count='exact')\
-                .execute()
-            
-            status_counts = {}
-            if status_result.data:
-                for item in status_result.data:
-                    status = item.get('status', 'unknown')
-                    status_counts[status] = status_counts.get(status, 0) + 1
-            
-            # Análises recentes (últimos 7 dias)
             from datetime import timedelta
             week_ago = (datetime.now() - timedelta(days=7)).isoformat()
             
+            # Agregação no servidor (GROUP BY status): uma ida ao banco, sem
+            # transferir a coluna status de todas as linhas
+            try:
+                result = self.client.rpc('analysis_stats', {'recent_since': week_ago}).execute()
+                return stats_from_rows(
+                    (item.get('status'), item.get('total', 0), item.get('recent', 0))
+                    for item in result.data or []
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Função analysis_stats indisponível, usando contagens simples: {str(e)}")
+            
+            # Sem a migração: só as contagens do total e dos últimos 7 dias
+            total_result = self.client.table('analyses').select('id', count='exact').limit(1).execute()
             recent_result = self.client.table('analyses')\
                 .select('id', count='exact')\
                 .gte('created_at', week_ago)\
+                .limit(1)\
                 .execute()
             
-            recent_count = recent_result.count if recent_result.count else 0
-            
             return {
-                'total_analyses': total_analyses,
-                'status_counts': status_counts,
-                'recent_analyses': recent_count,
+                'total_analyses': total_result.count or 0,
+                'status_counts': {},
+                'recent_analyses': recent_result.count or 0,
                 'timestamp': datetime.now().isoformat()
             }
             
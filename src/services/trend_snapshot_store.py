@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Trend Snapshot Store
+Snapshots persistentes de tendências por segmento, com janela de frescor
+e contagem de acessos para manter os segmentos populares aquecidos
+"""
+
+import os
+import time
+import json
+import sqlite3
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class TrendSnapshotStore:
+    """Armazena o último snapshot de tendências de cada segmento"""
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.db_path = os.path.join(cache_dir, "trend_snapshots.db")
+        self.ttl = float(os.getenv('TRENDS_SNAPSHOT_TTL', 86400))  # fresco por 1 dia
+        self.max_stale = float(os.getenv('TRENDS_SNAPSHOT_MAX_STALE', 7 * 86400))  # utilizável enquanto atualiza
+        self.snapshots = {}  # chave -> snapshot (memória)
+        self.lock = threading.Lock()
+        self.stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'updates': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+        self._load_snapshots()
+
+    def _init_database(self):
+        """Inicializa tabela SQLite dos snapshots"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS trend_snapshots (
+                        segment_key TEXT PRIMARY KEY,
+                        segmento TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        hits INTEGER NOT NULL DEFAULT 0,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar snapshots de tendências: {e}")
+
+    def _load_snapshots(self):
+        """Carrega snapshots persistidos para memória"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT segment_key, segmento, data, created_at, hits, last_access FROM trend_snapshots"
+                ).fetchall()
+            for segment_key, segmento, data, created_at, hits, last_access in rows:
+                self.snapshots[segment_key] = {
+                    'segmento': segmento,
+                    'data': json.loads(data),
+                    'created_at': created_at,
+                    'hits': hits,
+                    'last_access': last_access
+                }
+        except Exception as e:
+            logger.error(f"Erro ao carregar snapshots de tendências: {e}")
+
+    def _persist(self, segment_key: str, snapshot: Dict[str, Any]):
+        """Grava snapshot no SQLite"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO trend_snapshots "
+                    "(segment_key, segmento, data, created_at, hits, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (segment_key, snapshot['segmento'], json.dumps(snapshot['data'], ensure_ascii=False),
+                     snapshot['created_at'], snapshot['hits'], snapshot['last_access'])
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao salvar snapshot de tendências: {e}")
+
+    def _persist_access(self, segment_key: str, hits: int, last_access: float):
+        """Atualiza apenas a contagem de acessos"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "UPDATE trend_snapshots SET hits = ?, last_access = ? WHERE segment_key = ?",
+                    (hits, last_access, segment_key)
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao salvar acesso do snapshot: {e}")
+
+    def segment_key(self, segmento: str) -> str:
+        """Chave normalizada do segmento (minúsculas, sem acentos e espaços extras)"""
+        normalized = unicodedata.normalize('NFKD', (segmento or '').lower())
+        normalized = ''.join(char for char in normalized if not unicodedata.combining(char))
+        return ' '.join(normalized.split())
+
+    def get(self, segmento: str, count_access: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Retorna {'data', 'age', 'stale'} do snapshot do segmento ou None se não
+        existir ou estiver velho demais para ser servido. Conta o acesso, salvo
+        com count_access=False (releitura do mesmo pedido).
+        """
+        segment_key = self.segment_key(segmento)
+        now = time.time()
+
+        with self.lock:
+            snapshot = self.snapshots.get(segment_key)
+            if snapshot is None or now - snapshot['created_at'] > self.max_stale:
+                if count_access:
+                    self.stats['misses'] += 1
+                return None
+
+            age = now - snapshot['created_at']
+            stale = age > self.ttl
+            data = json.loads(json.dumps(snapshot['data']))  # cópia independente
+            if not count_access:
+                return {'data': data, 'age': age, 'stale': stale}
+
+            snapshot['hits'] += 1
+            snapshot['last_access'] = now
+            hits = snapshot['hits']
+            self.stats['stale_hits' if stale else 'fresh_hits'] += 1
+
+        self._persist_access(segment_key, hits, now)
+        return {'data': data, 'age': age, 'stale': stale}
+
+    def set(self, segmento: str, data: Dict[str, Any]):
+        """Salva novo snapshot do segmento preservando a contagem de acessos"""
+        segment_key = self.segment_key(segmento)
+        now = time.time()
+
+        with self.lock:
+            previous = self.snapshots.get(segment_key)
+            snapshot = {
+                'segmento': segmento,
+                'data': data,
+                'created_at': now,
+                'hits': previous['hits'] if previous else 0,
+                'last_access': previous['last_access'] if previous else now
+            }
+            self.snapshots[segment_key] = snapshot
+            self.stats['updates'] += 1
+
+        self._persist(segment_key, snapshot)
+
+    def popular_segments(self, limit: int = 10, within: float = 7 * 86400) -> List[Dict[str, Any]]:
+        """Segmentos mais acessados recentemente, com a idade do snapshot"""
+        now = time.time()
+        with self.lock:
+            candidates = [
+                {'segmento': snapshot['segmento'], 'hits': snapshot['hits'], 'age': now - snapshot['created_at']}
+                for snapshot in self.snapshots.values()
+                if now - snapshot['last_access'] <= within
+            ]
+        candidates.sort(key=lambda item: item['hits'], reverse=True)
+        return candidates[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas dos snapshots"""
+        now = time.time()
+        with self.lock:
+            fresh = sum(1 for snapshot in self.snapshots.values() if now - snapshot['created_at'] <= self.ttl)
+            return {
+                **self.stats,
+                'segments': len(self.snapshots),
+                'fresh_segments': fresh,
+                'ttl': self.ttl
+            }
+
+    def clear(self):
+        """Remove todos os snapshots"""
+        with self.lock:
+            self.snapshots.clear()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM trend_snapshots")
+                conn.commit()
+            logger.info("🧹 Snapshots de tendências limpos")
+        except Exception as e:
+            logger.error(f"Erro ao limpar snapshots de tendências: {e}")
+
+# Instância global
+trend_snapshot_store = TrendSnapshotStore()
@@ -15,6 +15,8 @@ from services.ai_manager import ai_manager
 from services.production_search_manager import production_search_manager
 from services.robust_content_extractor import robust_content_extractor
 from services.content_quality_validator import content_quality_validator
+from services.url_resolver import url_resolver
+from services.negative_cache import negative_cache, REASON_QUALITY
 from services.mental_drivers_architect import mental_drivers_architect
 from services.visual_proofs_generator import visual_proofs_generator
 from services.anti_objection_system import anti_objection_system
@@ -383,6 +385,7 @@ class UltraDetailedAnalysisEngine:
         extracted_content = []
         total_content_length = 0
         successful_extractions = 0
+        processed_urls = set()  # URLs resolvidas já extraídas nesta análise
 
         for i, query in enumerate(queries):
             if progress_callback:
@@ -401,9 +404,23 @@ class UltraDetailedAnalysisEngine:
                 # Extrai conteúdo das URLs encontradas
                 logger.info(f"📄 Extraindo conteúdo de {len(search_results)} URLs...")
 
-                for result in search_results[:8]:  # Limita para performance
+                # Resolve redirecionamentos do lote de uma vez (com cache)
+                resolved_urls = url_resolver.resolve_batch([r['url'] for r in search_results])
+
+                # Pula páginas conhecidamente ruins (cache negativo) e usa os próximos candidatos
+                candidates = []
+                for result in search_results:
+                    resolved_url = resolved_urls.get(result['url'], result['url'])
+                    if resolved_url in processed_urls or negative_cache.should_skip(resolved_url):
+                        continue
+                    processed_urls.add(resolved_url)
+                    candidates.append((result, resolved_url))
+                    if len(candidates) >= 8:  # Limita para performance
+                        break
+
+                for result, resolved_url in candidates:
                     try:
-                        content = robust_content_extractor.extract_content(result['url'])
+                        content = robust_content_extractor.extract_content(resolved_url, resolve_url=False)
                         
                         if content:
                             # Valida qualidade do conteúdo
@@ -423,6 +440,7 @@ class UltraDetailedAnalysisEngine:
                                 logger.info(f"✅ Conteúdo extraído e validado: {len(content)} chars, qualidade {validation['score']:.1f}%")
                             else:
                                 logger.warning(f"⚠️ Conteúdo rejeitado por baixa qualidade: {validation['reason']}")
+                                negative_cache.record_failure(resolved_url, REASON_QUALITY)
                         else:
                             logger.warning(f"⚠️ Nenhum conteúdo extraído de {result['url']}")
                             
@@ -430,8 +448,6 @@ class UltraDetailedAnalysisEngine:
                         logger.error(f"❌ Erro ao extrair {result['url']}: {str(e)}")
                         continue
 
-                time.sleep(1)  # Rate limiting
-
             except Exception as e:
                 logger.error(f"❌ Erro na query '{query}': {str(e)}")
                 continue
@@ -10,25 +10,197 @@ import logging
 import base64
 import requests
 import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import parse_qs, urlparse, unquote
-from typing import Optional
+from typing import Dict, List, Optional, Any
 
 logger = logging.getLogger(__name__)
 
 class URLResolver:
     """Resolvedor robusto de URLs de redirecionamento"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: str = "cache"):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
         self.timeout = 10
         
+        # Cache de resoluções: LRU em memória + SQLite em disco
+        self.cache_enabled = os.getenv('URL_RESOLVER_CACHE_ENABLED', 'true').lower() == 'true'
+        self.memory_cache_size = int(os.getenv('URL_RESOLVER_CACHE_SIZE', 5000))
+        self.network_ttl = int(os.getenv('URL_RESOLVER_NETWORK_TTL', 30 * 86400))  # segundos
+        self.db_path = os.path.join(cache_dir, "url_resolutions.db")
+        self.memory_cache = OrderedDict()
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'network_resolutions': 0
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_database()
+    
+    def _init_database(self):
+        """Inicializa tabela SQLite de resoluções"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS url_resolutions (
+                        url TEXT PRIMARY KEY,
+                        resolved_url TEXT NOT NULL,
+                        method TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cache de URLs: {e}")
+    
+    def needs_resolution(self, url: str) -> bool:
+        """Verifica se a URL é redirecionamento ou encurtador"""
+        return bool(url) and (
+            ("bing.com/ck/a" in url and "u=a1" in url) or
+            "/url?q=" in url or
+            ("google." in url and "url?q=" in url) or
+            self._is_short_url(url)
+        )
+    
     def resolve_redirect_url(self, url: str) -> str:
         """
         Resolve URLs de redirecionamento do Bing, Google e encurtadores.
+        Resultados ficam em cache (memória e disco) para resolver cada URL uma única vez.
         """
+        if not self.needs_resolution(url):
+            return url
+        
+        cached = self._get_cached(url)
+        if cached:
+            return cached
+        
+        with self.lock:
+            self.stats['misses'] += 1
+        
+        resolved, method = self._resolve_uncached(url)
+        self._set_cached(url, resolved, method)
+        return resolved
+    
+    def resolve_batch(self, urls: List[str], max_workers: int = 8) -> Dict[str, str]:
+        """Resolve lista de URLs em paralelo (cada URL distinta uma única vez)"""
+        results = {}
+        pending = []
+        
+        for url in dict.fromkeys(urls):
+            if not self.needs_resolution(url):
+                results[url] = url
+                continue
+            cached = self._get_cached(url)
+            if cached:
+                results[url] = cached
+            else:
+                pending.append(url)
+        
+        if pending:
+            logger.info(f"🔄 Resolvendo {len(pending)} URLs em lote")
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                for url, resolved in zip(pending, executor.map(self.resolve_redirect_url, pending)):
+                    results[url] = resolved
+        
+        return results
+    
+    def _get_cached(self, url: str) -> Optional[str]:
+        """Busca resolução no LRU em memória e depois no SQLite"""
+        if not self.cache_enabled:
+            return None
+        
+        with self.lock:
+            if url in self.memory_cache:
+                self.memory_cache.move_to_end(url)
+                self.stats['memory_hits'] += 1
+                return self.memory_cache[url]
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT resolved_url, method, created_at FROM url_resolutions WHERE url = ?",
+                    (url,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"Erro ao consultar cache de URLs: {e}")
+            return None
+        
+        if not row:
+            return None
+        
+        resolved, method, created_at = row
+        # Decodificações determinísticas não expiram; redirects de rede sim
+        if method == 'network' and time.time() - created_at > self.network_ttl:
+            return None
+        
+        with self.lock:
+            self.stats['disk_hits'] += 1
+            self._remember(url, resolved)
+        return resolved
+    
+    def _set_cached(self, url: str, resolved: str, method: str):
+        """Armazena resolução em memória e, se bem-sucedida, em disco"""
+        if not self.cache_enabled:
+            return
+        
+        with self.lock:
+            self._remember(url, resolved)
+        
+        # Falhas ficam só em memória para serem tentadas de novo em outra execução
+        if method == 'failed':
+            return
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO url_resolutions (url, resolved_url, method, created_at) VALUES (?, ?, ?, ?)",
+                    (url, resolved, method, time.time())
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Erro ao salvar cache de URLs: {e}")
+    
+    def _remember(self, url: str, resolved: str):
+        """Insere no LRU em memória (chamado com lock)"""
+        self.memory_cache[url] = resolved
+        self.memory_cache.move_to_end(url)
+        while len(self.memory_cache) > self.memory_cache_size:
+            self.memory_cache.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache de resolução"""
+        with self.lock:
+            return {**self.stats, 'memory_entries': len(self.memory_cache)}
+    
+    def clear_cache(self):
+        """Limpa cache de resoluções"""
+        with self.lock:
+            self.memory_cache.clear()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM url_resolutions")
+                conn.commit()
+            logger.info("🧹 Cache de resolução de URLs limpo")
+        except Exception as e:
+            logger.error(f"Erro ao limpar cache de URLs: {e}")
+    
+    def _resolution_method(self) -> str:
+        """Indica se a última resolução desta thread precisou de rede"""
+        return 'network' if getattr(self._local, 'used_network', False) else 'decoded'
+    
+    def _resolve_uncached(self, url: str) -> tuple:
+        """Resolve URL sem cache. Retorna (url_resolvida, método)"""
+        self._local.used_network = False
         try:
             original_url = url
             
@@ -38,7 +210,7 @@ class URLResolver:
                 resolved = self._resolve_bing_url(url)
                 if resolved and resolved != url and resolved.startswith('http'):
                     logger.info(f"✅ URL Bing resolvida: {resolved}")
-                    return resolved
+                    return resolved, self._resolution_method()
             
             # Google: URLs com /url?q=
             elif "/url?q=" in url or "google." in url and "url?q=" in url:
@@ -46,7 +218,7 @@ class URLResolver:
                 resolved = self._resolve_google_url(url)
                 if resolved and resolved != url and resolved.startswith('http'):
                     logger.info(f"✅ URL Google resolvida: {resolved}")
-                    return resolved
+                    return resolved, self._resolution_method()
             
             # Encurtadores conhecidos
             elif self._is_short_url(url):
@@ -54,14 +226,14 @@ class URLResolver:
                 resolved = self._resolve_short_url(url)
                 if resolved and resolved != url and resolved.startswith('http'):
                     logger.info(f"✅ URL encurtada resolvida: {resolved}")
-                    return resolved
+                    return resolved, 'network'
             
-            # URL já está limpa
-            return url
+            # Não foi possível resolver
+            return url, 'failed'
             
         except Exception as e:
             logger.error(f"❌ Erro ao resolver URL {url}: {str(e)}")
-            return url  # Retorna a original se falhar
+            return url, 'failed'  # Retorna a original se falhar
     
     def _resolve_bing_url(self, url: str) -> str:
         """Resolve URLs específicas do Bing com decodificação Base64 dupla"""
@@ -164,7 +336,10 @@ class URLResolver:
             'bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'short.link',
             'ow.ly', 'buff.ly', 'tiny.cc', 'is.gd', 'v.gd'
         ]
-        return any(domain in url for domain in short_domains)
+        host = urlparse(url).netloc.lower().split(':')[0]
+        if host.startswith('www.'):
+            host = host[4:]
+        return host in short_domains
     
     def _resolve_short_url(self, url: str) -> str:
         """Resolve URLs encurtadas seguindo redirects"""
@@ -172,6 +347,9 @@ class URLResolver:
     
     def _follow_redirects(self, url: str, max_redirects: int = 5) -> str:
         """Segue redirects até a URL final"""
+        self._local.used_network = True
+        with self.lock:
+            self.stats['network_resolutions'] += 1
         try:
             response = self.session.head(
                 url, 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - WebSailor Crawler
+Crawler concorrente com fronteira priorizada por relevância e orçamentos
+globais de páginas, bytes e tempo
+"""
+
+import os
+import re
+import time
+import heapq
+import random
+import logging
+import unicodedata
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from services.negative_cache import negative_cache
+
+logger = logging.getLogger(__name__)
+
+# Peso da origem na prioridade inicial de cada URL
+SOURCE_WEIGHTS = {
+    'real_search': 1.0,
+    'internal_link': 0.8,
+    'related_query': 0.7
+}
+
+MIN_CONTENT_LENGTH = 100
+
+class BoundedCrawler:
+    """
+    Crawler com fronteira de prioridade e trabalhadores concorrentes.
+    Até `workers` buscas ficam em andamento, mas os resultados são processados
+    estritamente na ordem de envio e uma nova URL só é retirada da fronteira
+    quando a mais antiga é processada. Assim, links enfileirados, páginas e
+    orçamentos de páginas/bytes não dependem do tempo de rede: dada a semente
+    (que desfaz empates na prioridade), o crawl é determinístico, salvo quando
+    o orçamento de tempo o interrompe. A cortesia por host fica a cargo do
+    fetch (agendador de hosts).
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Tuple[Optional[str], Dict[str, Any]]],
+        score: Callable[[str], float],
+        query: str,
+        max_depth: int = 1,
+        seed: Optional[int] = None
+    ):
+        """
+        fetch(url, deadline) -> (conteúdo, info) onde info traz 'bytes' (recebidos
+        pela rede) e 'links' [(url, âncora)]; o fetch não deve passar de deadline.
+        score(conteúdo) -> relevância da página.
+        """
+        self.fetch = fetch
+        self.score = score
+        self.query_terms = self._terms(query)
+        self.max_depth = max_depth
+
+        self.workers = int(os.getenv('WEBSAILOR_CRAWL_WORKERS', 8))
+        self.page_budget = int(os.getenv('WEBSAILOR_PAGE_BUDGET', 40))
+        self.byte_budget = int(os.getenv('WEBSAILOR_BYTE_BUDGET', 30 * 1024 * 1024))
+        self.time_budget = float(os.getenv('WEBSAILOR_TIME_BUDGET', 120))
+        self.links_per_page = int(os.getenv('WEBSAILOR_LINKS_PER_PAGE', 3))
+
+        seed = seed if seed is not None else int(os.getenv('WEBSAILOR_CRAWL_SEED', 0))
+        self.random = random.Random(seed)
+        self.frontier = []  # heap de (-prioridade, desempate, sequência, entrada)
+        self.sequence = 0
+        self.queued = set()
+        self.stats = {
+            'fetched': 0,
+            'pages': 0,
+            'bytes': 0,
+            'skipped': 0,
+            'failed': 0,
+            'stopped_by': None
+        }
+
+    def add_seed(self, url: str, title: str = '', snippet: str = '', rank: int = 0,
+                 source_type: str = 'real_search', **metadata):
+        """Adiciona resultado de busca à fronteira (rank 0 = primeiro resultado)"""
+        weight = SOURCE_WEIGHTS.get(source_type, 0.5)
+        priority = weight * (0.5 + 0.5 * self._overlap(f"{title} {snippet}")) / (1 + 0.1 * rank)
+        self._push(url, priority, {
+            'url': url,
+            'title': title,
+            'source_type': source_type,
+            'depth': 0,
+            **metadata
+        })
+
+    def _push(self, url: str, priority: float, entry: Dict[str, Any]):
+        """Enfileira URL ainda não vista"""
+        key = url.split('#')[0]
+        if not url or not url.startswith('http') or key in self.queued:
+            return
+        self.queued.add(key)
+        self.sequence += 1
+        heapq.heappush(self.frontier, (-priority, self.random.random(), self.sequence, entry))
+
+    def _next_entry(self) -> Optional[Dict[str, Any]]:
+        """Retira da fronteira a próxima URL que não está no cache negativo"""
+        while self.frontier:
+            entry = heapq.heappop(self.frontier)[3]
+            if negative_cache.should_skip(entry['url']):
+                self.stats['skipped'] += 1
+                continue
+            return entry
+        return None
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Executa o crawl até esgotar a fronteira ou algum orçamento"""
+        start_time = time.time()
+        deadline = start_time + self.time_budget
+        pages = []
+        pending = {}  # ordem de envio -> (future, entrada), até ser processada
+        submitted = 0
+        next_order = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='websailor')
+        try:
+            while True:
+                # Vagas só abrem quando a busca mais antiga é processada
+                while len(pending) < self.workers and self.stats['bytes'] < self.byte_budget:
+                    if self.stats['fetched'] + len(pending) >= self.page_budget:
+                        break
+                    entry = self._next_entry()
+                    if entry is None:
+                        break
+                    pending[submitted] = (executor.submit(self.fetch, entry['url'], deadline), entry)
+                    submitted += 1
+
+                if not pending:
+                    if self.frontier and self.stats['bytes'] >= self.byte_budget:
+                        self.stats['stopped_by'] = 'bytes'
+                    elif self.frontier and self.stats['fetched'] >= self.page_budget:
+                        self.stats['stopped_by'] = 'pages'
+                    break
+
+                remaining = deadline - time.time()
+                oldest = pending[next_order][0]
+                if remaining <= 0 or not wait([oldest], timeout=remaining).done:
+                    self.stats['stopped_by'] = 'time'
+                    break
+
+                # Uma por vez, para que a fronteira da próxima vaga não dependa de
+                # quantas buscas terminaram juntas
+                future, entry = pending.pop(next_order)
+                next_order += 1
+                self.stats['fetched'] += 1
+                if future.exception() is not None:
+                    self.stats['failed'] += 1
+                    continue
+
+                content, info = future.result()
+                self.stats['bytes'] += info.get('bytes', 0)
+                page = self._process(entry, content, info)
+                if page:
+                    pages.append(page)
+        finally:
+            # Orçamento de tempo é limite rígido: resultados pendentes são descartados,
+            # buscas não iniciadas são canceladas e as em andamento terminam no prazo
+            self.stats['failed'] += len(pending)
+            self.stats['fetched'] += len(pending)
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.time() - start_time
+        logger.info(
+            f"🕸️ Crawl concluído em {elapsed:.1f}s: {len(pages)} páginas úteis, "
+            f"{self.stats['fetched']} buscadas, {self.stats['bytes'] / 1024:.0f} KB"
+            f"{', parado por orçamento de ' + self.stats['stopped_by'] if self.stats['stopped_by'] else ''}"
+        )
+        self.stats['pages'] = len(pages)
+        self.stats['elapsed'] = elapsed
+        return pages
+
+    def _process(self, entry: Dict[str, Any], content: Optional[str], info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Pontua a página e enfileira seus links internos mais promissores"""
+        if not content or len(content) <= MIN_CONTENT_LENGTH:
+            self.stats['failed'] += 1
+            return None
+
+        weight = SOURCE_WEIGHTS.get(entry['source_type'], 0.5)
+        relevance = self.score(content)
+        page = {
+            **{key: value for key, value in entry.items() if key != 'depth'},
+            'content': content,
+            'relevance_score': relevance * weight if weight < 1.0 else relevance
+        }
+
+        if entry['depth'] < self.max_depth:
+            self._enqueue_links(entry, info.get('url') or entry['url'], info.get('links', []), relevance)
+
+        return page
+
+    def _enqueue_links(self, entry: Dict[str, Any], page_url: str, links: List[Tuple[str, str]], relevance: float):
+        """Enfileira links do mesmo domínio, priorizados pela relevância da página e pelo texto âncora"""
+        domain = self._domain(page_url)
+        internal = [
+            (link, anchor) for link, anchor in links
+            if self._domain(link) == domain and link.split('#')[0] not in self.queued
+        ]
+        # Ordenação estável: mesma entrada, mesma escolha
+        internal.sort(key=lambda item: self._overlap(item[1]), reverse=True)
+
+        parent_weight = SOURCE_WEIGHTS['internal_link'] * min(1.0, relevance / 10)
+        for link, anchor in internal[:self.links_per_page]:
+            self._push(link, parent_weight * (0.5 + 0.5 * self._overlap(anchor)), {
+                'url': link,
+                'title': anchor or f"Link interno de {entry['title']}",
+                'source_type': 'internal_link',
+                'parent_url': entry['url'],
+                'depth': entry['depth'] + 1
+            })
+
+    def _terms(self, text: str) -> set:
+        """Termos normalizados (sem acento, mais de 2 letras)"""
+        normalized = unicodedata.normalize('NFKD', (text or '').lower())
+        normalized = ''.join(char for char in normalized if not unicodedata.combining(char))
+        return {term for term in re.findall(r'\w+', normalized) if len(term) > 2}
+
+    def _overlap(self, text: str) -> float:
+        """Fração dos termos da query presentes no texto"""
+        if not self.query_terms:
+            return 0.0
+        return len(self.query_terms & self._terms(text)) / len(self.query_terms)
+
+    def _domain(self, url: str) -> str:
+        """Domínio normalizado"""
+        domain = urlparse(url).netloc.lower().split(':')[0]
+        return domain[4:] if domain.startswith('www.') else domain
@@ -2,25 +2,28 @@
 # -*- coding: utf-8 -*-
 """
 ARQV30 Enhanced v2.0 - WebSailor Integration REAL
-Navegação web REAL sem cache ou simulação - DADOS 100% REAIS
+Navegação web REAL sem simulação - DADOS 100% REAIS
 """
 
 import os
 import logging
 import time
-import requests
-from typing import Dict, List, Optional, Any
-from urllib.parse import quote_plus, urljoin
-import json
+from typing import Dict, List, Optional, Any, Tuple
 import re
 from datetime import datetime
 from bs4 import BeautifulSoup
-import random
+from concurrent.futures import ThreadPoolExecutor
+
+from services.host_scheduler import host_scheduler
+from services.negative_cache import negative_cache, REASON_HTTP_STATUS
+from services.search_providers import search_provider_registry
+from services.robust_content_extractor import robust_content_extractor
+from services.websailor_crawler import BoundedCrawler
 
 logger = logging.getLogger(__name__)
 
 class WebSailorAgent:
-    """Agente WebSailor para navegação web REAL - SEM CACHE OU SIMULAÇÃO"""
+    """Agente WebSailor para navegação web REAL - SEM SIMULAÇÃO"""
     
     def __init__(self):
         """Inicializa agente WebSailor REAL"""
@@ -30,7 +33,6 @@ class WebSailorAgent:
         self.google_cse_id = os.getenv("GOOGLE_CSE_ID")
         
         # URLs das APIs
-        self.google_search_url = "https://www.googleapis.com/customsearch/v1"
         self.jina_reader_url = "https://r.jina.ai/"
         
         # Headers REAIS para requisições
@@ -44,7 +46,7 @@ class WebSailorAgent:
             "Upgrade-Insecure-Requests": "1"
         }
         
-        # SEM CACHE - TUDO REAL!
+        # Buscas passam pelo registro de provedores (cache compartilhado); páginas são extraídas ao vivo
         logger.info(f"WebSailor Agent REAL initialized - Enabled: {self.enabled}")
     
     def is_available(self) -> bool:
@@ -57,9 +59,15 @@ class WebSailorAgent:
         context: Dict[str, Any],
         max_pages: int = 15,
         depth: int = 3,
-        aggressive_mode: bool = True
+        aggressive_mode: bool = True,
+        seed: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Navega e pesquisa informações REAIS com profundidade máxima"""
+        """
+        Navega e pesquisa informações REAIS com profundidade máxima.
+        As URLs dos buscadores alimentam um crawler concorrente com fronteira
+        priorizada e orçamentos de páginas, bytes e tempo; a mesma seed gera
+        a mesma ordem de navegação.
+        """
         
         if not self.is_available():
             logger.warning("WebSailor não está disponível")
@@ -69,92 +77,73 @@ class WebSailorAgent:
             logger.info(f"🚀 INICIANDO PESQUISA REAL para: {query}")
             start_time = time.time()
             
-            all_page_contents = []
-            
-            # 1. BUSCA REAL MÚLTIPLA
-            search_engines = [
-                self._google_search_real,
-                self._bing_search_real,
-                self._duckduckgo_search_real,
-                self._yahoo_search_real
+            # 1. BUSCA REAL MÚLTIPLA (buscadores e queries relacionadas em paralelo)
+            searches = [
+                (search_engine, query, max_pages, "real_search")
+                for search_engine in (
+                    self._google_search_real,
+                    self._bing_search_real,
+                    self._duckduckgo_search_real,
+                    self._yahoo_search_real
+                )
             ]
-            
-            for search_engine in search_engines:
-                try:
-                    results = search_engine(query, max_pages)
-                    if results:
-                        logger.info(f"✅ {search_engine.__name__}: {len(results)} resultados REAIS")
-                        
-                        # Extrai conteúdo REAL de cada página
-                        for result in results[:10]:  # Top 10 por engine
-                            content = self._extract_real_page_content(result["url"])
-                            if content and len(content) > 100:  # Só conteúdo substancial
-                                all_page_contents.append({
-                                    "url": result["url"],
-                                    "title": result["title"],
-                                    "content": content,
-                                    "relevance_score": self._calculate_real_relevance(content, query, context),
-                                    "source_type": "real_search",
-                                    "search_engine": search_engine.__name__
-                                })
-                                
-                                # Delay para não sobrecarregar
-                                time.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.warning(f"Erro em {search_engine.__name__}: {str(e)}")
-                    continue
-            
-            # 2. PESQUISA EM PROFUNDIDADE REAL
-            if depth > 1 and all_page_contents:
-                logger.info(f"🔍 PESQUISA EM PROFUNDIDADE REAL (nível {depth})...")
-                top_pages = sorted(all_page_contents, key=lambda x: x["relevance_score"], reverse=True)[:5]
-                
-                for page in top_pages:
-                    internal_links = self._extract_real_internal_links(page["url"], page["content"])
-                    for link in internal_links[:3]:  # Top 3 links internos
-                        internal_content = self._extract_real_page_content(link)
-                        if internal_content and len(internal_content) > 100:
-                            all_page_contents.append({
-                                "url": link,
-                                "title": f"Link interno de {page['title']}",
-                                "content": internal_content,
-                                "relevance_score": self._calculate_real_relevance(internal_content, query, context) * 0.8,
-                                "source_type": "internal_link",
-                                "parent_url": page["url"]
-                            })
-                            time.sleep(0.3)
-            
-            # 3. PESQUISA DE QUERIES RELACIONADAS REAIS
             if aggressive_mode:
                 logger.info("🎯 PESQUISA AGRESSIVA COM QUERIES RELACIONADAS REAIS...")
-                related_queries = self._generate_real_related_queries(query, context)
-                
-                for related_query in related_queries[:3]:
+                searches.extend(
+                    (self._google_search_real, related_query, 5, "related_query")
+                    for related_query in self._generate_real_related_queries(query, context)[:3]
+                )
+            
+            crawler = BoundedCrawler(
+                fetch=self._crawl_fetch,
+                score=lambda content: self._calculate_real_relevance(content, query, context),
+                query=query,
+                max_depth=max(0, depth - 1),
+                seed=seed
+            )
+            
+            with ThreadPoolExecutor(max_workers=len(searches)) as executor:
+                futures = [
+                    executor.submit(search_engine, search_query, limit)
+                    for search_engine, search_query, limit, _ in searches
+                ]
+                
+                # Semeia na ordem fixa das buscas, não na ordem de conclusão
+                for (search_engine, search_query, _, source_type), future in zip(searches, futures):
                     try:
-                        related_results = self._google_search_real(related_query, 5)
-                        for result in related_results:
-                            content = self._extract_real_page_content(result["url"])
-                            if content and len(content) > 100:
-                                all_page_contents.append({
-                                    "url": result["url"],
-                                    "title": result["title"],
-                                    "content": content,
-                                    "relevance_score": self._calculate_real_relevance(content, query, context) * 0.7,
-                                    "source_type": "related_query",
-                                    "original_query": related_query
-                                })
-                                time.sleep(0.4)
+                        results = future.result()
                     except Exception as e:
-                        logger.warning(f"Erro em query relacionada '{related_query}': {str(e)}")
+                        logger.warning(f"Erro em {search_engine.__name__} ('{search_query}'): {str(e)}")
                         continue
+                    
+                    if source_type == "real_search":
+                        logger.info(f"✅ {search_engine.__name__}: {len(results)} resultados REAIS")
+                        results = results[:10]  # Top 10 por engine
+                        metadata = {"search_engine": search_engine.__name__}
+                    else:
+                        metadata = {"original_query": search_query}
+                    
+                    for rank, result in enumerate(results):
+                        crawler.add_seed(
+                            result["url"],
+                            title=result.get("title", ""),
+                            snippet=result.get("snippet", ""),
+                            rank=rank,
+                            source_type=source_type,
+                            **metadata
+                        )
+            
+            # 2. NAVEGAÇÃO REAL COM PROFUNDIDADE (links internos do HTML já baixado)
+            logger.info(f"🔍 PESQUISA EM PROFUNDIDADE REAL (nível {depth})...")
+            all_page_contents = crawler.run()
             
-            # 4. FILTRA E ORDENA POR RELEVÂNCIA REAL
+            # 3. FILTRA E ORDENA POR RELEVÂNCIA REAL
             all_page_contents = [p for p in all_page_contents if p["relevance_score"] > 1.0]
             all_page_contents.sort(key=lambda x: x["relevance_score"], reverse=True)
             
-            # 5. CONSOLIDA INFORMAÇÕES REAIS
+            # 4. CONSOLIDA INFORMAÇÕES REAIS
             research_result = self._consolidate_real_research(all_page_contents, query, context)
+            research_result["crawl_stats"] = crawler.stats
             
             end_time = time.time()
             logger.info(f"✅ PESQUISA REAL CONCLUÍDA em {end_time - start_time:.2f} segundos")
@@ -166,188 +155,52 @@ class WebSailorAgent:
             logger.error(f"❌ ERRO CRÍTICO na pesquisa real: {str(e)}", exc_info=True)
             return self._generate_emergency_real_research(query, context)
     
+    def _crawl_fetch(self, url: str, deadline: float) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Baixa a página uma única vez pelo extrator robusto (cortesia por host via
+        agendador) e devolve o conteúdo com os links já extraídos do HTML.
+        Jina Reader fica como fallback quando a extração direta falha.
+        Nada continua rodando depois de deadline (orçamento do crawl).
+        """
+        # Consultado antes da extração, que registra no cache negativo a própria falha
+        known_bad = negative_cache.check(url, count=False) is not None
+        
+        info = {}
+        content = robust_content_extractor.extract_content(url, document_info=info, deadline=deadline)
+        
+        remaining = deadline - time.time()
+        if not content and self.jina_api_key and not known_bad and remaining >= 1:
+            content = self._extract_with_jina_real(url, timeout=min(30, remaining))
+        
+        if content and len(content) > 15000:
+            content = content[:15000] + "... [conteúdo truncado para otimização]"
+        
+        return content, info
+    
     def _google_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando Google Custom Search API"""
-        
-        if not self.google_search_key or not self.google_cse_id:
-            logger.warning("Google Search API não configurada")
-            return []
-        
-        try:
-            enhanced_query = self._enhance_search_query_real(query)
-            
-            params = {
-                "key": self.google_search_key,
-                "cx": self.google_cse_id,
-                "q": enhanced_query,
-                "num": min(max_results, 10),
-                "lr": "lang_pt",
-                "gl": "br",
-                "safe": "off",
-                "dateRestrict": "m6",  # Últimos 6 meses
-                "sort": "date"
-            }
-            
-            response = requests.get(
-                self.google_search_url,
-                params=params,
-                headers=self.headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = []
-                
-                for item in data.get("items", []):
-                    results.append({
-                        "title": item.get("title", ""),
-                        "url": item.get("link", ""),
-                        "snippet": item.get("snippet", ""),
-                        "source": "google_real"
-                    })
-                
-                logger.info(f"🔍 Google Search REAL: {len(results)} resultados")
-                return results
-            else:
-                logger.warning(f"Google Search falhou: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Erro no Google Search REAL: {str(e)}")
-            return []
+        return self._registry_search("google", self._enhance_search_query_real(query), max_results, "google_real")
     
     def _bing_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando Bing"""
-        
-        try:
-            # Bing search via scraping
-            search_url = f"https://www.bing.com/search?q={quote_plus(query)}&cc=br&setlang=pt-br"
-            
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                
-                # Extrai resultados do Bing
-                result_items = soup.find_all('li', class_='b_algo')
-                
-                for item in result_items[:max_results]:
-                    title_elem = item.find('h2')
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        if link_elem:
-                            title = title_elem.get_text(strip=True)
-                            url = link_elem.get('href', '')
-                            
-                            snippet_elem = item.find('p')
-                            snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                            
-                            if url and title:
-                                results.append({
-                                    "title": title,
-                                    "url": url,
-                                    "snippet": snippet,
-                                    "source": "bing_real"
-                                })
-                
-                logger.info(f"🔍 Bing Search REAL: {len(results)} resultados")
-                return results
-                
-        except Exception as e:
-            logger.error(f"Erro no Bing Search REAL: {str(e)}")
-            return []
+        return self._registry_search("bing", query, max_results, "bing_real")
     
     def _duckduckgo_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando DuckDuckGo"""
-        
-        try:
-            search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                
-                result_divs = soup.find_all('div', class_='result')
-                
-                for div in result_divs[:max_results]:
-                    title_elem = div.find('a', class_='result__a')
-                    snippet_elem = div.find('a', class_='result__snippet')
-                    
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        url = title_elem.get('href', '')
-                        snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                        
-                        if url and title and url.startswith('http'):
-                            results.append({
-                                "title": title,
-                                "url": url,
-                                "snippet": snippet,
-                                "source": "duckduckgo_real"
-                            })
-                
-                logger.info(f"🔍 DuckDuckGo Search REAL: {len(results)} resultados")
-                return results
-                
-        except Exception as e:
-            logger.error(f"Erro no DuckDuckGo Search REAL: {str(e)}")
-            return []
+        return self._registry_search("duckduckgo", query, max_results, "duckduckgo_real")
     
     def _yahoo_search_real(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         """Busca REAL usando Yahoo"""
-        
-        try:
-            search_url = f"https://br.search.yahoo.com/search?p={quote_plus(query)}"
-            
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                results = []
-                
-                result_items = soup.find_all('div', class_='Sr')
-                
-                for item in result_items[:max_results]:
-                    title_elem = item.find('h3')
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        if link_elem:
-                            title = title_elem.get_text(strip=True)
-                            url = link_elem.get('href', '')
-                            
-                            snippet_elem = item.find('span', class_='fz-ms')
-                            snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                            
-                            if url and title and url.startswith('http'):
-                                results.append({
-                                    "title": title,
-                                    "url": url,
-                                    "snippet": snippet,
-                                    "source": "yahoo_real"
-                                })
-                
-                logger.info(f"🔍 Yahoo Search REAL: {len(results)} resultados")
-                return results
-                
-        except Exception as e:
-            logger.error(f"Erro no Yahoo Search REAL: {str(e)}")
-            return []
+        return self._registry_search("yahoo", query, max_results, "yahoo_real")
+    
+    def _registry_search(self, provider: str, query: str, max_results: int, source: str) -> List[Dict[str, Any]]:
+        """Busca pelo registro compartilhado (cache, quotas e pool de conexões)"""
+        results = [
+            {**item, "source": source}
+            for item in search_provider_registry.search(provider, query, max_results)
+        ]
+        logger.info(f"🔍 {provider} Search REAL: {len(results)} resultados")
+        return results
     
     def _extract_real_page_content(self, url: str) -> Optional[str]:
         """Extrai conteúdo REAL de uma página web"""
@@ -355,6 +208,10 @@ class WebSailorAgent:
         if not url or not url.startswith("http"):
             return None
         
+        # Páginas conhecidamente ruins são puladas
+        if negative_cache.should_skip(url):
+            return None
+        
         try:
             # Tenta primeiro com Jina Reader se disponível
             if self.jina_api_key:
@@ -369,7 +226,7 @@ class WebSailorAgent:
             logger.error(f"Erro ao extrair conteúdo REAL de {url}: {str(e)}")
             return None
     
-    def _extract_with_jina_real(self, url: str) -> Optional[str]:
+    def _extract_with_jina_real(self, url: str, timeout: float = 30) -> Optional[str]:
         """Extrai conteúdo REAL usando Jina Reader API"""
         
         try:
@@ -380,10 +237,10 @@ class WebSailorAgent:
             
             jina_url = f"{self.jina_reader_url}{url}"
             
-            response = requests.get(
+            response = host_scheduler.get(
                 jina_url,
                 headers=headers,
-                timeout=30
+                timeout=timeout
             )
             
             if response.status_code == 200:
@@ -406,7 +263,7 @@ class WebSailorAgent:
         """Extração REAL direta usando requests + BeautifulSoup"""
         
         try:
-            response = requests.get(
+            response = host_scheduler.get(
                 url,
                 headers=self.headers,
                 timeout=20,
@@ -440,41 +297,13 @@ class WebSailorAgent:
                 return text
             else:
                 logger.warning(f"Falha ao acessar {url}: {response.status_code}")
+                negative_cache.record_failure(url, REASON_HTTP_STATUS, response.status_code)
                 return None
                 
         except Exception as e:
             logger.error(f"Erro na extração direta REAL para {url}: {str(e)}")
             return None
     
-    def _extract_real_internal_links(self, base_url: str, content: str) -> List[str]:
-        """Extrai links internos REAIS de uma página"""
-        
-        links = []
-        try:
-            # Faz nova requisição para obter HTML completo
-            response = requests.get(base_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                base_domain = base_url.split('/')[2]
-                
-                for a_tag in soup.find_all("a", href=True):
-                    href = a_tag["href"]
-                    full_url = urljoin(base_url, href)
-                    
-                    # Filtra apenas links do mesmo domínio
-                    if (full_url.startswith('http') and 
-                        base_domain in full_url and 
-                        "#" not in full_url and 
-                        full_url != base_url and
-                        not any(ext in full_url.lower() for ext in ['.pdf', '.jpg', '.png', '.gif', '.zip'])):
-                        links.append(full_url)
-                
-                logger.info(f"🔗 {len(links)} links internos REAIS encontrados em {base_url}")
-        except Exception as e:
-            logger.warning(f"Erro ao extrair links internos REAIS de {base_url}: {str(e)}")
-        
-        return list(set(links))[:10]  # Remove duplicatas e limita
-    
     def _calculate_real_relevance(
         self, 
         content: str, 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - ZIP Stream
+Geração de ZIP em fluxo: cada entrada é comprimida e entregue em pedaços
+conforme é escrita, sem arquivo temporário nem o ZIP inteiro em memória
+"""
+
+import time
+import zipfile
+import logging
+from typing import Iterable, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+class _StreamBuffer:
+    """Destino não pesquisável do ZipFile: acumula bytes até serem drenados"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]], compression: int = zipfile.ZIP_DEFLATED) -> Iterator[bytes]:
+    """
+    Gera os bytes de um ZIP com as entradas (nome, conteúdo) à medida que são
+    comprimidas. Como o destino não é pesquisável, tamanhos e CRC vão em data
+    descriptors após cada entrada (formato suportado pelos leitores de ZIP).
+    """
+    buffer = _StreamBuffer()
+    date_time = time.localtime()[:6]
+
+    with zipfile.ZipFile(buffer, 'w', compression) as zipf:
+        for arcname, content in entries:
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.compress_type = compression
+            with zipf.open(info, 'w', force_zip64=len(content) > 0x7FFFFFFF) as entry:
+                for start in range(0, len(content), CHUNK_SIZE):
+                    entry.write(content[start:start + CHUNK_SIZE])
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+
+    # Diretório central
+    yield buffer.drain()
@@ -1369,7 +1369,7 @@ class AnalysisManager {
                 let message = 'Estatísticas dos Extratores:\n';
                 
                 for (const [name, data] of Object.entries(stats)) {
-                    if (name !== 'global') {
+                    if (name !== 'global' && name !== 'domain_routing') {
                         message += `${name}: ${data.available ? 'Ativo' : 'Inativo'}\n`;
                     }
                 }
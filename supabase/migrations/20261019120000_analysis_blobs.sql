@@ -0,0 +1,81 @@
+/*
+  # Tabela lateral de blobs e linha principal enxuta
+
+  1. Nova Tabela
+    - `analysis_blobs`
+      - `analysis_id` (uuid, foreign key)
+      - `kind` (text) - tipo do blob (pesquisa_web, dados_base)
+      - `encoding` (text) - zlib+base64 (gravado pela aplicação) ou json (migrado)
+      - `data` (text) - conteúdo codificado
+      - `raw_size` (bigint) - tamanho do JSON sem compressão
+      - `created_at` (timestamptz)
+
+  2. Migração de dados
+    - `pesquisa_web_data` e `comprehensive_analysis` saem da tabela `analyses`
+      e vão para `analysis_blobs` (encoding `json`); as colunas ficam nulas,
+      mantendo a linha principal estreita para listagens e estatísticas
+
+  3. Segurança
+    - Habilitar RLS na tabela `analysis_blobs`
+    - Adicionar políticas de acesso
+*/
+
+CREATE TABLE IF NOT EXISTS analysis_blobs (
+  analysis_id uuid NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+  kind text NOT NULL,
+  encoding text NOT NULL DEFAULT 'zlib+base64',
+  data text NOT NULL,
+  raw_size bigint DEFAULT 0,
+  created_at timestamptz DEFAULT now(),
+  PRIMARY KEY (analysis_id, kind)
+);
+
+-- Habilitar RLS
+ALTER TABLE analysis_blobs ENABLE ROW LEVEL SECURITY;
+
+-- Política para leitura
+CREATE POLICY "Permitir leitura de blobs de análise"
+  ON analysis_blobs
+  FOR SELECT
+  USING (true);
+
+-- Política para inserção
+CREATE POLICY "Permitir inserção de blobs de análise"
+  ON analysis_blobs
+  FOR INSERT
+  WITH CHECK (true);
+
+-- Política para atualização (upsert idempotente)
+CREATE POLICY "Permitir atualização de blobs de análise"
+  ON analysis_blobs
+  FOR UPDATE
+  USING (true);
+
+-- Política para exclusão
+CREATE POLICY "Permitir exclusão de blobs de análise"
+  ON analysis_blobs
+  FOR DELETE
+  USING (true);
+
+-- Política para atualização de arquivos (upsert idempotente de analysis_files)
+CREATE POLICY "Permitir atualização de arquivos de análise"
+  ON analysis_files
+  FOR UPDATE
+  USING (true);
+
+-- Move blobs existentes para a tabela lateral
+INSERT INTO analysis_blobs (analysis_id, kind, encoding, data, raw_size)
+SELECT id, 'pesquisa_web', 'json', pesquisa_web_data::text, octet_length(pesquisa_web_data::text)
+FROM analyses
+WHERE pesquisa_web_data IS NOT NULL
+ON CONFLICT (analysis_id, kind) DO NOTHING;
+
+INSERT INTO analysis_blobs (analysis_id, kind, encoding, data, raw_size)
+SELECT id, 'dados_base', 'json', comprehensive_analysis::text, octet_length(comprehensive_analysis::text)
+FROM analyses
+WHERE comprehensive_analysis IS NOT NULL
+ON CONFLICT (analysis_id, kind) DO NOTHING;
+
+UPDATE analyses
+SET pesquisa_web_data = NULL, comprehensive_analysis = NULL
+WHERE pesquisa_web_data IS NOT NULL OR comprehensive_analysis IS NOT NULL;
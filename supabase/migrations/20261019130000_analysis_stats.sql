@@ -0,0 +1,30 @@
+/*
+  # Estatísticas agregadas de análises
+
+  1. Nova Função
+    - `analysis_stats(recent_since timestamptz)`
+      - Retorna uma linha por status com o total de análises e quantas foram
+        criadas desde `recent_since`, agregadas no servidor (GROUP BY) em vez
+        de transferir a coluna `status` de todas as linhas
+
+  2. Índices
+    - `idx_analyses_status_created_at` cobre o agrupamento por status e o
+      filtro por data
+*/
+
+CREATE INDEX IF NOT EXISTS idx_analyses_status_created_at ON analyses(status, created_at);
+
+CREATE OR REPLACE FUNCTION analysis_stats(recent_since timestamptz)
+RETURNS TABLE (status text, total bigint, recent bigint)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    a.status,
+    COUNT(*) AS total,
+    COUNT(*) FILTER (WHERE a.created_at >= recent_since) AS recent
+  FROM analyses a
+  GROUP BY a.status;
+$$;
+
+GRANT EXECUTE ON FUNCTION analysis_stats(timestamptz) TO anon, authenticated;
@@ -0,0 +1,18 @@
+/*
+  # Índices para paginação por keyset e listagem filtrada
+
+  1. Índices
+    - `idx_analyses_keyset` (created_at DESC, id DESC): a página seguinte
+      começa em `(created_at, id) < cursor` direto no índice, sem OFFSET
+    - `idx_analyses_segmento_keyset` e `idx_analyses_status_keyset`: mesma
+      ordem dentro de cada segmento/status, para os filtros da listagem
+
+  2. Observações
+    - `idx_analyses_created_at` deixa de ser necessário (prefixo do keyset)
+*/
+
+CREATE INDEX IF NOT EXISTS idx_analyses_keyset ON analyses(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_segmento_keyset ON analyses(segmento, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_status_keyset ON analyses(status, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_analyses_created_at;